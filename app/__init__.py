@@ -3,8 +3,6 @@ from config import Config
 from jinja2 import StrictUndefined
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-import os
-from app.control_model import train_power_model
 from app.monitoring import DataProvider
 
 
@@ -30,28 +28,8 @@ def create_app():
 
     return app
 
-# training RF Model when first running the app
-def auto_train_model():
-    model_dir = "app/ML_Model"
-    model_path = os.path.join(model_dir, "rf_power_model.pkl")
-    encoder_path = os.path.join(model_dir, "label_encoder.pkl")
-
-    # check if the model already exists
-    if not os.path.exists(model_path) or not os.path.exists(encoder_path):
-        print("Starting automatic model training...")
-        try:
-            os.makedirs(model_dir, exist_ok=True)
-
-            model, le = train_power_model()
-            print("Model training completed successfully")
-
-        except Exception as e:
-            print(f"Model training failed: {str(e)}")
-    else:
-        print("Found existing model files, skipping training")
-
-with app.app_context():
-    auto_train_model()
+# the RF model is trained (when missing) and loaded in the background by
+# the ModelManager started in views.py, so importing the app never blocks on it
 
 # other imports
 from app import views, models, debug_utils
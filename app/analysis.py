@@ -4,19 +4,26 @@ Analysis module for power monitoring system.
 This module contains the AnalysisEngine class which provides methods for
 analyzing power consumption data, generating insights, and detecting anomalies.
 """
+import heapq
+import math
 import statistics
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
 import numpy as np
-from typing import List, Dict, Union, Tuple, Optional
+from typing import Any, Callable, Hashable, List, Dict, Union, Tuple, Optional
+
+from app.monitoring import Observer
 
 
 class AnalysisEngine:
-    def __init__(self, threshold: float):
+    def __init__(self, threshold: float, cache_size: int = 32):
         """
         Initialize the Analysis Engine with a threshold for anomaly detection.
 
         Args:
             threshold (float): A threshold value (in Watts) above which data is considered anomalous.
+            cache_size (int): Maximum number of results kept by memoize().
         """
         self.threshold = threshold
         # Define severity levels as percentages above threshold
@@ -27,6 +34,71 @@ class AnalysisEngine:
             'low': 0.0  # At or just above threshold
         }
 
+        # LRU result cache for memoize(), valid for a single history version
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._cache_lock = threading.Lock()
+
+    def memoize(self, version: Hashable, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result of compute() for a history version, computing it on a miss.
+
+        Versions come from DataProvider.version, which changes on every new reading and on
+        reset, so a new version invalidates every cached entry. Within a version, entries
+        are evicted least-recently-used once cache_size is exceeded.
+
+        Args:
+            version (Hashable): Version of the history the result is derived from.
+            key (Hashable): Identifies the computation, e.g. the endpoint and its parameters.
+            compute (Callable): Zero-argument callable producing the result.
+
+        Returns:
+            Any: The cached or freshly computed result.
+        """
+        cache_key = (key, self.threshold)
+        with self._cache_lock:
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+            elif cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return self._cache[cache_key]
+            self.cache_misses += 1
+
+        result = compute()
+
+        with self._cache_lock:
+            # Only store if no newer version has been seen while computing
+            if version == self._cache_version:
+                self._cache[cache_key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters and the current size of the result cache.
+        """
+        with self._cache_lock:
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._cache),
+                "max_size": self.cache_size
+            }
+
+    def clear_cache(self) -> None:
+        """
+        Drop every cached result.
+        """
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_version = None
+
     def analyze(self, power_history: List[float]) -> List[float]:
         """
         Analyze power history data and return values that exceed the threshold.
@@ -46,6 +118,45 @@ class AnalysisEngine:
                 alerts.append(data)
         return alerts
 
+    def analyze_batch(self, power_history: Union[List[float], np.ndarray]) -> List[float]:
+        """
+        Vectorized equivalent of analyze() for long power histories.
+
+        The threshold comparison runs as a single NumPy pass and only the matching
+        readings are pulled back out of the original sequence, so the returned
+        values keep their original Python types.
+
+        Args:
+            power_history (List[float] | np.ndarray): Power consumption values in Watts.
+
+        Returns:
+            List[float]: The same list analyze() would return.
+        """
+        if len(power_history) == 0:
+            return []
+
+        values = np.asarray(power_history, dtype=np.float64)
+        indices = np.flatnonzero(values > self.threshold)
+        if isinstance(power_history, np.ndarray):
+            return power_history[indices].tolist()
+        return [power_history[i] for i in indices.tolist()]
+
+    def _severity_bins(self) -> Tuple[np.ndarray, List[str]]:
+        """
+        Build ascending bin edges and matching level names from severity_levels.
+
+        Returns:
+            Tuple[np.ndarray, List[str]]: Sorted lower bounds and their level names.
+        """
+        edges, names = [], []
+        for level, percentage in sorted(self.severity_levels.items(), key=lambda x: x[1]):
+            # On duplicate bounds keep the first level, as the descending scan would
+            if edges and edges[-1] == percentage:
+                continue
+            edges.append(percentage)
+            names.append(level)
+        return np.array(edges, dtype=np.float64), names
+
     def analyze_with_severity(self, power_history: List[float]) -> List[Dict[str, Union[float, str]]]:
         """
         Analyze power history data and return values that exceed the threshold with severity levels.
@@ -84,6 +195,68 @@ class AnalysisEngine:
 
         return result
 
+    def analyze_with_severity_batch(self, power_history: Union[List[float], np.ndarray]
+                                    ) -> List[Dict[str, Union[float, str]]]:
+        """
+        Vectorized equivalent of analyze_with_severity() for long power histories.
+
+        Readings at or above the threshold are selected in one pass and their severity
+        is looked up with np.searchsorted against bin edges built once per call, instead
+        of sorting severity_levels again for every alert.
+
+        Args:
+            power_history (List[float] | np.ndarray): Power consumption values in Watts.
+
+        Returns:
+            List[Dict]: The same list of dictionaries analyze_with_severity() would return.
+        """
+        if len(power_history) == 0:
+            return []
+
+        values = np.asarray(power_history, dtype=np.float64)
+        indices = np.flatnonzero(values >= self.threshold)
+        if indices.size == 0:
+            return []
+
+        excess = (values[indices] - self.threshold) / self.threshold
+        edges, names = self._severity_bins()
+        # Index of the highest edge that is <= excess; -1 means no level matched and
+        # selects the trailing 'low' default appended to the labels below
+        buckets = np.searchsorted(edges, excess, side='right') - 1
+
+        if isinstance(power_history, np.ndarray):
+            originals = power_history[indices].tolist()
+        else:
+            originals = [power_history[i] for i in indices.tolist()]
+
+        # Label lookup and the *100 scaling are vectorized; only the final rounding
+        # stays in Python so the output matches round() exactly
+        labels = np.array(names + ['low'], dtype=object)[buckets].tolist()
+        percentages = (excess * 100).tolist()
+
+        return [{'value': data, 'severity': severity, 'excess_percentage': round(percentage, 2)}
+                for data, severity, percentage in zip(originals, labels, percentages)]
+
+    def severity_counts(self, power_history: Union[List[float], np.ndarray]) -> Dict[str, int]:
+        """
+        Count readings per severity level without building one dictionary per alert.
+
+        Args:
+            power_history (List[float] | np.ndarray): Power consumption values in Watts.
+
+        Returns:
+            Dict[str, int]: Number of readings at or above the threshold for each severity level.
+        """
+        edges, names = self._severity_bins()
+        counts = dict.fromkeys(self.severity_levels, 0)
+        values = np.asarray(power_history, dtype=np.float64)
+        excess = (values[values >= self.threshold] - self.threshold) / self.threshold
+        buckets = np.searchsorted(edges, excess, side='right') - 1
+        counts['low'] = counts.get('low', 0) + int(np.count_nonzero(buckets < 0))
+        for bucket, count in enumerate(np.bincount(buckets[buckets >= 0], minlength=len(names)).tolist()):
+            counts[names[bucket]] += count
+        return counts
+
     def generate_trend_report(self, power_history: List[float]) -> str:
         """
         Generate a trend report based on power history data.
@@ -185,12 +358,7 @@ class AnalysisEngine:
         increases = sum(1 for i in range(1, len(moving_avgs)) if moving_avgs[i] > moving_avgs[i - 1])
         decreases = sum(1 for i in range(1, len(moving_avgs)) if moving_avgs[i] < moving_avgs[i - 1])
 
-        if increases > len(moving_avgs) * 0.7:
-            results["trend_pattern"] = "consistent_increase"
-        elif decreases > len(moving_avgs) * 0.7:
-            results["trend_pattern"] = "consistent_decrease"
-        else:
-            results["trend_pattern"] = "fluctuating"
+        results["trend_pattern"] = _trend_pattern(increases, decreases, len(moving_avgs))
 
         # Check for cyclic patterns (simple approach: look for alternating increases and decreases)
         alt_count = sum(1 for i in range(2, len(moving_avgs))
@@ -211,10 +379,133 @@ class AnalysisEngine:
 
         return results
 
+    def detect_patterns_batch(self, power_history: Union[List[float], np.ndarray],
+                              window_size: int = 5) -> Dict[str, any]:
+        """
+        Vectorized O(n) equivalent of detect_patterns().
+
+        Consecutive moving averages share all but one reading, so for integer readings
+        (what the sensors produce) whether the average rose or fell is decided exactly by
+        comparing the reading entering the window with the one leaving it. Fractional
+        readings instead build the window sums with window_size shifted array additions,
+        which round exactly like the left-to-right sum() in detect_patterns(); cumulative
+        sum differences would not, and near-ties could then flip a rise into a fall.
+
+        Args:
+            power_history (List[float] | np.ndarray): Power consumption values in Watts.
+            window_size (int): Size of the window to use for moving averages.
+
+        Returns:
+            Dict: The same dictionary detect_patterns() would return.
+        """
+        if len(power_history) < window_size * 2:
+            return {"status": "Insufficient data for pattern detection"}
+
+        values = np.asarray(power_history, dtype=np.float64)
+        moving_avg_count = len(values) - window_size + 1
+        results = {}
+
+        # Sign of moving_avgs[i] - moving_avgs[i - 1] for every i >= 1
+        if np.array_equal(values, np.trunc(values)) and np.abs(values).max() * window_size < 2 ** 53:
+            directions = np.sign(values[window_size:] - values[:-window_size])
+        else:
+            window_sums = values[:moving_avg_count].copy()
+            for offset in range(1, window_size):
+                window_sums += values[offset:offset + moving_avg_count]
+            directions = np.sign(np.diff(window_sums / window_size))
+        increases = int(np.count_nonzero(directions > 0))
+        decreases = int(np.count_nonzero(directions < 0))
+        results["trend_pattern"] = _trend_pattern(increases, decreases, moving_avg_count)
+
+        # A strict rise followed by a strict fall (or vice versa) has a negative product
+        alt_count = int(np.count_nonzero(directions[1:] * directions[:-1] < 0))
+        if alt_count > moving_avg_count * 0.4:
+            results["cyclic_pattern"] = True
+
+        middle = values[1:-1]
+        spikes = (middle > values[:-2] * 1.5) & (middle > values[2:] * 1.5)
+        results["spike_count"] = int(np.count_nonzero(spikes))
+
+        return results
+
+    def detect_periodicity(self, power_history: Union[List[float], np.ndarray],
+                           sample_interval_minutes: float = 15, window_points: int = 4096,
+                           max_windows: int = 8, top_k: int = 3,
+                           min_strength: float = 0.05) -> Dict[str, any]:
+        """
+        Detect dominant cycles (e.g. daily or weekly) with a real FFT of the history.
+
+        The most recent readings are cut into at most max_windows windows of window_points
+        samples, and their power spectra and autocorrelations are averaged (Welch's method).
+        The cost is bounded by max_windows FFTs of window_points samples, however long the
+        history is; with the defaults, 15-minute data resolves cycles of up to ~3 weeks.
+        Spectral peaks give the candidate periods, which are then refined to the nearest
+        autocorrelation maximum so a 24h cycle is reported as 24h rather than the nearest
+        FFT bin.
+
+        Args:
+            power_history (List[float] | np.ndarray): Power consumption values in Watts,
+                sampled at a regular interval.
+            sample_interval_minutes (float): Minutes between consecutive readings.
+            window_points (int): Samples per FFT window.
+            max_windows (int): Maximum number of most recent windows to average.
+            top_k (int): Maximum number of periods to report.
+            min_strength (float): Minimum share of spectral power for a period to be reported.
+
+        Returns:
+            Dict: The dominant periods, strongest first. Each entry has the period in hours
+            and in samples, its share of the spectral power ("strength", 0-1) and the
+            autocorrelation of the series at that lag.
+        """
+        values = np.asarray(power_history, dtype=np.float64)
+        if len(values) < 8:
+            return {"status": "Insufficient data for periodicity detection"}
+
+        size = min(window_points, len(values))
+        count = min(max_windows, len(values) // size)
+        windows = values[len(values) - size * count:].reshape(count, size)
+        windows = windows - windows.mean(axis=1, keepdims=True)
+
+        spectrum = (np.abs(np.fft.rfft(windows * np.hanning(size), axis=1)) ** 2).mean(axis=0)
+        # Zero-padding makes the FFT-based autocorrelation linear rather than circular
+        padded = np.abs(np.fft.rfft(windows, n=2 * size, axis=1)) ** 2
+        autocorrelation = np.fft.irfft(padded.mean(axis=0))[:size]
+        # Unbiased estimate: each lag is averaged over the size - lag pairs it covers
+        autocorrelation /= size - np.arange(size)
+
+        results = {
+            "points_used": size * count,
+            "dominant_periods": []
+        }
+        total_power = spectrum[1:].sum()
+        if total_power <= 0 or autocorrelation[0] <= 0:
+            return results
+        autocorrelation /= autocorrelation[0]
+
+        # Local spectral maxima, skipping the DC bin and cycles seen fewer than two times
+        inner = spectrum[1:-1]
+        peaks = np.flatnonzero((inner > spectrum[:-2]) & (inner >= spectrum[2:])) + 1
+        peaks = peaks[(peaks >= 2) & (spectrum[peaks] >= min_strength * total_power)]
+
+        for index in peaks[np.argsort(spectrum[peaks])[::-1][:top_k]]:
+            # Refine the bin's period to the autocorrelation peak within +/- one bin
+            low = max(1, int(size / (index + 1)))
+            high = min(size - 1, int(math.ceil(size / (index - 1))))
+            lag = low + int(np.argmax(autocorrelation[low:high + 1]))
+            results["dominant_periods"].append({
+                "period_hours": round(lag * sample_interval_minutes / 60, 2),
+                "period_samples": lag,
+                "strength": round(float(spectrum[index] / total_power), 4),
+                "autocorrelation": round(float(autocorrelation[lag]), 4)
+            })
+
+        return results
+
     def forecast_consumption(self, power_history: List[float], periods_ahead: int = 3) -> List[float]:
         """
         Generate a simple forecast of future power consumption based on historical data.
         Uses a weighted moving average approach where recent values have higher weight.
+        The history itself is left untouched; only its last five values are read.
 
         Args:
             power_history (List[float]): A list of power consumption values in Watts.
@@ -223,27 +514,528 @@ class AnalysisEngine:
         Returns:
             List[float]: Forecasted power consumption values.
         """
-        if len(power_history) < 5:
-            # Not enough data for meaningful forecast, use simple average
-            return [sum(power_history) / len(power_history)] * periods_ahead
+        forecaster = WeightedMovingAverageForecaster()
+        forecaster.extend(power_history[-len(forecaster.weights):])
+        return forecaster.forecast(periods_ahead)
+
+
+def _trend_pattern(increases: int, decreases: int, moving_avg_count: int) -> str:
+    """
+    Classify the moving-average trend from its rise and fall counts.
+    """
+    if increases > moving_avg_count * 0.7:
+        return "consistent_increase"
+    if decreases > moving_avg_count * 0.7:
+        return "consistent_decrease"
+    return "fluctuating"
+
+
+class StreamingStatistics(Observer):
+    """
+    Incremental accumulator for the statistics in AnalysisEngine.generate_detailed_report.
+
+    Each reading is folded in as it arrives (O(1) for the running counters and Welford
+    variance, O(log n) for the two-heap median), so building a report is a snapshot of
+    the current state rather than a rescan of the whole history. Subscribe it to a
+    DataProvider to have it fed from set_data().
+    """
+
+    def __init__(self, threshold: float):
+        """
+        Initialize an empty accumulator.
+
+        Args:
+            threshold (float): Alert threshold (in Watts), as used by AnalysisEngine.
+        """
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard every accumulated reading.
+        """
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.alert_count = 0
+        # Welford running mean and sum of squared deviations
+        self._mean = 0.0
+        self._m2 = 0.0
+        # Max-heap (negated) of the lower half and min-heap of the upper half
+        self._low = []
+        self._high = []
+        # Values are kept so the first/last third windows can slide forward
+        self._values = []
+        self._first_end = 0
+        self._first_sum = 0
+        self._last_start = 0
+        self._last_sum = 0
+        self._peak_timestamp = None
+        self._timestamp_count = 0
+
+    def update(self, data: Dict) -> None:
+        """
+        Observer hook: fold in the power value of a sensor reading.
+
+        Args:
+            data (Dict): A sensor reading as produced by PowerSensorSimulator.
+        """
+        self.push(data['PowerSensor'], data.get('timestamp'))
+
+    def push(self, value: float, timestamp: Optional[str] = None) -> None:
+        """
+        Fold a single power reading into the running statistics.
+
+        Args:
+            value (float): Power consumption in Watts.
+            timestamp (str, optional): Timestamp of the reading.
+        """
+        self.count += 1
+        self.total += value
+
+        # Strict comparison keeps the first occurrence, like list.index(max(...))
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+            self._peak_timestamp = timestamp
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if value > self.threshold:
+            self.alert_count += 1
+        if timestamp is not None:
+            self._timestamp_count += 1
+
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+        if not self._low or value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+        else:
+            heapq.heappush(self._high, value)
+        if len(self._low) > len(self._high) + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+        elif len(self._high) > len(self._low):
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+
+        # Slide the first-third and last-third windows; both bounds only move forward
+        self._values.append(value)
+        self._last_sum += value
+        while self._first_end < self.count // 3:
+            self._first_sum += self._values[self._first_end]
+            self._first_end += 1
+        last_start = self.count - math.ceil(self.count / 3)
+        while self._last_start < last_start:
+            self._last_sum -= self._values[self._last_start]
+            self._last_start += 1
+
+    def extend(self, power_history: List[float], timestamps: Optional[List[str]] = None) -> None:
+        """
+        Fold a sequence of readings in order, e.g. to seed from an existing history.
+
+        Args:
+            power_history (List[float]): Power consumption values in Watts.
+            timestamps (List[str], optional): Timestamps matching power_history.
+        """
+        if timestamps is None:
+            timestamps = [None] * len(power_history)
+        for value, timestamp in zip(power_history, timestamps):
+            self.push(value, timestamp)
+
+    def median(self) -> float:
+        """
+        Return the exact median of the readings seen so far.
+        """
+        if len(self._low) > len(self._high):
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+    def snapshot(self) -> Dict[str, Union[float, str, List]]:
+        """
+        Build the same dictionary generate_detailed_report() returns for the history seen so far.
+
+        Returns:
+            Dict: A dictionary containing various statistics about power consumption.
+        """
+        if not self.count:
+            return {"status": "No data to generate report."}
+
+        report = {}
+        report["average"] = round(self.total / self.count, 2)
+        report["min"] = self.minimum
+        report["max"] = self.maximum
 
-        forecast = []
+        if self.count > 1:
+            report["median"] = self.median()
+            report["std_dev"] = round(math.sqrt(self._m2 / (self.count - 1)), 2)
 
-        # Simple weighted moving average where recent values have higher weights
-        weights = [0.1, 0.15, 0.2, 0.25, 0.3]  # Weights for last 5 values (most recent last)
+        report["alert_percentage"] = round((self.alert_count / self.count) * 100, 2)
 
-        for _ in range(periods_ahead):
-            last_values = power_history[-5:]
+        if self.count >= 3:
+            # generate_detailed_report divides both sums by n // 3, even though its
+            # last-third slice holds ceil(n / 3) readings; keep that behaviour
+            first_third = self._first_sum / (self.count // 3)
+            last_third = self._last_sum / (self.count // 3)
 
-            # If we don't have 5 values yet, adjust weights proportionally
-            if len(last_values) < 5:
-                adjusted_weights = weights[-len(last_values):]
-                adjusted_weights = [w / sum(adjusted_weights) for w in adjusted_weights]
-                prediction = sum(v * w for v, w in zip(last_values, adjusted_weights))
+            if last_third > first_third * 1.1:
+                report["trend"] = "increasing"
+            elif last_third < first_third * 0.9:
+                report["trend"] = "decreasing"
             else:
-                prediction = sum(v * w for v, w in zip(last_values, weights))
+                report["trend"] = "stable"
+
+            report["trend_change_percentage"] = round(((last_third - first_third) / first_third) * 100, 2)
+
+        if self._timestamp_count == self.count:
+            try:
+                report["peak_hour"] = datetime.fromisoformat(self._peak_timestamp).hour
+            except (ValueError, TypeError):
+                report["peak_time"] = self._peak_timestamp
+
+        return report
+
+
+class PatternTracker(Observer):
+    """
+    Incremental version of AnalysisEngine.detect_patterns for live streams.
+
+    Only the last window_size readings and the previous moving average are kept; the
+    rise/fall, alternation and spike counters are updated in O(window_size) as each
+    reading arrives, and result() builds the same dictionary detect_patterns() would
+    return for the full history without rescanning it.
+    """
+
+    def __init__(self, window_size: int = 5):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            window_size (int): Size of the window to use for moving averages.
+        """
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard every tracked reading and counter.
+        """
+        self.count = 0
+        self.increases = 0
+        self.decreases = 0
+        self.alt_count = 0
+        self.spike_count = 0
+        self._recent = deque(maxlen=self.window_size)
+        self._last_average = None
+        self._last_direction = None
+        self._before_last = None
+
+    def update(self, data: Dict) -> None:
+        """
+        Observer hook: track the power value of a sensor reading.
+
+        Args:
+            data (Dict): A sensor reading as produced by PowerSensorSimulator.
+        """
+        self.push(data['PowerSensor'])
+
+    def push(self, value: float) -> None:
+        """
+        Update the pattern counters with a single power reading.
+
+        Args:
+            value (float): Power consumption in Watts.
+        """
+        recent = self._recent
+        # Spike check for the previous reading, now that its right neighbour is known
+        if self._before_last is not None:
+            candidate = recent[-1]
+            if candidate > self._before_last * 1.5 and candidate > value * 1.5:
+                self.spike_count += 1
+        if recent:
+            self._before_last = recent[-1]
+
+        recent.append(value)
+        self.count += 1
+        if len(recent) < self.window_size:
+            return
+
+        # Same left-to-right sum as detect_patterns(), so rounding matches exactly
+        average = sum(recent) / self.window_size
+        if self._last_average is not None:
+            direction = (average > self._last_average) - (average < self._last_average)
+            if direction > 0:
+                self.increases += 1
+            elif direction < 0:
+                self.decreases += 1
+            if self._last_direction is not None and direction * self._last_direction < 0:
+                self.alt_count += 1
+            self._last_direction = direction
+        self._last_average = average
+
+    def result(self) -> Dict[str, any]:
+        """
+        Build the same dictionary detect_patterns() returns for the readings seen so far.
+
+        Returns:
+            Dict: A dictionary with detected patterns.
+        """
+        if self.count < self.window_size * 2:
+            return {"status": "Insufficient data for pattern detection"}
+
+        moving_avg_count = self.count - self.window_size + 1
+        results = {"trend_pattern": _trend_pattern(self.increases, self.decreases, moving_avg_count)}
+        if self.alt_count > moving_avg_count * 0.4:
+            results["cyclic_pattern"] = True
+        results["spike_count"] = self.spike_count
+        return results
+
+
+class WeightedMovingAverageForecaster(Observer):
+    """
+    Stateful version of AnalysisEngine.forecast_consumption.
+
+    Only the most recent len(weights) readings are kept, so a forecast never copies or
+    extends the history. Dashboard-sized horizons run the recursion step by step; longer
+    ones use powers of its companion matrix rather than N Python steps.
+    """
+
+    # Longest horizon computed step by step, bit-for-bit like forecast_consumption() always did
+    STEPWISE_HORIZON = 64
+
+    def __init__(self, weights: Optional[List[float]] = None):
+        """
+        Initialize an empty forecaster.
+
+        Args:
+            weights (List[float], optional): Weights for the most recent values, oldest first.
+        """
+        self.weights = list(weights) if weights else [0.1, 0.15, 0.2, 0.25, 0.3]
+        self._recent = deque(maxlen=len(self.weights))
+
+    def reset(self) -> None:
+        """
+        Discard every buffered reading.
+        """
+        self._recent.clear()
+
+    def update(self, data: Dict) -> None:
+        """
+        Observer hook: buffer the power value of a sensor reading.
+
+        Args:
+            data (Dict): A sensor reading as produced by PowerSensorSimulator.
+        """
+        self.push(data['PowerSensor'])
+
+    def push(self, value: float) -> None:
+        """
+        Add a single power reading to the forecaster state.
+
+        Args:
+            value (float): Power consumption in Watts.
+        """
+        self._recent.append(value)
+
+    def extend(self, power_history: List[float]) -> None:
+        """
+        Add a sequence of power readings in order.
+
+        Args:
+            power_history (List[float]): Power consumption values in Watts.
+        """
+        self._recent.extend(power_history)
+
+    def forecast(self, periods_ahead: int = 3) -> List[float]:
+        """
+        Forecast the next periods_ahead values, matching forecast_consumption().
+
+        Args:
+            periods_ahead (int): Number of periods to forecast.
+
+        Returns:
+            List[float]: Forecasted power consumption values.
+        """
+        if not self._recent:
+            return []
+        if len(self._recent) < len(self.weights):
+            # Not enough data for meaningful forecast, use simple average
+            return [sum(self._recent) / len(self._recent)] * periods_ahead
+
+        if periods_ahead <= self.STEPWISE_HORIZON:
+            # Same summation order as forecast_consumption() always used, so rounded values match exactly
+            window = list(self._recent)
+            forecast = []
+            for _ in range(periods_ahead):
+                prediction = sum(v * w for v, w in zip(window, self.weights))
+                forecast.append(round(prediction, 2))
+                # Slide the fixed-size window instead of growing a history list
+                window = window[1:] + [prediction]
+            return forecast
+
+        # Long horizons: companion matrix of the recursion (shift the window left, append the
+        # weighted sum). rows[h] is the last row of companion^(h+1), the weights of the current
+        # window in prediction h+1; the table doubles with each product, so log2(periods_ahead)
+        # steps. The sums are ordered differently, so a value may differ in the last rounded digit
+        size = len(self.weights)
+        companion = np.eye(size, k=1)
+        companion[-1] = self.weights
+        rows, power = companion[-1:], companion
+        while len(rows) < periods_ahead:
+            rows = np.vstack((rows, rows @ power))
+            power = power @ power
+        predictions = rows[:periods_ahead] @ np.asarray(self._recent, dtype=np.float64)
+        return [round(prediction, 2) for prediction in predictions.tolist()]
+
+
+class ExponentialSmoothingForecaster(Observer):
+    """
+    Incremental exponential smoothing forecaster (simple, Holt or additive Holt-Winters).
+
+    Level, trend and seasonal components are updated in O(1) per reading. A forecast of
+    any horizon is the closed-form level + h * trend + season term, evaluated for all
+    steps at once with NumPy. With season_length set, the first season of readings is
+    buffered to initialise the seasonal indices.
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: Optional[float] = None,
+                 gamma: Optional[float] = None, season_length: Optional[int] = None):
+        """
+        Initialize the forecaster.
+
+        Args:
+            alpha (float): Level smoothing factor in (0, 1].
+            beta (float, optional): Trend smoothing factor; None disables the trend.
+            gamma (float, optional): Seasonal smoothing factor; used with season_length.
+            season_length (int, optional): Readings per season, e.g. 96 for a day of
+                15-minute readings; None disables seasonality.
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma if gamma is not None else 0.1
+        self.season_length = season_length
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard the fitted state.
+        """
+        self.count = 0
+        self.level = None
+        self.trend = 0.0
+        self._season = None
+        self._warmup = []
+
+    def update(self, data: Dict) -> None:
+        """
+        Observer hook: fold in the power value of a sensor reading.
+
+        Args:
+            data (Dict): A sensor reading as produced by PowerSensorSimulator.
+        """
+        self.push(data['PowerSensor'])
+
+    def push(self, value: float) -> None:
+        """
+        Update the smoothed components with a single power reading.
+
+        Args:
+            value (float): Power consumption in Watts.
+        """
+        m = self.season_length
+        position = self.count
+        self.count += 1
 
-            forecast.append(round(prediction, 2))
-            power_history.append(prediction)  # Add prediction to history for next iteration
+        if m and self._season is None:
+            # Buffer the first season, then seed level and seasonal indices from it
+            self._warmup.append(value)
+            if len(self._warmup) == m:
+                self.level = sum(self._warmup) / m
+                self._season = np.array(self._warmup, dtype=np.float64) - self.level
+                self._warmup = []
+            return
 
-        return forecast
\ No newline at end of file
+        if self.level is None:
+            self.level = float(value)
+            return
+
+        seasonal = self._season[position % m] if m else 0.0
+        previous_level = self.level
+        self.level = self.alpha * (value - seasonal) + (1 - self.alpha) * (previous_level + self.trend)
+        if self.beta is not None:
+            self.trend = self.beta * (self.level - previous_level) + (1 - self.beta) * self.trend
+        if m:
+            self._season[position % m] = self.gamma * (value - self.level) + (1 - self.gamma) * seasonal
+
+    def extend(self, power_history: List[float]) -> None:
+        """
+        Fold a sequence of power readings in order.
+
+        Args:
+            power_history (List[float]): Power consumption values in Watts.
+        """
+        for value in power_history:
+            self.push(value)
+
+    def forecast(self, periods_ahead: int = 3) -> List[float]:
+        """
+        Forecast the next periods_ahead values.
+
+        Args:
+            periods_ahead (int): Number of periods to forecast.
+
+        Returns:
+            List[float]: Forecasted power consumption values.
+        """
+        if self.level is None:
+            if not self._warmup:
+                return []
+            # Still collecting the first season: flat forecast at its average
+            return [round(sum(self._warmup) / len(self._warmup), 2)] * periods_ahead
+
+        steps = np.arange(1, periods_ahead + 1)
+        forecast = self.level + steps * self.trend
+        if self.season_length:
+            forecast = forecast + self._season[(self.count + steps - 1) % self.season_length]
+        return np.round(forecast, 2).tolist()
+
+
+class BuildingForecasters:
+    """
+    Registry of independent forecasters, one per building.
+    """
+
+    def __init__(self, factory=WeightedMovingAverageForecaster):
+        """
+        Initialize an empty registry.
+
+        Args:
+            factory (Callable): Zero-argument callable creating a forecaster for a new building.
+        """
+        self.factory = factory
+        self.forecasters = {}
+
+    def get(self, building: str):
+        """
+        Return the forecaster for a building, creating it on first use.
+        """
+        if building not in self.forecasters:
+            self.forecasters[building] = self.factory()
+        return self.forecasters[building]
+
+    def push(self, building: str, value: float) -> None:
+        """
+        Add a power reading to the forecaster of the given building.
+        """
+        self.get(building).push(value)
+
+    def forecast(self, building: str, periods_ahead: int = 3) -> List[float]:
+        """
+        Forecast the next periods_ahead values for the given building.
+        """
+        return self.get(building).forecast(periods_ahead)
+
+    def reset(self) -> None:
+        """
+        Drop every building's forecaster.
+        """
+        self.forecasters.clear()
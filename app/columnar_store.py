@@ -0,0 +1,275 @@
+"""
+Columnar, memory-mapped storage backend for the power log.
+
+Readings are kept as fixed-width typed columns (LOG_COLUMNS): epoch seconds, a building
+id and float32 values of the four sensors, each in its own append-only, raw
+little-endian file, with the building names in buildings.json. Readers open the
+columns with numpy.memmap, so startup is O(1) whatever the size of the log, and
+analysis and export use the values directly instead of re-parsing CSV text.
+
+Appends hold an exclusive lock on the directory (flock where available), so worker
+processes can share one log. The row count is the length of the shortest column: a
+batch interrupted half-way is invisible to readers and cut off by the next append.
+
+Convert an existing CSV log once, from the project root:
+    python -m app.columnar_store app/static/power_log.csv app/static/power_log
+"""
+import argparse
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.data_store import EXPORT_CHUNK_ROWS, LOG_FIELDS, LogBackend, date_prefix_bounds, parse_timestamps
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# One <name>.bin file per column
+LOG_COLUMNS = {
+    "timestamp": "<i8",
+    "building": "<u2",
+    "PowerSensor": "<f4",
+    "TemperatureSensor": "<f4",
+    "HumiditySensor": "<f4",
+    "LightSensor": "<f4",
+}
+SENSOR_COLUMNS = LOG_FIELDS[2:]
+
+BUILDINGS_FILE = "buildings.json"
+LOCK_FILE = ".lock"
+
+# CSV rows converted per chunk by convert_csv_log()
+CONVERT_CHUNK_ROWS = 100000
+
+
+@contextmanager
+def directory_lock(directory: str, thread_lock: threading.Lock):
+    """
+    Hold thread_lock and an exclusive flock on <directory>/.lock (created with the directory),
+    serializing writers across threads and processes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with thread_lock, open(os.path.join(directory, LOCK_FILE), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class ColumnarLogBackend(LogBackend):
+    """
+    The power log as a directory of append-only, memory-mappable column files.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Directory of the column files, created on the first append.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def __len__(self) -> int:
+        rows = []
+        for name, dtype in LOG_COLUMNS.items():
+            try:
+                rows.append(os.path.getsize(self._path(name)) // np.dtype(dtype).itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(rows)
+
+    def building_names(self) -> List[str]:
+        """
+        Building names, indexed by the codes stored in the 'building' column.
+        """
+        try:
+            with open(os.path.join(self.directory, BUILDINGS_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _building_codes(self, buildings) -> np.ndarray:
+        # Map names to codes, registering new buildings first (called with the lock held)
+        names, inverse = np.unique(np.asarray(buildings, dtype=str), return_inverse=True)
+        known = self.building_names()
+        registered = set(known)
+        new = [name for name in names.tolist() if name not in registered]
+        if new:
+            known += new
+            if len(known) > np.iinfo(LOG_COLUMNS["building"]).max + 1:
+                raise ValueError("Too many buildings for the columnar log")
+            path = os.path.join(self.directory, BUILDINGS_FILE)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump(known, f)
+            os.replace(tmp_path, path)
+        ids = {name: code for code, name in enumerate(known)}
+        return np.array([ids[name] for name in names.tolist()], dtype=LOG_COLUMNS["building"])[inverse]
+
+    def _repair(self) -> None:
+        # Cut every column back to the shortest one, dropping the tail of an interrupted append
+        rows = len(self)
+        for name, dtype in LOG_COLUMNS.items():
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+
+    def append_columns(self, columns: Dict) -> int:
+        """
+        Append a batch of readings given as columns.
+
+        Args:
+            columns (Dict): 'timestamp' as epoch seconds, 'building' as names, and one array
+                per sensor, all of the same length.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        count = len(columns["timestamp"])
+        if not count:
+            return 0
+        with directory_lock(self.directory, self._lock):
+            codes = self._building_codes(columns["building"])
+            self._repair()
+            for name, dtype in LOG_COLUMNS.items():
+                values = codes if name == "building" else columns[name]
+                with open(self._path(name), "ab") as f:
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return count
+
+    def append(self, rows):
+        if not rows:
+            return
+        columns = {"timestamp": parse_timestamps([row["timestamp"] for row in rows]),
+                   "building": [row["building"] for row in rows]}
+        for name in SENSOR_COLUMNS:
+            columns[name] = np.array([float(row[name]) for row in rows], dtype=np.float32)
+        self.append_columns(columns)
+
+    def flush(self, fsync=False):
+        # Appends are written through on every batch; fsync syncs each column's inode
+        if not fsync:
+            return
+        for name in LOG_COLUMNS:
+            try:
+                fd = os.open(self._path(name), os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def columns(self):
+        rows = len(self)
+        columns = {name: np.memmap(self._path(name), dtype=dtype, mode="r", shape=(rows,))
+                   if rows else np.empty(0, dtype=dtype)
+                   for name, dtype in LOG_COLUMNS.items()}
+        return columns, self.building_names()
+
+    def _rows(self, columns: Dict, names: List[str], index) -> List[Dict[str, str]]:
+        # Format the selected rows as strings, like the CSV backend returns them
+        timestamps = columns["timestamp"][index]
+        if not len(timestamps):
+            return []
+        values = [timestamps.astype("datetime64[s]").astype(str).tolist(),
+                  np.array(names, dtype=object)[columns["building"][index]].tolist()]
+        values += [columns[name][index].astype(str).tolist() for name in SENSOR_COLUMNS]
+        return [dict(zip(LOG_FIELDS, row)) for row in zip(*values)]
+
+    def read(self):
+        columns, names = self.columns()
+        return self._rows(columns, names, slice(None))
+
+    def query(self, building=None, date=None, offset=0, limit=None):
+        columns, names = self.columns()
+        offset = max(offset, 0)
+        stop = None if limit is None else offset + limit
+        if not building and not date:
+            return self._rows(columns, names, slice(offset, stop)), len(columns["timestamp"])
+
+        mask = np.ones(len(columns["timestamp"]), dtype=bool)
+        if building:
+            if building not in names:
+                return [], 0
+            mask &= columns["building"] == names.index(building)
+        if date:
+            bounds = date_prefix_bounds(date)
+            if bounds is None:
+                return [], 0
+            mask &= (columns["timestamp"] >= bounds[0]) & (columns["timestamp"] < bounds[1])
+        rows = np.flatnonzero(mask)
+        return self._rows(columns, names, rows[offset:stop]), len(rows)
+
+    def iter_chunks(self, building=None, lo=None, hi=None, chunk_size=EXPORT_CHUNK_ROWS):
+        # Filters are evaluated on chunk_size slices of the memory maps, never on whole columns
+        columns, names = self.columns()
+        code = None
+        if building:
+            if building not in names:
+                return
+            code = names.index(building)
+        for begin in range(0, len(columns["timestamp"]), chunk_size):
+            window = slice(begin, begin + chunk_size)
+            mask = np.ones(len(columns["timestamp"][window]), dtype=bool)
+            if code is not None:
+                mask &= columns["building"][window] == code
+            if lo is not None:
+                mask &= columns["timestamp"][window] >= lo
+            if hi is not None:
+                mask &= columns["timestamp"][window] < hi
+            rows = np.flatnonzero(mask) + begin
+            if len(rows):
+                yield self._rows(columns, names, rows)
+
+    def buildings(self):
+        return sorted(self.building_names())
+
+
+def convert_csv_log(csv_path: str, directory: str, chunksize: int = CONVERT_CHUNK_ROWS) -> int:
+    """
+    Convert a CSV power log into a new columnar log, chunk by chunk.
+
+    Args:
+        csv_path (str): The CSV log.
+        directory (str): Target directory; it must not contain rows yet.
+        chunksize (int): CSV rows parsed and appended at a time.
+
+    Returns:
+        int: Number of rows converted.
+    """
+    backend = ColumnarLogBackend(directory)
+    if len(backend):
+        raise FileExistsError(f"{directory} already holds a columnar log")
+    total = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype={"timestamp": str, "building": str},
+                             skipinitialspace=True):
+        chunk.columns = [name.strip() for name in chunk.columns]
+        columns = {"timestamp": parse_timestamps(chunk["timestamp"].to_numpy(str)),
+                   "building": chunk["building"].fillna("Unknown").to_numpy(str)}
+        for name in SENSOR_COLUMNS:
+            columns[name] = chunk[name].to_numpy(dtype=np.float32)
+        total += backend.append_columns(columns)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a CSV power log to the columnar format")
+    parser.add_argument("csv_path")
+    parser.add_argument("directory")
+    parser.add_argument("--chunksize", type=int, default=CONVERT_CHUNK_ROWS)
+    args = parser.parse_args()
+    print(f"Converted {convert_csv_log(args.csv_path, args.directory, args.chunksize)} rows to {args.directory}")
@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+import threading
+import time
 import joblib
+import numpy as np
 import pandas as pd
 
+from app.control_model import MODEL_PATH, ENCODER_PATH, FEATURE_COLUMNS
+from app.forest_compiler import CompiledForest
+
 # control.py defines all the control strategies that are used to control the power supply system
 # since the interface of the power supply system is unknown,
 # the control action is made by texts that can be further implementing into real control actions
@@ -14,18 +21,121 @@ class ControlStrategy(ABC):
     def control_action(self, data):
         pass
 
+    def control_actions(self, batch):
+        # batch version of control_action(): takes a list of readings and returns one action each
+        # this default simply loops, strategies override it with a vectorized version
+        return [self.control_action(data) for data in batch]
+
+
+# power level boundaries used by the rule-based fallback of AutoControlStrategy
+# below 150W: low, below 500W: normal, below 700W: high, otherwise abnormal
+FALLBACK_LEVELS = ['low', 'normal', 'high', 'abnormal']
+FALLBACK_BOUNDS = [150, 500, 700]
+
+
+def _hours(timestamps):
+    # extract the hour of many timestamps at once
+    # ISO timestamps ("YYYY-MM-DDTHH:...") are sliced directly, anything else is parsed by pandas
+    hours = []
+    for timestamp in timestamps:
+        if isinstance(timestamp, str) and len(timestamp) >= 13 and timestamp[10] in 'T ' \
+                and timestamp[11:13].isdigit():
+            hours.append(int(timestamp[11:13]))
+        else:
+            hours.append(pd.to_datetime(timestamp).hour)
+    return hours
+
+
+# PredictionCache is an LRU cache (with optional time-to-live) of power levels predicted by the model
+# readings repeat heavily, so most control decisions become a dictionary lookup
+# keys are the feature tuple (PowerSensor, TemperatureSensor, HumiditySensor, LightSensor, hour),
+# optionally quantized: quantization maps a feature name to a step, e.g. {'PowerSensor': 5} groups
+# readings into 5W buckets (the first prediction made in a bucket is reused for the whole bucket)
+class PredictionCache:
+    def __init__(self, max_size=4096, ttl=None, quantization=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.quantization = dict(quantization or {})
+        self._steps = [self.quantization.get(column) for column in FEATURE_COLUMNS]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._model = None
+        self._lock = threading.Lock()
+
+    def key(self, features):
+        # build the cache key of one feature tuple, in FEATURE_COLUMNS order
+        if not self.quantization:
+            return tuple(features)
+        return tuple(value if not step else round(value / step) * step
+                     for value, step in zip(features, self._steps))
+
+    def _check_model(self, model):
+        # entries belong to one model object: a reloaded or replaced model invalidates them all
+        if model is not self._model:
+            self._entries.clear()
+            self._model = model
+
+    def get(self, model, key):
+        # return the cached level for a key, or None on a miss
+        with self._lock:
+            self._check_model(model)
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, model, key, level):
+        with self._lock:
+            self._check_model(model)
+            self._entries[key] = (level, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        # hit/miss counters and size, e.g. for the /api/control/cache endpoint
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "quantization": self.quantization,
+            }
+
+
 class AutoControlStrategy(ControlStrategy):
     # using the trained RandomForest control model
-    def __init__(self):
+    def __init__(self, compiled=False, cache=None, load_model=True):
         # Initialize the auto control strategy by loading the trained model and label encoder.
         # Fallback to simple rule-based logic if model files are missing.
-        try:
-            self.model = joblib.load('app/ML_model/rf_power_model.pkl')
-            self.le = joblib.load('app/ML_model/label_encoder.pkl')
-        except FileNotFoundError:
-            print("Warning: Model files not found. Using fallback prediction logic.")
-            self.model = None
-            self.le = None
+        # With compiled=True the forest is flattened into a CompiledForest for faster inference
+        # Model predictions go through an exact-key PredictionCache unless another cache is given
+        # With load_model=False the strategy starts on the fallback rules and a ModelManager
+        # loads the model in the background and hands it over with set_model()
+        self.cache = cache if cache is not None else PredictionCache()
+        self.compiled = compiled
+        # model and label encoder are kept as one tuple so they are always replaced together
+        self._bundle = (None, None)
+        if load_model:
+            try:
+                self.set_model(joblib.load(MODEL_PATH), joblib.load(ENCODER_PATH))
+            except FileNotFoundError:
+                print("Warning: Model files not found. Using fallback prediction logic.")
 
         self.control_rules = {
             'low': "Power usage: Low;\n Action: Reduce power supply to energy saving mode",
@@ -34,6 +144,35 @@ class AutoControlStrategy(ControlStrategy):
             'abnormal': "Power usage: Abnormal;\n Action: Emergency cut-off of non-critical loads and alarm"
         }
 
+    @property
+    def model(self):
+        return self._bundle[0]
+
+    @model.setter
+    def model(self, model):
+        self._bundle = (model, self._bundle[1])
+
+    @property
+    def le(self):
+        return self._bundle[1]
+
+    @le.setter
+    def le(self, le):
+        self._bundle = (self._bundle[0], le)
+
+    def set_model(self, model, le):
+        # atomically swap in a new model and label encoder (None for both returns to the fallback rules)
+        # a single tuple assignment, so a request in flight keeps using the pair it started with
+        if self.compiled and model is not None and not isinstance(model, CompiledForest):
+            model = CompiledForest.from_sklearn(model)
+        self._bundle = (model, le)
+
+    def compile_model(self):
+        # swap the sklearn forest for its compiled equivalent, which predicts bit-identical classes
+        # models set later are compiled as well
+        self.compiled = True
+        self.set_model(*self._bundle)
+
     def _prepare_features(self, data_dict):
         # Process raw sensor data into a DataFrame to compatible with the ML model.
         timestamp = pd.to_datetime(data_dict['timestamp'])
@@ -45,12 +184,59 @@ class AutoControlStrategy(ControlStrategy):
             'hour': timestamp.hour
         }])
 
+    def _prepare_batch_features(self, batch):
+        # Process many readings into a single DataFrame, one row per reading
+        return pd.DataFrame({
+            'PowerSensor': [data['PowerSensor'] for data in batch],
+            'TemperatureSensor': [data['TemperatureSensor'] for data in batch],
+            'HumiditySensor': [data['HumiditySensor'] for data in batch],
+            'LightSensor': [data['LightSensor'] for data in batch],
+            'hour': _hours([data['timestamp'] for data in batch])
+        }, columns=FEATURE_COLUMNS)
+
+    def _predict_batch_levels(self, model, le, features):
+        # look every row up in the cache and run the model once over the distinct missing rows
+        keys = [self.cache.key(row) for row in features.itertuples(index=False, name=None)]
+        levels = [self.cache.get(model, key) for key in keys]
+        missing = {}
+        for i, level in enumerate(levels):
+            if level is None:
+                missing.setdefault(keys[i], i)
+        if missing:
+            rows = features.iloc[list(missing.values())]
+            predicted = le.inverse_transform(model.predict(rows))
+            for key, level in zip(missing, predicted):
+                self.cache.put(model, key, level)
+                missing[key] = level
+            levels = [missing[key] if level is None else level for key, level in zip(keys, levels)]
+        return levels
+
+    def control_actions(self, batch):
+        # vectorized control_action(): featurize every reading into one frame,
+        # then make a single predict() and inverse_transform() call for the whole batch
+        if not batch:
+            return []
+        try:
+            model, le = self._bundle
+            if model is None:
+                powers = np.array([data['PowerSensor'] for data in batch], dtype=np.float64)
+                indices = np.searchsorted(FALLBACK_BOUNDS, powers, side='right')
+                levels = [FALLBACK_LEVELS[i] for i in indices.tolist()]
+            else:
+                levels = self._predict_batch_levels(model, le, self._prepare_batch_features(batch))
+            return [self.control_rules.get(level, "unknown action") for level in levels]
+
+        except Exception as e:
+            print(f"control error: {str(e)}")
+            return ["control error，please switch to manuel control"] * len(batch)
+
     def control_action(self, data):
         # rewrite parent class' control_action() function
         # execute control action using ML model
         # if no model loaded, use fallback rules
         try:
-            if self.model is None:
+            model, le = self._bundle
+            if model is None:
                 # Fallback logic if model isn't loaded
                 power = data['PowerSensor']
                 if power < 150:
@@ -62,10 +248,19 @@ class AutoControlStrategy(ControlStrategy):
                 else:
                     level = 'abnormal'
             else:
-                # using ML model to control system
-                features = self._prepare_features(data)
-                pred = self.model.predict(features)[0]
-                level = self.le.inverse_transform([pred])[0]
+                # using ML model to control system, unless the same features were seen before
+                row = [data[column] for column in FEATURE_COLUMNS[:-1]] + _hours([data['timestamp']])
+                key = self.cache.key(row)
+                level = self.cache.get(model, key)
+                if level is None:
+                    if isinstance(model, CompiledForest):
+                        # the compiled forest takes a plain feature row, no DataFrame needed
+                        pred = model.predict_row(row)
+                    else:
+                        features = self._prepare_features(data)
+                        pred = model.predict(features)[0]
+                    level = le.inverse_transform([pred])[0]
+                    self.cache.put(model, key, level)
             return self.control_rules.get(level, "unknown action")
 
         except Exception as e:
@@ -80,7 +275,7 @@ class ManualControlStrategy(ControlStrategy):
     def set_mode(self, mode):
         # the manuel mode has 3 power modes to be manually select
         self.mode = mode
-        self.control_actions = {
+        self.mode_actions = {
             "eco": "Manual Control: ECO MODE\nAction: Limiting power consumption to 30%, non-essential systems disabled",
             "normal": "Manual Control: NORMAL MODE\nAction: Standard power distribution across all systems",
             "full-power": "Manual Control: FULL-POWER MODE\nAction: Maximum power allocation to all systems, cooling increased"
@@ -88,7 +283,11 @@ class ManualControlStrategy(ControlStrategy):
 
     def control_action(self, data):
         # by using flask form and view handler, user can update the control mode manually
-        return self.control_actions.get(self.mode, "Unknown mode, fallback to normal operation")
+        return self.mode_actions.get(self.mode, "Unknown mode, fallback to normal operation")
+
+    def control_actions(self, batch):
+        # the action only depends on the selected mode, so it is looked up once for the whole batch
+        return [self.control_action(None)] * len(batch)
 
 
 # assume there is another outdated control strategy:SimpleControlSystem,
@@ -103,6 +302,14 @@ class SimpleControlSystem:
         else:
             return "Simple Control System: High power alert, initiating simple protocols"
 
+    def simple_control_batch(self, power_values):
+        # same rules as simple_control() applied to many power values at once
+        messages = ["Simple Control System: Low power state activated",
+                    "Simple Control System: Normal operation",
+                    "Simple Control System: High power alert, initiating simple protocols"]
+        indices = np.searchsorted([200, 600], np.asarray(power_values, dtype=np.float64), side='right')
+        return [messages[i] for i in indices.tolist()]
+
 
 # to make this control strategy class works, we need to create an adapter
 # that makes SimpleControlSystem compatible with ControlStrategy class
@@ -117,6 +324,13 @@ class SimpleControlAdapter(ControlStrategy):
         power_value = data['PowerSensor']
         return self.simple_system.simple_control(power_value)
 
+    def control_actions(self, batch):
+        # use the legacy system's batch method when it has one, otherwise adapt reading by reading
+        power_values = [data['PowerSensor'] for data in batch]
+        if hasattr(self.simple_system, 'simple_control_batch'):
+            return self.simple_system.simple_control_batch(power_values)
+        return [self.simple_system.simple_control(power_value) for power_value in power_values]
+
 
 class PowerControlContext:
     # PowerControlContext class to manage and execute the selected control strategy
@@ -129,4 +343,8 @@ class PowerControlContext:
     def execute_control(self, data):
         return self.strategy.control_action(data)
 
+    def execute_control_batch(self, batch):
+        # run the selected strategy over many readings, e.g. to replay a day of logs
+        return self.strategy.control_actions(batch)
+
 
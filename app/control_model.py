@@ -1,51 +1,256 @@
+import argparse
+import json
 import os
+import shutil
+import threading
+import time
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
 import joblib
+import numpy as np
+
+from app.data.dataset.dataset_generator import determine_levels as label_power_levels
+from app.columnar_store import directory_lock
+from app.data_store import LOG_FILE
+from app.forest_compiler import CompiledForest
+
+# trained model files, shared by train_power_model(), AutoControlStrategy and ModelManager
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ML_Model")
+MODEL_PATH = os.path.join(MODEL_DIR, "rf_power_model.pkl")
+ENCODER_PATH = os.path.join(MODEL_DIR, "label_encoder.pkl")
+# flattened forest and encoder classes as .npy files that worker processes memory-map and share;
+# every compile writes a new <COMPILED_DIR>/v<time>-<pid>/ directory, and COMPILED_POINTER
+# (replaced atomically) names the current one, so readers never mix arrays of two forests
+COMPILED_DIR = os.path.join(MODEL_DIR, "compiled")
+COMPILED_POINTER = "current.json"
+# encoder classes, saved next to the forest arrays of a version
+COMPILED_MARKER = "label_classes.npy"
+# superseded versions kept for workers that may still be mapping them
+COMPILED_KEEP = 1
+_compile_lock = threading.Lock()
+DATASET_PATH = 'data/dataset/sensor_data.csv'
+# the live power log written by data_store.append_log(), usable as training data;
+# it is labelled with label_power_levels(), the generator's vectorized determine_level()
+LOG_DATASET_PATH = LOG_FILE
+LABEL_COLUMN = 'power_consumption_level'
+FEATURE_COLUMNS = ['PowerSensor', 'TemperatureSensor', 'HumiditySensor', 'LightSensor', 'hour']
+# rows read from the csv at a time
+CHUNK_ROWS = 100000
+
+
+def save_model_files(model, le, model_path=MODEL_PATH, encoder_path=ENCODER_PATH):
+    # write to temporary files first and rename them into place,
+    # so a process watching the files never loads a half-written model
+    # the encoder is replaced first: a reload triggered by the model file then sees a matching encoder
+    for obj, path in ((le, encoder_path), (model, model_path)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def model_files_signature(model_path=MODEL_PATH, encoder_path=ENCODER_PATH):
+    # [mtime, size] of the pickles, recorded with each compiled version to tell whether it is stale
+    try:
+        stats = [os.stat(path) for path in (model_path, encoder_path)]
+    except FileNotFoundError:
+        return None
+    return [[stat.st_mtime_ns, stat.st_size] for stat in stats]
+
+
+def read_compiled_pointer(directory=COMPILED_DIR):
+    # {"version": ..., "source": ...} of the current compiled version, None if there is none
+    try:
+        with open(os.path.join(directory, COMPILED_POINTER)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_compiled_version(model, le, directory, source):
+    # write a complete new version directory, then switch the pointer to it with one rename
+    forest = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    path = os.path.join(directory, version)
+    forest.save(path)
+    np.save(os.path.join(path, COMPILED_MARKER), np.asarray(le.classes_), allow_pickle=False)
+    pointer = os.path.join(directory, COMPILED_POINTER)
+    tmp_path = f"{pointer}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "source": source}, f)
+    os.replace(tmp_path, pointer)
+
+    # drop versions older than the COMPILED_KEEP latest superseded ones
+    superseded = sorted(name for name in os.listdir(directory)
+                        if name.startswith("v") and name != version and os.path.isdir(os.path.join(directory, name)))
+    for name in superseded[:max(len(superseded) - COMPILED_KEEP, 0)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return version
+
+
+def save_compiled_model(model, le, directory=COMPILED_DIR, source=None):
+    # flatten the forest (unless it already is) and save it as a new version next to the encoder
+    # classes, all as plain .npy files so they can be loaded with np.load(mmap_mode='r');
+    # source is the model_files_signature() of the pickles it was built from, if any
+    with directory_lock(directory, _compile_lock):
+        return _save_compiled_version(model, le, directory, source)
+
+
+def compile_if_stale(model_path=MODEL_PATH, encoder_path=ENCODER_PATH, directory=COMPILED_DIR):
+    # (re)build the compiled version from the pickles unless it was built from these very files;
+    # the check runs under the directory lock, so when several workers notice a retrain only the
+    # first one compiles and the others find the version it wrote
+    with directory_lock(directory, _compile_lock):
+        source = model_files_signature(model_path, encoder_path)
+        pointer = read_compiled_pointer(directory)
+        if source is None or (pointer is not None and pointer.get("source") == source):
+            return False
+        _save_compiled_version(joblib.load(model_path), joblib.load(encoder_path), directory, source)
+        return True
+
+
+def load_compiled_model(directory=COMPILED_DIR, mmap_mode='r'):
+    # load the current version saved by save_compiled_model(); with mmap_mode='r' the arrays stay
+    # in the shared page cache instead of being copied into every worker's heap
+    pointer = read_compiled_pointer(directory)
+    path = os.path.join(directory, pointer["version"]) if pointer else directory
+    forest = CompiledForest.load(path, mmap_mode=mmap_mode)
+    le = LabelEncoder()
+    le.classes_ = np.load(os.path.join(path, COMPILED_MARKER), allow_pickle=False)
+    return forest, le
+
+
+def _stage(name, started, rss_before):
+    # print how long a pipeline stage took and how the process memory changed
+    from app.model_manager import memory_usage
+    rss = memory_usage().get("rss", 0) / 2 ** 20
+    print(f"[{name}] {time.perf_counter() - started:.2f} s, rss {rss:.1f} MiB ({rss - rss_before:+.1f})")
+    return time.perf_counter(), rss
+
+
+def load_training_data(dataset_path=DATASET_PATH, chunksize=CHUNK_ROWS, since=None):
+    # stream the csv in chunks with typed columns, so months of logs never sit in memory as strings
+    # works with the generated dataset (labelled) and the power log (labelled here by the same rules)
+    # with since, only readings with a later ISO timestamp are kept (for incremental retraining)
+    header = pd.read_csv(dataset_path, nrows=0).columns.str.strip()
+    labelled = LABEL_COLUMN in header
+    columns = ['timestamp'] + FEATURE_COLUMNS[:-1] + ([LABEL_COLUMN] if labelled else [])
+    dtypes = {column: np.float32 for column in FEATURE_COLUMNS[:-1]}
+    dtypes['timestamp'] = str
+
+    features, labels, last_timestamp = [], [], since
+    reader = pd.read_csv(dataset_path, usecols=lambda c: c.strip() in columns, dtype=dtypes,
+                         chunksize=chunksize, skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        if since is not None:
+            chunk = chunk[chunk['timestamp'] > since]
+        if chunk.empty:
+            continue
+        # ISO timestamps are sliced instead of parsed; anything else goes through pd.to_datetime
+        timestamps = chunk['timestamp']
+        hour = pd.to_numeric(timestamps.str[11:13], errors='coerce')
+        unparsed = hour.isna()
+        if unparsed.any():
+            hour[unparsed] = pd.to_datetime(timestamps[unparsed]).dt.hour
+        frame = chunk[FEATURE_COLUMNS[:-1]].assign(hour=hour.astype(np.float32))
+        features.append(frame)
+        if labelled:
+            labels.append(chunk[LABEL_COLUMN].to_numpy(dtype=object))
+        else:
+            labels.append(label_power_levels(*(frame[c].to_numpy() for c in FEATURE_COLUMNS)))
+        last_timestamp = max(last_timestamp or '', timestamps.max())
+
+    if not features:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, dtype=np.float32), np.array([], dtype=object), last_timestamp
+    return pd.concat(features, ignore_index=True), np.concatenate(labels), last_timestamp
+
 
 # this is the code for training a Random Forest model that is used in AutoControlStrategy class in control.py
 # the dataset used to train the model is generated at dataset_generator.py
 # in real life scenario, the training data is the power system sensor data with y:(power level) labeled manually
-def train_power_model():
+# power logs (LOG_DATASET_PATH) can be used as well; they are labelled with the generator's rules
+# with incremental=True the saved model is warm-started: new_trees trees are fitted on the readings
+# logged after its last training run and added to the forest, instead of refitting everything
+def train_power_model(dataset_path=DATASET_PATH, model_path=MODEL_PATH, encoder_path=ENCODER_PATH,
+                      compiled_dir=COMPILED_DIR, incremental=False, new_trees=20, n_jobs=-1,
+                      chunksize=CHUNK_ROWS):
+    from app.model_manager import memory_usage
+    started, rss = time.perf_counter(), memory_usage().get("rss", 0) / 2 ** 20
 
-    df = pd.read_csv('data/dataset/sensor_data.csv')
-    df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
-    features = df[['PowerSensor', 'TemperatureSensor', 'HumiditySensor', 'LightSensor', 'hour']]
-    labels = df['power_consumption_level']
+    model, le = None, None
+    if incremental and os.path.exists(model_path) and os.path.exists(encoder_path):
+        model = joblib.load(model_path)
+        le = joblib.load(encoder_path)
+    since = getattr(model, 'trained_until_', None)
+
+    features, labels, trained_until = load_training_data(dataset_path, chunksize, since)
+    started, rss = _stage(f"load {len(features)} rows", started, rss)
+    if not len(features):
+        print("No new readings to train on")
+        return model, le
+
+    if model is not None and set(np.unique(labels)) != set(le.classes_):
+        # new trees must predict exactly the classes of the existing trees, otherwise refit from scratch
+        print("New readings do not match the model's power levels, retraining the full model")
+        model = None
+        features, labels, trained_until = load_training_data(dataset_path, chunksize)
 
     # labeling data
-    le = LabelEncoder()
-    y = le.fit_transform(labels)
+    if model is None:
+        le = LabelEncoder()
+        y = le.fit_transform(labels)
+    else:
+        y = le.transform(labels)
 
     # seperate training and testing dataset
     X_train, X_test, y_train, y_test = train_test_split(features, y, test_size=0.2, random_state=42)
+    started, rss = _stage("prepare", started, rss)
 
     '''Using Random Forest Classifier to train a model that 
     takes the sensor input data and classifies them to 3 power class'''
 
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=8,
-        class_weight='balanced',
-        random_state=42
-    )
+    if model is None:
+        model = RandomForestClassifier(
+            n_estimators=100,
+            max_depth=8,
+            class_weight='balanced',
+            random_state=42,
+            n_jobs=n_jobs
+        )
+    else:
+        # keep the fitted trees and grow new ones on the new readings only
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees, n_jobs=n_jobs)
 
     model.fit(X_train, y_train)
+    # predictions run one reading at a time in the web app, where a thread pool only adds overhead
+    model.set_params(warm_start=False, n_jobs=None)
+    model.trained_until_ = trained_until
+    started, rss = _stage(f"fit {len(model.estimators_)} trees", started, rss)
 
     y_pred = model.predict(X_test)
     print(f'\nTest accuracy: {accuracy_score(y_test, y_pred):.2f}')
 
     # save the trained model locally
-    MODEL_DIR = "ML_Model"
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    joblib.dump(model, os.path.join(MODEL_DIR, "rf_power_model.pkl"))
-    joblib.dump(le, os.path.join(MODEL_DIR, "label_encoder.pkl"))
+    save_model_files(model, le, model_path, encoder_path)
+    if compiled_dir:
+        # compiled once here, recording the pickles it matches, so workers do not rebuild it
+        save_compiled_model(model, le, compiled_dir, model_files_signature(model_path, encoder_path))
+    _stage("save", started, rss)
 
     return model, le
 
 
 if __name__ == "__main__":
-    train_power_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the power level model used by AutoControlStrategy")
+    parser.add_argument("--dataset", default=DATASET_PATH,
+                        help=f"csv to train on, e.g. the power log {LOG_DATASET_PATH}")
+    parser.add_argument("--incremental", action="store_true",
+                        help="add trees for readings logged since the last run instead of refitting")
+    parser.add_argument("--new-trees", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=-1, help="cores used for fitting (-1: all)")
+    args = parser.parse_args()
+    train_power_model(args.dataset, incremental=args.incremental, new_trees=args.new_trees, n_jobs=args.jobs)
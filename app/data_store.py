@@ -1,13 +1,677 @@
 # app/data_store.py
 
+import atexit
 import csv
+import glob
+import io
 import os
+import queue
+import tempfile
+import threading
+import time
+import zlib
 from datetime import datetime
 
+import numpy as np
+
+from app.log_index import get_log_index
+
 # Define the default path for storing the power log data as a CSV file.
 # This file contains all sensor readings appended over time.
 LOG_FILE = "app/static/power_log.csv"
 
+# Column order of the power log
+LOG_FIELDS = ["timestamp", "building", "PowerSensor", "TemperatureSensor", "HumiditySensor", "LightSensor"]
+
+# fsync policies: never (leave it to the OS), after every batch, or at most once per fsync_interval
+FSYNC_POLICIES = ("never", "batch", "interval")
+
+# Storage backend of the power log: "csv" (LOG_FILE), "columnar" (typed, memory-mapped
+# column files in LOG_COLUMNAR_DIR, see app/columnar_store.py), "sql" (the power_readings
+# table of LOG_DATABASE_URL, by default the app's database, see app/sql_store.py) or
+# "partitioned" (one CSV per building and day or hour in LOG_PARTITION_DIR, see app/partition_store.py)
+LOG_BACKENDS = ("csv", "columnar", "sql", "partitioned")
+LOG_BACKEND = "csv"
+LOG_COLUMNAR_DIR = "app/static/power_log"
+LOG_DATABASE_URL = None
+LOG_PARTITION_DIR = "app/static/power_log_partitions"
+LOG_PARTITION_GRANULARITY = "day"
+
+# Rows read from the backend per chunk when the log is streamed (CSV export)
+EXPORT_CHUNK_ROWS = 5000
+
+# Bytes before a read_log_tail() checkpoint whose CRC tells a log rewritten in place (a few rows)
+TAIL_CHECK_BYTES = 256
+
+
+def date_prefix_bounds(prefix):
+    """
+    Epoch-second range [start, end) of the timestamps starting with a date prefix such as
+    "2025", "2025-04", "2025-04-19" or "2025-04-19T12".
+
+    Returns:
+        Tuple[int, int]: The bounds, or None if the prefix is not a date.
+    """
+    try:
+        start = np.datetime64(prefix)
+    except ValueError:
+        return None
+    end = start + np.timedelta64(1, np.datetime_data(start.dtype)[0])
+    return int(start.astype("datetime64[s]").astype(np.int64)), int(end.astype("datetime64[s]").astype(np.int64))
+
+
+def date_range_bounds(start=None, end=None):
+    """
+    Epoch-second range [lo, hi) of the timestamps from the `start` date prefix up to and
+    including the `end` one, e.g. ("2025-04-01", "2025-04-30") covers all of April.
+
+    Returns:
+        Tuple[int, int]: The bounds, None for an open side.
+
+    Raises:
+        ValueError: If start or end is not a date prefix.
+    """
+    bounds = []
+    for name, prefix, side in (("start", start, 0), ("end", end, 1)):
+        if not prefix:
+            bounds.append(None)
+            continue
+        prefix_bounds = date_prefix_bounds(prefix)
+        if prefix_bounds is None:
+            raise ValueError(f"Invalid {name} date: {prefix}")
+        bounds.append(prefix_bounds[side])
+    return tuple(bounds)
+
+
+def timestamp_filter(lo, hi):
+    """
+    Predicate telling whether an ISO 8601 timestamp string falls in the epoch-second range
+    [lo, hi) (None: open). It compares strings, so rows are filtered without parsing their timestamps.
+    """
+    start = None if lo is None else str(np.datetime64(lo, "s"))
+    end = None if hi is None else str(np.datetime64(hi, "s"))
+
+    def in_range(timestamp):
+        timestamp = timestamp.replace(" ", "T")
+        return (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+    return in_range
+
+
+# Epoch seconds stored for a timestamp that does not parse (NaT as int64)
+NAT_SECONDS = np.iinfo(np.int64).min
+
+
+def parse_timestamps(values):
+    """
+    Convert ISO 8601 timestamp strings to int64 epoch seconds of their wall-clock time, like
+    timestamp_filter() compares them: sub-second digits and any UTC offset are ignored, and
+    a value that does not parse becomes NAT_SECONDS instead of failing the whole batch.
+    """
+    import pandas as pd
+
+    values = pd.Series(values, dtype=object)
+    try:
+        parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    except ValueError:  # mixed UTC offsets
+        parsed = None
+    if parsed is None or parsed.dt.tz is not None:
+        # Cut every value after the seconds to drop the offsets (a fixed-width string dtype does it in C)
+        wall_clock = pd.Series(values.to_numpy().astype("U19"), dtype=object)
+        parsed = pd.to_datetime(wall_clock, format="ISO8601", errors="coerce")
+    return parsed.to_numpy("datetime64[s]").astype(np.int64)
+
+
+class LogBackend:
+    """
+    Storage interface of the power log, shared by the CSV and columnar backends.
+
+    Writers call append() with batches of rows keyed by LOG_FIELDS, then flush(); readers
+    use read() for rows of strings (as read_logs() returns them), columns() for typed
+    NumPy columns, and query()/page_after()/buildings() for the filtered, paginated /logs view.
+    """
+
+    # Backends whose /logs pages are fetched by cursor (page_after()) rather than by page number
+    keyset_pagination = False
+
+    def append(self, rows):
+        """
+        Append rows (dicts keyed by LOG_FIELDS) to the log.
+        """
+        raise NotImplementedError
+
+    def flush(self, fsync=False):
+        """
+        Push appended rows to the OS, and to disk if fsync is True.
+        """
+
+    def close(self):
+        """
+        Release open files; the backend can still be used afterwards.
+        """
+
+    def read(self):
+        """
+        Returns:
+            List[dict]: Every row, values as strings.
+        """
+        raise NotImplementedError
+
+    def columns(self):
+        """
+        Returns:
+            Tuple[dict, List[str]]: Columns of the log ('timestamp' as int64 epoch seconds
+                of the wall-clock time, NAT_SECONDS where it does not parse,
+                'building' as int codes, the four sensors as float32) and the building
+                names the codes refer to.
+        """
+        raise NotImplementedError
+
+    def query(self, building=None, date=None, offset=0, limit=None):
+        """
+        Rows of one building and/or whose timestamp starts with `date`, paginated.
+
+        Returns:
+            Tuple[List[dict], int]: The page of rows (values as strings) and the total number of matches.
+        """
+        raise NotImplementedError
+
+    def page_after(self, building=None, date=None, after=None, limit=10):
+        """
+        The page of matching rows following a cursor returned by the previous call.
+
+        Returns:
+            Tuple[List[dict], str]: The rows and the cursor of the next page, None on the last page.
+        """
+        # A malformed cursor (it comes from the query string) starts from the first page
+        offset = int(after) if after and after.isdigit() else 0
+        rows, total = self.query(building, date, offset, limit)
+        return rows, str(offset + limit) if offset + limit < total else None
+
+    def iter_chunks(self, building=None, lo=None, hi=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """
+        Stream the rows of one building and/or epoch-second range [lo, hi), a chunk at a time,
+        so memory use does not grow with the size of the log.
+
+        Yields:
+            List[dict]: Up to chunk_size rows (values as strings).
+        """
+        in_range = timestamp_filter(lo, hi)
+        offset = 0
+        while True:
+            rows, _ = self.query(building, None, offset, chunk_size)
+            if not rows:
+                return
+            offset += len(rows)
+            rows = [row for row in rows if in_range(row["timestamp"])]
+            if rows:
+                yield rows
+
+    def buildings(self):
+        """
+        Returns:
+            List[str]: Distinct buildings in the log, sorted.
+        """
+        raise NotImplementedError
+
+
+class CSVLogBackend(LogBackend):
+    """
+    The power log as one CSV file with a header row.
+
+    The file stays open between appends and is reopened only when it is replaced
+    (e.g. deleted or rotated); queries go through the sidecar LogIndex.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._file_id = None
+
+    def append(self, rows):
+        # Each batch goes out as one write on an O_APPEND descriptor, so appends from
+        # other processes land between whole batches instead of splitting a row
+        buffer = io.StringIO(newline="")
+        csv.DictWriter(buffer, fieldnames=LOG_FIELDS).writerows(rows)
+        self._open()
+        data = buffer.getvalue().encode("utf-8")
+        while data:
+            data = data[os.write(self._fd, data):]
+
+    def flush(self, fsync=False):
+        # Nothing is buffered in the process; only an fsync has work to do
+        if self._fd is not None and fsync:
+            os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = self._file_id = None
+
+    def _open(self):
+        # Reuse the open file unless the file on disk was replaced
+        try:
+            stat = os.stat(self.path)
+            file_id = (stat.st_dev, stat.st_ino)
+        except FileNotFoundError:
+            file_id = None
+            self._create()
+        if self._fd is not None and file_id == self._file_id:
+            if stat.st_size == 0:  # truncated in place (copy-and-truncate rotation)
+                os.write(self._fd, self._header())
+            return
+        self.close()
+
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        stat = os.fstat(self._fd)
+        self._file_id = (stat.st_dev, stat.st_ino)
+        if stat.st_size == 0:
+            os.write(self._fd, self._header())
+
+    def _create(self):
+        # A new file is linked into place with its header already written, so no
+        # process can append a row ahead of the header
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".power_log-")
+        try:
+            os.write(fd, self._header())
+            os.fchmod(fd, 0o644)
+            os.close(fd)
+            fd = None
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            if fd is not None:
+                os.close(fd)
+            os.remove(tmp_path)
+
+    @staticmethod
+    def _header():
+        buffer = io.StringIO(newline="")
+        csv.DictWriter(buffer, fieldnames=LOG_FIELDS).writeheader()
+        return buffer.getvalue().encode("utf-8")
+
+    def read(self):
+        logs = []
+
+        # Check if log file exists; return empty list if it doesn't
+        if not os.path.exists(self.path):
+            return logs
+
+        with open(self.path, mode="r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+
+            for row in reader:
+                # Clean field names by stripping leading/trailing whitespace
+                # This prevents issues with inconsistent headers (e.g., " PowerSensor" vs "PowerSensor")
+                cleaned_row = {k.strip(): v for k, v in row.items()}
+                logs.append(cleaned_row)
+
+        return logs
+
+    def iter_chunks(self, building=None, lo=None, hi=None, chunk_size=EXPORT_CHUNK_ROWS):
+        # One pass over the file, holding a single chunk of rows at a time
+        if not os.path.exists(self.path):
+            return
+        in_range = None if lo is None and hi is None else timestamp_filter(lo, hi)
+        with open(self.path, mode="r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            chunk = []
+            for values in reader:
+                row = dict(zip(header, values))
+                if building and row.get("building") != building:
+                    continue
+                if in_range is not None and not in_range(row.get("timestamp", "")):
+                    continue
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def columns(self):
+        import pandas as pd
+
+        if not os.path.exists(self.path):
+            frame = pd.DataFrame({name: [] for name in LOG_FIELDS})
+        else:
+            frame = pd.read_csv(self.path, dtype={"building": str, "timestamp": str}, skipinitialspace=True)
+            frame.columns = [name.strip() for name in frame.columns]
+        building = pd.Categorical(frame["building"].fillna("Unknown"))
+        columns = {
+            "timestamp": parse_timestamps(frame["timestamp"]),
+            "building": building.codes.astype("int64"),
+        }
+        for name in LOG_FIELDS[2:]:
+            columns[name] = frame[name].to_numpy(dtype="float32")
+        return columns, list(building.categories)
+
+    def query(self, building=None, date=None, offset=0, limit=None):
+        return get_log_index(self.path).query(building, date, offset, limit)
+
+    def buildings(self):
+        return get_log_index(self.path).buildings()
+
+
+def _default_location(kind):
+    # File, directory or database URL of a backend, as currently configured
+    if kind == "csv":
+        return LOG_FILE
+    if kind == "columnar":
+        return LOG_COLUMNAR_DIR
+    if kind == "partitioned":
+        return LOG_PARTITION_DIR
+    if LOG_DATABASE_URL:
+        return LOG_DATABASE_URL
+    from config import Config
+    return Config.SQLALCHEMY_DATABASE_URI
+
+
+def open_log_backend(kind=None, path=None):
+    """
+    Open a storage backend of the power log.
+
+    Parameters:
+        kind (str): One of LOG_BACKENDS; defaults to the configured LOG_BACKEND.
+        path (str): CSV file, column directory, database URL or partition directory; defaults
+            to LOG_FILE, LOG_COLUMNAR_DIR, LOG_DATABASE_URL or LOG_PARTITION_DIR.
+    Returns:
+        LogBackend: The backend. Opening it is cheap: files are only touched when used.
+    """
+    kind = kind or LOG_BACKEND
+    path = path or _default_location(kind)
+    if kind == "csv":
+        return CSVLogBackend(path)
+    if kind == "columnar":
+        from app.columnar_store import ColumnarLogBackend
+        return ColumnarLogBackend(path)
+    if kind == "sql":
+        from app.sql_store import SQLLogBackend
+        return SQLLogBackend(path)
+    if kind == "partitioned":
+        from app.partition_store import PartitionedLogBackend
+        return PartitionedLogBackend(path, LOG_PARTITION_GRANULARITY)
+    raise ValueError(f"Unknown log backend: {kind}")
+
+
+def configure_log_backend(kind, columnar_dir=None, database_url=None, partition_dir=None,
+                          partition_granularity=None):
+    """
+    Select the storage backend used by append_log() and read_logs().
+
+    Parameters:
+        kind (str): One of LOG_BACKENDS.
+        columnar_dir (str): Column directory of the "columnar" backend.
+        database_url (str): Database of the "sql" backend.
+        partition_dir (str): Root directory of the "partitioned" backend.
+        partition_granularity (str): "day" or "hour" partitions for a new partition directory.
+    """
+    global LOG_BACKEND, LOG_COLUMNAR_DIR, LOG_DATABASE_URL, LOG_PARTITION_DIR, LOG_PARTITION_GRANULARITY
+    if kind not in LOG_BACKENDS:
+        raise ValueError(f"Unknown log backend: {kind}")
+    flush_logs()
+    LOG_BACKEND = kind
+    if columnar_dir:
+        LOG_COLUMNAR_DIR = columnar_dir
+    if database_url:
+        LOG_DATABASE_URL = database_url
+    if partition_dir:
+        LOG_PARTITION_DIR = partition_dir
+    if partition_granularity:
+        LOG_PARTITION_GRANULARITY = partition_granularity
+
+
+class LogWriter:
+    """
+    Long-lived, buffered writer for the power log.
+
+    Rows are queued in memory and appended in batches by a background thread, so the
+    request thread never waits on disk I/O. Batches go to a LogBackend that stays open
+    between batches and is reopened only when the target backend or path changes.
+    """
+
+    def __init__(self, path=None, flush_interval=1.0, batch_size=500, max_queue=10000,
+                 fsync="never", fsync_interval=5.0, block_timeout=None, backend=None):
+        """
+        Parameters:
+            path (str): Log file, column directory, database URL or partition directory to write;
+                None uses the configured location of the backend at the time of each write.
+            flush_interval (float): Maximum seconds a queued row waits before it is written.
+            batch_size (int): Queued rows that wake the writer thread early.
+            max_queue (int): Rows held in memory at most; further writes apply backpressure.
+            fsync (str): One of FSYNC_POLICIES.
+            fsync_interval (float): Minimum seconds between fsyncs with the "interval" policy.
+            block_timeout (float): Seconds write() waits for room in a full queue; None waits
+                indefinitely, 0 drops the row immediately. Dropped rows are counted.
+            backend (str): One of LOG_BACKENDS; None uses the module's LOG_BACKEND at the time
+                of each write.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.path = path
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._io_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._target = None
+        self._backend = None
+        self._retry = []
+        self._last_fsync = 0.0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.fsyncs = 0
+        self.last_flush_seconds = None
+        self.error = None
+
+    def write(self, row, path=None):
+        """
+        Queue one log row (a dict keyed by LOG_FIELDS) for the background thread.
+
+        Parameters:
+            row (dict): The row to append.
+            path (str): Overrides the writer's path for this row.
+        Returns:
+            bool: True if the row was queued, False if it was dropped because the queue stayed full.
+        """
+        self._ensure_started()
+        kind = self.backend or LOG_BACKEND
+        item = ((kind, path or self.path or _default_location(kind)), row)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wake the writer and wait for it to make room
+            self.blocked += 1
+            self._wake.set()
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """
+        Write every queued row now, from the calling thread.
+
+        Rows of a batch whose write failed are kept and written before any newer rows,
+        unless the failure came from malformed values, which no retry would fix.
+        """
+        with self._io_lock:
+            while True:
+                batch = self._retry or self._drain()
+                if not batch:
+                    break
+                try:
+                    self._write_batch(batch)
+                except (ValueError, TypeError, KeyError):
+                    self.dropped += len(self._retry)
+                    self._retry = []
+                    raise
+
+    def close(self):
+        """
+        Stop the background thread, write the remaining rows and close the backend.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._io_lock:
+            self._close_backend()
+
+    def info(self):
+        """
+        Counters of the writer, e.g. for the /api/logs/writer endpoint.
+        """
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry),
+            "max_queue": self._queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "fsync": self.fsync,
+            "fsyncs": self.fsyncs,
+            "last_flush_seconds": self.last_flush_seconds,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "error": self.error,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the thread alive; the failed rows are retried on the next flush
+                self.error = str(e)
+                print(f"Power log write failed: {self.error}")
+
+    def _drain(self):
+        # Take up to max_queue rows off the queue without blocking
+        batch = []
+        try:
+            for _ in range(self._queue.maxsize or self.batch_size):
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+        # Until every row has reached its backend, the rest of the batch is kept for a retry
+        self._retry = batch
+        rows = []
+        done = 0
+        for target, row in batch:
+            if target != self._target:
+                if rows:
+                    self._backend.append(rows)
+                    done += len(rows)
+                    self._retry = batch[done:]
+                    rows = []
+                self._open(target)
+            rows.append(row)
+        self._backend.append(rows)
+        self._retry = []
+        fsync = self.fsync == "batch" or (self.fsync == "interval"
+                                          and time.monotonic() - self._last_fsync >= self.fsync_interval)
+        self._backend.flush(fsync=fsync)
+        if fsync:
+            self._last_fsync = time.monotonic()
+            self.fsyncs += 1
+        self.written += len(batch)
+        self.batches += 1
+        self.last_flush_seconds = time.perf_counter() - start
+
+    def _open(self, target):
+        self._close_backend()
+        self._backend = open_log_backend(*target)
+        self._target = target
+
+    def _close_backend(self):
+        if self._backend is not None:
+            self._backend.flush()
+            self._backend.close()
+        self._backend = self._target = None
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def configure_log_writer(**options):
+    """
+    Replace the shared log writer with one built from LogWriter options; the previous
+    writer is flushed and closed first.
+
+    Returns:
+        LogWriter: The new shared writer.
+    """
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is not None:
+            _log_writer.close()
+        _log_writer = LogWriter(**options)
+        return _log_writer
+
+
+def get_log_writer():
+    """
+    Return the shared log writer, creating one with default options on first use.
+    """
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = LogWriter()
+    return _log_writer
+
+
+def flush_logs():
+    """
+    Write all queued log rows to disk now (no-op if nothing was ever logged).
+    """
+    if _log_writer is not None:
+        _log_writer.flush()
+
+
+def _close_log_writer():
+    if _log_writer is not None:
+        _log_writer.close()
+
+
+# Write out whatever is still queued when the process exits
+atexit.register(_close_log_writer)
+
 
 def append_log(data, building="Unknown"):
     """
@@ -20,54 +684,218 @@ def append_log(data, building="Unknown"):
             - 'HumiditySensor': Humidity percentage.
             - 'LightSensor': Light level in lux.
         building (str): Optional name of the building where the sensors are located. Default is "Unknown".
-    If the log file does not exist, a header row is automatically written.
+    The row is queued on the shared LogWriter and written in the background with the next batch;
+    read_logs() flushes the queue first. If the log file does not exist, a header row is
+    automatically written.
     """
-    file_exists = os.path.isfile(LOG_FILE)
-
-    # Open the CSV file in append mode; newline="" prevents blank lines on Windows.
-    with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "timestamp", "building", "PowerSensor", "TemperatureSensor", "HumiditySensor", "LightSensor"
-        ])
-
-        # If the file is newly created, write the header first
-        if not file_exists:
-            writer.writeheader()
-
-        # Write a single row of sensor data to the CSV
-        writer.writerow({
-            "timestamp": data["timestamp"],
-            "building": building,
-            "PowerSensor": data["PowerSensor"],
-            "TemperatureSensor": data["TemperatureSensor"],
-            "HumiditySensor": data["HumiditySensor"],
-            "LightSensor": data["LightSensor"]
-        })
+    get_log_writer().write({
+        "timestamp": data["timestamp"],
+        "building": building,
+        "PowerSensor": data["PowerSensor"],
+        "TemperatureSensor": data["TemperatureSensor"],
+        "HumiditySensor": data["HumiditySensor"],
+        "LightSensor": data["LightSensor"]
+    })
 
 
 def read_logs():
     """
-    Reads all entries from the power log CSV file and returns them as a list of dictionaries.
+    Reads all entries from the power log (through the configured backend) and returns them as a list of dictionaries.
 
-    Each dictionary represents one row from the CSV file, mapping column names to values.
+    Each dictionary represents one row of the log, mapping column names to values.
     Whitespace is stripped from field names to handle inconsistencies caused by editing or export issues.
 
     Returns:
         List[dict]: A list of cleaned log entries. If the file does not exist, returns an empty list.
     """
-    logs = []
+    # Rows still queued by append_log() are written out first
+    flush_logs()
+    return open_log_backend().read()
 
-    # Check if log file exists; return empty list if it doesn't
-    if not os.path.exists(LOG_FILE):
-        return logs
 
-    with open(LOG_FILE, mode="r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+def stream_log_csv(building=None, start=None, end=None, compress=False, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Streams the power log as CSV, a chunk of rows at a time, for downloads of any size.
+
+    Parameters:
+        building (str): Only rows of this building.
+        start (str): Only rows from this date (or datetime) prefix on, e.g. "2025-04-01".
+        end (str): Only rows up to and including this date (or datetime) prefix.
+        compress (bool): Yield a gzip stream (for Content-Encoding: gzip) instead of plain CSV.
+        chunk_size (int): Rows read from the backend and encoded per chunk.
+
+    Returns:
+        Iterator[bytes]: The header row, then the encoded chunks; the filters are validated
+        before the first chunk is read.
+
+    Raises:
+        ValueError: If start or end is not a date prefix.
+    """
+    lo, hi = date_range_bounds(start, end)
+    flush_logs()
+    chunks = open_log_backend().iter_chunks(building, lo, hi, chunk_size)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=LOG_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        encoder = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        for rows in chunks:
+            writer.writerows(rows)
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            if encoder is not None:
+                data = encoder.compress(data)
+            if data:
+                yield data
+        # The header alone when no row matched
+        data = buffer.getvalue().encode("utf-8")
+        if encoder is not None:
+            data = encoder.compress(data) + encoder.flush()
+        if data:
+            yield data
+
+    return generate()
+
+
+def _file_identity(path):
+    # (device, inode, size) of a file, None if it does not exist
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_size
+
+
+def _rotated_copy(path, device, inode):
+    # The renamed copy of a rotated log (e.g. power_log.csv.1), found by its inode
+    for candidate in sorted(glob.glob(glob.escape(path) + ".*")):
+        identity = _file_identity(candidate)
+        if identity is not None and identity[:2] == (device, inode):
+            return candidate
+    return None
+
+
+def _tail_checksum(f, offset):
+    # CRC32 of the TAIL_CHECK_BYTES bytes before `offset` in the open binary file
+    start = max(offset - TAIL_CHECK_BYTES, 0)
+    f.seek(start)
+    return zlib.crc32(f.read(offset - start))
+
 
-        for row in reader:
-            # Clean field names by stripping leading/trailing whitespace
-            # This prevents issues with inconsistent headers (e.g., " PowerSensor" vs "PowerSensor")
-            cleaned_row = {k.strip(): v for k, v in row.items()}
-            logs.append(cleaned_row)
+def _checkpoint_matches(path, checkpoint):
+    # Whether the bytes before the checkpoint's offset are still the ones it was taken after;
+    # a log truncated in place and grown again past the offset fails this check
+    if "checksum" not in checkpoint:
+        return True
+    with open(path, "rb") as f:
+        return _tail_checksum(f, checkpoint.get("offset", 0)) == checkpoint["checksum"]
 
-    return logs
+
+def _read_complete_rows(path, offset, max_rows=None):
+    # Rows of the complete lines from byte `offset` on (the header is skipped), the offset
+    # after the last one and the _tail_checksum() there; a partially written last line is
+    # left for the next read
+    lines = []
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        if not header_line.endswith(b"\n"):
+            return [], offset, _tail_checksum(f, offset)
+        header = [name.strip() for name in next(csv.reader([header_line.decode("utf-8")]))]
+        offset = max(offset, len(header_line))
+        f.seek(offset)
+        while max_rows is None or len(lines) < max_rows:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                lines.append(line.decode("utf-8"))
+        checksum = _tail_checksum(f, offset)
+    return [dict(zip(header, values)) for values in csv.reader(lines)], offset, checksum
+
+
+def read_log_tail(since=None, path=None, max_rows=None):
+    """
+    Reads only the rows appended to the CSV power log since a checkpoint, so incremental consumers
+    (dashboard refreshes, rollups, model retraining) cost O(new rows) instead of O(file size).
+
+    Parameters:
+        since (dict or int): The checkpoint returned by the previous call (or a dict with just a
+            byte 'offset' into the current file), a row sequence number in the current file
+            (0 is its first row), or None to read from the start.
+        path (str): The CSV log; defaults to LOG_FILE, which requires the "csv" backend.
+        max_rows (int): Return at most this many rows; the checkpoint then points at the next one.
+
+    Raises:
+        ValueError: If no path is given and the configured backend is not "csv"; the columnar,
+            sql and partitioned backends never write LOG_FILE, so it would never see new rows.
+
+    Returns:
+        Tuple[List[dict], dict]: The new rows, like read_logs() returns them, and the checkpoint to
+        resume from: a JSON-serializable dict with the 'device' and 'inode' of the file, the byte
+        'offset' after the last row returned, the 'sequence' number of the next row and a
+        'checksum' of the bytes before the offset.
+
+    A partially written last line is not returned until it is complete. If the log was rotated
+    since the checkpoint, the rest of the renamed copy (<path>.1 or any <path>.* with the same
+    inode) is read first, then the new file from its start. A log truncated in place (shorter than
+    the offset, or grown again with other bytes before it) is read from the start.
+    """
+    if path is None:
+        if LOG_BACKEND != "csv":
+            raise ValueError(f"read_log_tail() follows the CSV log, but the log backend is {LOG_BACKEND!r}")
+        path = LOG_FILE
+    # Rows still queued by append_log() are written out first
+    flush_logs()
+    identity = _file_identity(path)
+    if identity is None:
+        return [], {"device": None, "inode": None, "offset": 0, "sequence": 0}
+    current = {"device": identity[0], "inode": identity[1], "offset": 0, "sequence": 0}
+
+    if isinstance(since, int):
+        # The sidecar index maps the sequence number to its byte offset without rescanning the file
+        index = get_log_index(path)
+        index.refresh()
+        sequence = min(max(since, 0), len(index))
+        offset = index.offsets[sequence] if sequence < len(index) else index.indexed_size
+        since = dict(current, offset=offset, sequence=sequence)
+
+    rows = []
+    checkpoint = dict(since) if since else current
+    if checkpoint.get("inode") is not None and (checkpoint.get("device"), checkpoint["inode"]) != identity[:2]:
+        # Rotated: finish the old file where it was left, then move on to the new one
+        rotated = _rotated_copy(path, checkpoint.get("device"), checkpoint.get("inode"))
+        if rotated is not None:
+            rows, offset, checksum = _read_complete_rows(rotated, checkpoint.get("offset", 0), max_rows)
+            checkpoint = dict(checkpoint, offset=offset, sequence=checkpoint.get("sequence", 0) + len(rows),
+                              checksum=checksum)
+            if max_rows is not None and len(rows) >= max_rows:
+                return rows, checkpoint
+        checkpoint = current
+    elif checkpoint.get("offset", 0) > identity[2] or not _checkpoint_matches(path, checkpoint):
+        # Truncated in place (e.g. copy-and-truncate rotation), possibly refilled since
+        checkpoint = current
+
+    limit = None if max_rows is None else max_rows - len(rows)
+    new_rows, offset, checksum = _read_complete_rows(path, checkpoint.get("offset", 0), limit)
+    rows += new_rows
+    return rows, dict(checkpoint, offset=offset, sequence=checkpoint.get("sequence", 0) + len(new_rows),
+                      checksum=checksum)
+
+
+def read_log_columns():
+    """
+    Reads the power log as typed columns instead of rows of strings.
+
+    With the columnar backend the columns are read-only memory maps of the log files, so
+    startup is O(1) and nothing is copied; the CSV backend parses its file with pandas.
+
+    Returns:
+        Tuple[dict, List[str]]: The columns (see LogBackend.columns()) and the building names
+        their 'building' codes refer to.
+    """
+    flush_logs()
+    return open_log_backend().columns()
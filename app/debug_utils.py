@@ -3,4 +3,4 @@ def reset_simulation(data_provider):
     """
     Reset the simulation by clearing the data history.
     """
-    data_provider.data_history.clear()
+    data_provider.reset()
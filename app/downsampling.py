@@ -0,0 +1,81 @@
+"""
+Downsampling helpers for dashboard charts.
+
+Long power histories are reduced to a fixed number of points before they are sent
+to the browser. Largest-Triangle-Three-Buckets (LTTB) keeps the visual shape of the
+series, including isolated spikes, far better than taking every n-th reading.
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def lttb_indices(values: Sequence[float], points: int) -> np.ndarray:
+    """
+    Select the indices of the readings to keep with Largest-Triangle-Three-Buckets.
+
+    The first and last readings are kept (only the first one for points=1). The readings
+    in between are split into points - 2 buckets, and from each bucket the reading forming
+    the largest triangle with the previously kept reading and the average of the next
+    bucket is chosen.
+    Readings are assumed to be evenly spaced, so their position is used as the x axis.
+
+    Args:
+        values (Sequence[float]): Readings in time order.
+        points (int): Number of readings to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the readings to keep.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        # No bucket between the endpoints to choose from
+        return np.array([0, n - 1][:max(points, 0)], dtype=np.int64)
+
+    # Bucket boundaries over the readings between the first and the last one
+    edges = (np.arange(points - 1) * (n - 2) / (points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    indices = np.empty(points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            next_x = (next_start + next_end - 1) / 2
+            next_y = y[next_start:next_end].mean()
+        else:
+            next_x, next_y = n - 1, y[-1]
+
+        # Twice the triangle area for every candidate in the bucket
+        candidates = np.arange(start, end)
+        areas = np.abs((selected - next_x) * (y[start:end] - y[selected])
+                       - (selected - candidates) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def downsample(values: Sequence, points: Optional[int], *series: Sequence) -> List[list]:
+    """
+    Reduce a series (and any parallel series, such as timestamps) to at most points items.
+
+    Args:
+        values (Sequence): Numeric readings used to choose which items to keep.
+        points (int, optional): Maximum number of items; None, 0 or a negative number keeps everything.
+        *series (Sequence): Further sequences aligned with values, reduced the same way.
+
+    Returns:
+        List[list]: values followed by each extra series, reduced to the kept items.
+    """
+    if not points or points < 0 or len(values) <= points:
+        return [list(values)] + [list(s) for s in series]
+
+    keep = lttb_indices(values, points).tolist()
+    return [[values[i] for i in keep]] + [[s[i] for i in keep] for s in series]
@@ -0,0 +1,246 @@
+"""
+Compiled random-forest inference for the control model.
+
+CompiledForest flattens every tree of a fitted sklearn RandomForestClassifier into
+contiguous node arrays (feature, threshold, children, leaf class probabilities).
+Batches are evaluated by walking all trees level by level with NumPy, and single
+rows by a tight loop over memoryviews of the same arrays, skipping sklearn's input
+validation and per-tree dispatch. Predictions are bit-identical to the sklearn model.
+
+The arrays can be saved as .npy files and loaded with np.load(mmap_mode='r'): every
+process mapping the same files then shares one copy of the model in the page cache.
+"""
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import sklearn
+
+# sklearn >= 1.4 stores class fractions in tree_.value and no longer normalises in predict_proba
+_SKLEARN_NORMALISES_LEAVES = tuple(int(part) for part in sklearn.__version__.split(".")[:2]) < (1, 4)
+
+# Rows evaluated together by the vectorized batch path
+CHUNK_ROWS = 2048
+
+# Arrays making up a compiled forest, each saved as <name>.npy
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "missing_left", "leaf_proba", "roots", "classes", "max_depth")
+
+
+class CompiledForest:
+    """
+    Flattened, array-backed copy of a fitted RandomForestClassifier.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Build a compiled forest from its node arrays (see from_sklearn() and to_arrays()).
+
+        The arrays are used as they are, never copied, so memory-mapped arrays stay shared.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): 'feature', 'threshold', 'left', 'right',
+                'missing_left', 'leaf_proba', 'roots', 'classes' and 'max_depth' arrays.
+                Child indices are global (offset by each tree's root); leaves point at themselves.
+        """
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"]
+        self.leaf_proba = arrays["leaf_proba"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.max_depth = int(arrays["max_depth"])
+        self.n_estimators = len(self.roots)
+        self.n_features_in_ = int(self.feature.max()) + 1 if len(self.feature) else 0
+        self._has_missing = bool(self.missing_left.any())
+        # Memoryviews for the single-row path: indexing them yields Python scalars without copying
+        self._views = None
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'CompiledForest':
+        """
+        Flatten a fitted single-output RandomForestClassifier.
+
+        Args:
+            model (RandomForestClassifier): The fitted forest.
+
+        Returns:
+            CompiledForest: The compiled equivalent.
+        """
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, missing, probas, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            is_leaf = left == -1
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+
+            proba = tree.value[:, 0, :n_classes].astype(np.float64)
+            if _SKLEARN_NORMALISES_LEAVES:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, nodes, left + offset))
+            rights.append(np.where(is_leaf, nodes, right + offset))
+            missing.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(len(left))), dtype=bool))
+            probas.append(proba)
+            offset += tree.node_count
+
+        return cls({
+            "feature": np.concatenate(features),
+            "threshold": np.concatenate(thresholds),
+            "left": np.concatenate(lefts),
+            "right": np.concatenate(rights),
+            "missing_left": np.concatenate(missing),
+            "leaf_proba": np.concatenate(probas),
+            "roots": np.array(roots, dtype=np.int64),
+            "classes": np.asarray(model.classes_),
+            "max_depth": np.array(max(e.tree_.max_depth for e in model.estimators_)),
+        })
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Return the node arrays, keyed by ARRAY_NAMES.
+        """
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES[:-2]}
+        arrays["classes"] = self.classes_
+        arrays["max_depth"] = np.array(self.max_depth)
+        return arrays
+
+    def save(self, directory: str) -> None:
+        """
+        Save every array as an uncompressed .npy file, ready to be memory-mapped by load().
+
+        Args:
+            directory (str): Target directory, created if needed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.to_arrays().items():
+            path = os.path.join(directory, f"{name}.npy")
+            tmp_path = f"{path}.tmp{os.getpid()}.npy"
+            np.save(tmp_path, array, allow_pickle=False)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'CompiledForest':
+        """
+        Load a forest saved with save().
+
+        Args:
+            directory (str): Directory holding the .npy files.
+            mmap_mode (str, optional): Passed to np.load; 'r' maps the files read-only so that
+                all processes share their pages, None reads private copies.
+
+        Returns:
+            CompiledForest: The loaded forest.
+        """
+        return cls({name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode,
+                                  allow_pickle=False)
+                    for name in ARRAY_NAMES})
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # Walk every tree for every row at once, one tree level per iteration.
+        # Leaves loop back to themselves, so rows that finish early simply stay put.
+        nodes = np.tile(self.roots, (len(X), 1))
+        offsets = (np.arange(len(X)) * X.shape[1])[:, np.newaxis]
+        values = X.ravel()
+        for _ in range(self.max_depth):
+            x = values[offsets + self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            if self._has_missing:
+                go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _validate(self, X) -> np.ndarray:
+        # sklearn evaluates trees on float32 inputs; compare them as float64 like its Cython code
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X.astype(np.float64)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Mean class probabilities over all trees, bit-identical to the sklearn forest.
+
+        Args:
+            X (array-like): Feature rows (DataFrame, ndarray or nested lists).
+
+        Returns:
+            np.ndarray: Array of shape (n_samples, n_classes).
+        """
+        X = self._validate(X)
+        proba = np.zeros((len(X), len(self.classes_)), dtype=np.float64)
+        # Rows are processed in chunks so the per-level node arrays stay cache sized
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = proba[start:start + CHUNK_ROWS]
+            leaf_proba = self.leaf_proba[self._leaves(X[start:start + CHUNK_ROWS])]
+            # Accumulate tree by tree, in estimator order, exactly as sklearn does
+            for tree in range(self.n_estimators):
+                chunk += leaf_proba[:, tree]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict classes, bit-identical to the sklearn forest.
+
+        Args:
+            X (array-like): Feature rows (DataFrame, ndarray or nested lists).
+
+        Returns:
+            np.ndarray: Predicted class labels.
+        """
+        X = self._validate(X)
+        if len(X) == 1:
+            return self.classes_[[self._predict_row_index(X[0].tolist())]]
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_row(self, row: Sequence[float]):
+        """
+        Predict the class of a single feature row with a tight loop over the node lists.
+
+        Args:
+            row (Sequence[float]): One value per feature, in training column order.
+
+        Returns:
+            The predicted class label.
+        """
+        values = np.asarray(row, dtype=np.float32).astype(np.float64).tolist()
+        return self.classes_[self._predict_row_index(values)]
+
+    def _memoryviews(self):
+        # Built on first use; memoryviews of memory-mapped arrays keep reading the shared pages
+        if self._views is None:
+            self._views = tuple(memoryview(np.ascontiguousarray(array).reshape(-1))
+                                for array in (self.feature, self.threshold, self.left, self.right,
+                                              self.missing_left, self.leaf_proba, self.roots))
+        return self._views
+
+    def _predict_row_index(self, values: List[float]) -> int:
+        feature, threshold, left, right, missing_left, leaf_proba, roots = self._memoryviews()
+        n_classes = len(self.classes_)
+        proba = [0.0] * n_classes
+        for node in roots:
+            while left[node] != node:
+                value = values[feature[node]]
+                if value <= threshold[node] or (value != value and missing_left[node]):
+                    node = left[node]
+                else:
+                    node = right[node]
+            start = node * n_classes
+            for i in range(n_classes):
+                proba[i] += leaf_proba[start + i]
+        best = 0
+        for i, p in enumerate(proba):
+            # Division is monotonic, so comparing sums picks the same first maximum
+            if p / self.n_estimators > proba[best] / self.n_estimators:
+                best = i
+        return best
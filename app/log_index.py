@@ -0,0 +1,355 @@
+"""
+Sidecar index over the power log CSV for the /logs page.
+
+LogIndex records the byte offset of every row, a posting list of row numbers per
+building and runs of consecutive rows per date (the first ten characters of the
+timestamp). Filtering and pagination then work on row numbers, and only the rows
+of the requested page are read, by seeking straight to their offsets. The index
+catches up by parsing just the bytes appended since its last refresh, and is saved
+next to the log (<log>.idx.npz) so other processes and restarts do not rescan the
+file. Saves rewrite the whole sidecar, so they happen at most once per save interval
+(and at exit); a sidecar that lags behind only leaves its readers a few rows to catch
+up on. A truncated, replaced or rewritten log is indexed again from the start.
+"""
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Length of the date prefix of a timestamp, e.g. "2025-04-19"
+DATE_LENGTH = 10
+
+# Appended bytes parsed per read while catching up
+READ_BLOCK = 1 << 20
+
+# Minimum seconds between sidecar saves of one index (a save costs ~30 ms per million rows)
+SAVE_INTERVAL = 30.0
+
+
+class LogIndex:
+    """
+    Byte-offset, building and date index of one power log file.
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None, persist: bool = True,
+                 save_interval: float = SAVE_INTERVAL):
+        """
+        Initialize the index; it is loaded or built on the first refresh().
+
+        Args:
+            path (str): The power log CSV.
+            index_path (str, optional): Sidecar file; defaults to <path>.idx.npz.
+            persist (bool): Save the sidecar after refreshes that indexed new rows.
+            save_interval (float): Minimum seconds between two saves; the first save is immediate
+                and rows indexed in between are saved by a later refresh or save_pending().
+        """
+        self.path = path
+        self.index_path = index_path or f"{path}.idx.npz"
+        self.persist = persist
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._saved_at: Optional[float] = None
+        self._unsaved = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self.header: List[str] = []
+        self.offsets = array('q')
+        self.building_codes = array('l')
+        self.date_codes = array('l')
+        self.building_names: List[str] = []
+        self.date_names: List[str] = []
+        self._building_ids: Dict[str, int] = {}
+        self._date_ids: Dict[str, int] = {}
+        self.postings: Dict[str, array] = {}
+        self.date_runs: Dict[str, List[List[int]]] = {}
+        self.indexed_size = 0
+        self.file_id = None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino, stat.st_size
+
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the log file.
+
+        Returns:
+            int: Number of rows indexed by this call.
+        """
+        with self._lock:
+            stat = self._stat()
+            if stat is None:
+                self._reset()
+                return 0
+            file_id, size = stat[:2], stat[2]
+            if not self.offsets and not self.header:
+                self._load_sidecar(file_id, size)
+            if file_id != self.file_id or size < self.indexed_size or not self._prefix_matches():
+                self._reset()
+                # The saved sidecar describes another file: save the rebuilt index right away
+                self._saved_at = None
+            self.file_id = file_id
+            if size == self.indexed_size:
+                return 0
+            added = self._catch_up()
+            if added and self.persist:
+                self._unsaved = True
+                if self._saved_at is None or time.monotonic() - self._saved_at >= self.save_interval:
+                    self.save()
+            return added
+
+    def _prefix_matches(self) -> bool:
+        # A rewritten log can keep its inode and grow past the indexed size: check the last indexed row
+        if not self.offsets:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[-1])
+            line = f.readline()
+        return self.offsets[-1] + len(line) == self.indexed_size and line.endswith(b"\n")
+
+    def _catch_up(self) -> int:
+        # Parse complete lines appended after indexed_size; a trailing partial line waits for the next refresh
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.indexed_size)
+            position = self.indexed_size
+            pending = b""
+            while True:
+                block = f.read(READ_BLOCK)
+                if not block:
+                    break
+                lines = (pending + block).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    if not self.header:
+                        self.header = [name.strip() for name in next(csv.reader([line.decode("utf-8")]))]
+                    elif line.strip():
+                        self._add_row(position, line)
+                        added += 1
+                    position += len(line) + 1
+        self.indexed_size = position
+        return added
+
+    def _add_row(self, offset: int, line: bytes) -> None:
+        values = next(csv.reader([line.decode("utf-8")]))
+        fields = dict(zip(self.header, values))
+        building = fields.get("building", "")
+        date = fields.get("timestamp", "")[:DATE_LENGTH]
+        row = len(self.offsets)
+
+        self.offsets.append(offset)
+        self.building_codes.append(self._code(self._building_ids, self.building_names, building))
+        self.date_codes.append(self._code(self._date_ids, self.date_names, date))
+        self.postings.setdefault(building, array('l')).append(row)
+        runs = self.date_runs.setdefault(date, [])
+        if runs and runs[-1][1] == row:
+            runs[-1][1] = row + 1
+        else:
+            runs.append([row, row + 1])
+
+    @staticmethod
+    def _code(ids: Dict[str, int], names: List[str], value: str) -> int:
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(names)
+            names.append(value)
+        return code
+
+    def save(self) -> None:
+        """
+        Write the sidecar index atomically (temporary file, then rename).
+        """
+        with self._lock:
+            tmp_path = f"{self.index_path}.tmp{os.getpid()}.npz"
+            np.savez(tmp_path,
+                     offsets=np.frombuffer(self.offsets, dtype=np.int64),
+                     building_codes=np.asarray(self.building_codes, dtype=np.int64),
+                     date_codes=np.asarray(self.date_codes, dtype=np.int64),
+                     building_names=np.array(self.building_names, dtype=str),
+                     date_names=np.array(self.date_names, dtype=str),
+                     header=np.array(self.header, dtype=str),
+                     state=np.array([self.file_id[0], self.file_id[1], self.indexed_size], dtype=np.int64))
+            os.replace(tmp_path, self.index_path)
+            self._saved_at = time.monotonic()
+            self._unsaved = False
+
+    def save_pending(self) -> None:
+        """
+        Save the sidecar if rows were indexed since the last save (deferred by save_interval).
+        """
+        with self._lock:
+            if self._unsaved and self.file_id is not None:
+                self.save()
+
+    def _load_sidecar(self, file_id: Tuple[int, int], size: int) -> None:
+        # Adopt a saved index of the same file; postings and date runs are rebuilt from the row codes
+        try:
+            with np.load(self.index_path, allow_pickle=False) as saved:
+                state = saved["state"].tolist()
+                if tuple(state[:2]) != tuple(file_id) or state[2] > size:
+                    return
+                offsets, building_codes, date_codes = saved["offsets"], saved["building_codes"], saved["date_codes"]
+                building_names = saved["building_names"].tolist()
+                date_names = saved["date_names"].tolist()
+                header = saved["header"].tolist()
+        except (OSError, KeyError, ValueError):
+            return
+
+        self.header = header
+        self.offsets = array('q', offsets.astype(np.int64).tobytes())
+        self.building_codes = array('l', building_codes.tolist())
+        self.date_codes = array('l', date_codes.tolist())
+        self.building_names, self.date_names = building_names, date_names
+        self._building_ids = {name: code for code, name in enumerate(building_names)}
+        self._date_ids = {name: code for code, name in enumerate(date_names)}
+        self.postings = {name: array('l', np.flatnonzero(building_codes == code).tolist())
+                         for code, name in enumerate(building_names)}
+        self.date_runs = {}
+        if len(date_codes):
+            starts = np.flatnonzero(np.diff(date_codes, prepend=-1) != 0)
+            ends = np.append(starts[1:], len(date_codes))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self.date_runs.setdefault(date_names[date_codes[start]], []).append([start, end])
+        self.indexed_size = state[2]
+        self.file_id = tuple(file_id)
+
+    def buildings(self) -> List[str]:
+        """
+        Distinct buildings in the log, sorted.
+        """
+        with self._lock:
+            self.refresh()
+            return sorted(name for name, rows in self.postings.items() if rows)
+
+    def _date_rows(self, date: str) -> List[Tuple[int, int]]:
+        # Row ranges of every indexed date starting with the (possibly partial) date filter
+        prefix = date[:DATE_LENGTH]
+        runs = [tuple(run) for name, date_runs in self.date_runs.items() if name.startswith(prefix)
+                for run in date_runs]
+        return sorted(runs)
+
+    def _matching_segments(self, building: Optional[str], date: Optional[str]) -> List[Tuple[Sequence[int], int, int]]:
+        # Matches as (rows, start, end) slices of a range or a building's posting list, in log
+        # order, so that counting and paging never materialize one entry per matching row
+        if date:
+            runs = self._date_rows(date)
+            if building:
+                rows = self.postings.get(building, array('l'))
+                # The building's rows that fall inside each of the date runs
+                segments = [(rows, bisect_left(rows, start), bisect_left(rows, end)) for start, end in runs]
+                return [segment for segment in segments if segment[1] < segment[2]]
+            return [(range(start, end), 0, end - start) for start, end in runs]
+        if building:
+            rows = self.postings.get(building, array('l'))
+            return [(rows, 0, len(rows))]
+        return [(range(len(self.offsets)), 0, len(self.offsets))]
+
+    @staticmethod
+    def _page(segments: List[Tuple[Sequence[int], int, int]], offset: int, limit: Optional[int]) -> List[int]:
+        # Row numbers of matches [offset, offset + limit), taken from the segments they fall in
+        page = []
+        for rows, start, end in segments:
+            if offset >= end - start:
+                offset -= end - start
+                continue
+            stop = end if limit is None else min(end, start + offset + limit - len(page))
+            page.extend(rows[start + offset:stop])
+            offset = 0
+            if limit is not None and len(page) >= limit:
+                break
+        return page
+
+    def read_rows(self, rows: List[int]) -> List[Dict[str, str]]:
+        """
+        Read the given rows by seeking to their offsets.
+
+        Args:
+            rows (List[int]): Row numbers, in the order they should be returned.
+
+        Returns:
+            List[Dict[str, str]]: Rows keyed by the stripped header names, like read_logs().
+        """
+        if not rows:
+            return []
+        lines = []
+        with open(self.path, "rb") as f:
+            for row in rows:
+                f.seek(self.offsets[row])
+                lines.append(f.readline().decode("utf-8"))
+        return [dict(zip(self.header, values)) for values in csv.reader(io.StringIO("".join(lines)))]
+
+    def query(self, building: Optional[str] = None, date: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Filter and paginate the log, reading only the rows returned.
+
+        Args:
+            building (str, optional): Only rows of this building.
+            date (str, optional): Only rows whose timestamp starts with this prefix, e.g. "2025-04-19".
+            offset (int): Matching rows to skip.
+            limit (int, optional): Maximum rows to return; None returns all.
+
+        Returns:
+            Tuple[List[Dict[str, str]], int]: The page of rows in log order and the total number of matches.
+        """
+        with self._lock:
+            self.refresh()
+            segments = self._matching_segments(building, date)
+            if date and len(date) > DATE_LENGTH:
+                # Prefixes finer than a day (e.g. "2025-04-19T12") are checked on the candidate rows,
+                # which are limited to the matching days
+                rows = self._page(segments, 0, None)
+                rows = array('l', [row for row, log in zip(rows, self.read_rows(rows))
+                                   if log["timestamp"].startswith(date)])
+                segments = [(rows, 0, len(rows))]
+            total = sum(end - start for _, start, end in segments)
+            return self.read_rows(self._page(segments, max(offset, 0), limit)), total
+
+
+_indexes: Dict[str, LogIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_log_index(path: str) -> LogIndex:
+    """
+    Return the shared index of a log file, creating it on first use.
+
+    Args:
+        path (str): The power log CSV.
+
+    Returns:
+        LogIndex: The index; call query() or buildings(), which refresh it first.
+    """
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = LogIndex(path)
+        return index
+
+
+def _save_pending_indexes() -> None:
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        try:
+            index.save_pending()
+        except OSError:
+            pass
+
+
+# Rows indexed since the last throttled save are written out when the process exits
+atexit.register(_save_pending_indexes)
@@ -0,0 +1,242 @@
+"""
+Background training, loading and hot reloading of the control model.
+
+ModelManager keeps worker start-up off the critical path: the RandomForest model
+and its label encoder are trained (when missing) and unpickled in a daemon thread
+while AutoControlStrategy serves requests with its rule-based fallback. Once loaded,
+the pair is handed to every registered strategy in one atomic swap. The thread then
+polls the model files and swaps in a retrained model without restarting the worker.
+
+With compiled_dir set, the flattened forest saved by save_compiled_model() is loaded
+instead of the pickles, memory-mapped read-only (mmap_mode='r') so every worker
+process shares a single copy of the model's pages.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+from app.control_model import MODEL_PATH, ENCODER_PATH, COMPILED_POINTER, train_power_model, \
+    compile_if_stale, load_compiled_model
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Report this process's memory in bytes: resident (rss), proportional (pss, where pages
+    shared with other processes count fractionally) and the shared/private split.
+
+    Returns:
+        Dict[str, int]: Figures from /proc/self/smaps_rollup, or just the peak rss elsewhere.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean",
+              "Shared_Dirty": "shared_dirty", "Private_Clean": "private_clean",
+              "Private_Dirty": "private_dirty"}
+    try:
+        usage = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] = int(rest.split()[0]) * 1024
+        return usage
+    except OSError:
+        import resource
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS; report it as-is, scaled for Linux
+        return {"max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+class ModelManager:
+    """
+    Load the control model in the background and keep strategies on the latest version.
+    """
+
+    def __init__(self, strategies: Optional[List] = None, model_path: str = MODEL_PATH,
+                 encoder_path: str = ENCODER_PATH, poll_interval: float = 30.0,
+                 trainer: Optional[Callable[[], Tuple]] = train_power_model,
+                 compiled_dir: Optional[str] = None, mmap_mode: Optional[str] = None):
+        """
+        Initialize the manager; nothing is loaded until start() or load() is called.
+
+        Args:
+            strategies (List, optional): Strategies with a set_model(model, le) method.
+            model_path (str): Path of the pickled model.
+            encoder_path (str): Path of the pickled label encoder.
+            poll_interval (float): Seconds between checks for changed model files; 0 disables
+                hot reloading.
+            trainer (Callable, optional): Called when the model files are missing, e.g.
+                train_power_model; None never trains.
+            compiled_dir (str, optional): Load the compiled .npy artifact from this directory
+                instead of the pickles; it is created from the pickles if missing.
+            mmap_mode (str, optional): Memory-map mode for loading, e.g. 'r'. Compiled arrays are
+                then shared between processes; for pickles it is passed to joblib.load, but
+                sklearn copies tree nodes into its own buffers while unpickling.
+        """
+        self.strategies = list(strategies or [])
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.poll_interval = poll_interval
+        self.trainer = trainer
+        self.compiled_dir = compiled_dir
+        self.mmap_mode = mmap_mode
+        self.load_seconds = None
+        self.memory = {}
+        self.ready = threading.Event()
+        self.reloads = 0
+        self.loaded_at = None
+        self.error = None
+        self._current = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, strategy) -> None:
+        """
+        Add a strategy; it immediately receives the current model if one is loaded.
+
+        Args:
+            strategy: An object with a set_model(model, le) method.
+        """
+        with self._lock:
+            self.strategies.append(strategy)
+            if self.ready.is_set() and self._current is not None:
+                strategy.set_model(*self._current)
+
+    def _signature_of(self, *paths: str) -> Optional[Tuple]:
+        # (mtime, size) of every path, or None while any of them is missing
+        try:
+            stats = [os.stat(path) for path in paths]
+        except FileNotFoundError:
+            return None
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+    def _file_signature(self) -> Optional[Tuple]:
+        pickles = self._signature_of(self.model_path, self.encoder_path)
+        if not self.compiled_dir:
+            return pickles
+        compiled = self._signature_of(os.path.join(self.compiled_dir, COMPILED_POINTER))
+        if pickles is None and compiled is None:
+            return None
+        return pickles, compiled
+
+    def _read_model(self) -> Tuple:
+        if not self.compiled_dir:
+            return (joblib.load(self.model_path, mmap_mode=self.mmap_mode),
+                    joblib.load(self.encoder_path, mmap_mode=self.mmap_mode))
+        return load_compiled_model(self.compiled_dir, mmap_mode=self.mmap_mode)
+
+    def load(self) -> bool:
+        """
+        Read the model files and swap the model into every registered strategy.
+
+        Returns:
+            bool: True if a model was loaded, False if the files are missing or unreadable.
+        """
+        try:
+            if self.compiled_dir:
+                # (Re)build the compiled version if it was not built from the current pickles
+                compile_if_stale(self.model_path, self.encoder_path, self.compiled_dir)
+            signature = self._file_signature()
+            if signature is None:
+                return False
+            start = time.perf_counter()
+            model, le = self._read_model()
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            self.error = str(e)
+            print(f"Model loading failed: {self.error}")
+            return False
+
+        with self._lock:
+            if self._current is not None:
+                self.reloads += 1
+            self._current = (model, le)
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.load_seconds = load_seconds
+            self.error = None
+            for strategy in self.strategies:
+                strategy.set_model(model, le)
+        self.memory = memory_usage()
+        self.ready.set()
+        return True
+
+    def check_for_update(self) -> bool:
+        """
+        Reload the model if its files changed since the last load.
+
+        Returns:
+            bool: True if a new model was swapped in.
+        """
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+        return self.load()
+
+    def _train_if_missing(self) -> None:
+        if self.trainer is None or self._file_signature() is not None:
+            return
+        print("Starting automatic model training...")
+        try:
+            self.trainer()
+            print("Model training completed successfully")
+        except Exception as e:
+            self.error = str(e)
+            print(f"Model training failed: {self.error}")
+
+    def _run(self) -> None:
+        self._train_if_missing()
+        self.load()
+        while self.poll_interval and not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+
+    def start(self) -> threading.Thread:
+        """
+        Train (if needed) and load the model in a daemon thread, then keep polling for updates.
+
+        Returns:
+            threading.Thread: The background thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-manager", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop polling and wait for the background thread to finish.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a model has been loaded.
+
+        Returns:
+            bool: True if a model is loaded, False on timeout.
+        """
+        return self.ready.wait(timeout)
+
+    def status(self) -> Dict:
+        """
+        Describe the loaded model and this worker's memory, e.g. for the /api/model/status endpoint.
+        """
+        return {
+            "ready": self.ready.is_set(),
+            "pid": os.getpid(),
+            "format": "compiled" if self.compiled_dir else "sklearn",
+            "mmap_mode": self.mmap_mode,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "memory": memory_usage(),
+            "memory_after_load": self.memory,
+            "reloads": self.reloads,
+            "error": self.error,
+            "polling": bool(self._thread and self._thread.is_alive()),
+            "poll_interval": self.poll_interval,
+        }
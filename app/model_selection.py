@@ -0,0 +1,256 @@
+"""
+Hyperparameter sweep and latency-aware selection for the control model.
+
+Each forest configuration of a grid is fitted in a process pool; workers send back the
+pickled model so its serialized size is exact. Inference latency is then measured in
+the parent process, one model at a time, so timings are not disturbed by the fits still
+running. Results are written to reports/ as Markdown and CSV, and the smallest model
+meeting an accuracy and p99 latency budget can be saved as the production model.
+
+Run from the project root:
+    python -m app.model_selection --dataset app/static/power_log.csv --min-accuracy 0.95 --max-p99-ms 2 --save
+"""
+import argparse
+import csv
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from app.control_model import DATASET_PATH, MODEL_PATH, ENCODER_PATH, COMPILED_DIR, load_training_data, \
+    save_model_files, save_compiled_model, model_files_signature
+from app.forest_compiler import CompiledForest
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reports")
+
+DEFAULT_TREES = (25, 50, 100, 200)
+DEFAULT_DEPTHS = (4, 6, 8, 12, None)
+
+# Rows timed one at a time, and the size and repetitions of the timed batch
+SINGLE_ROW_SAMPLES = 200
+BATCH_ROWS = 1000
+BATCH_REPEATS = 20
+
+
+def _fit_config(X_train: np.ndarray, y_train: np.ndarray, params: Dict) -> Dict:
+    # Worker entry point: fit one configuration and return it pickled, as save_model_files() would
+    start = time.perf_counter()
+    model = RandomForestClassifier(class_weight='balanced', random_state=42, **params)
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return {"params": params, "fit_seconds": fit_seconds, "model_bytes": buffer.getvalue()}
+
+
+def _percentiles_ms(samples: Sequence[float]) -> Dict[str, float]:
+    p50, p99 = np.percentile(np.asarray(samples) * 1e3, [50, 99])
+    return {"p50": round(float(p50), 4), "p99": round(float(p99), 4)}
+
+
+def measure_model(model, X_test, y_test) -> Dict:
+    """
+    Measure accuracy, inference latency and size of a fitted forest.
+
+    Args:
+        model (RandomForestClassifier): The fitted forest.
+        X_test (DataFrame): Held-out feature rows.
+        y_test (np.ndarray): Encoded labels of X_test.
+
+    Returns:
+        Dict: accuracy, node count, compiled size in bytes, and p50/p99 latencies in ms for
+            single rows (sklearn and compiled) and for a batch of BATCH_ROWS rows.
+    """
+    compiled = CompiledForest.from_sklearn(model)
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(X_test), SINGLE_ROW_SAMPLES)
+    X_values = X_test.to_numpy()
+
+    single, single_compiled = [], []
+    for i in rows:
+        row = X_test.iloc[[i]]
+        start = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        compiled.predict_row(X_values[i])
+        single_compiled.append(time.perf_counter() - start)
+
+    batch_rows = X_test.iloc[rng.integers(0, len(X_test), BATCH_ROWS)]
+    batch = []
+    for _ in range(BATCH_REPEATS):
+        start = time.perf_counter()
+        model.predict(batch_rows)
+        batch.append(time.perf_counter() - start)
+
+    return {
+        "accuracy": round(float(accuracy_score(y_test, model.predict(X_test))), 4),
+        "nodes": int(sum(tree.tree_.node_count for tree in model.estimators_)),
+        "compiled_bytes": int(sum(array.nbytes for array in compiled.to_arrays().values())),
+        "single_ms": _percentiles_ms(single),
+        "single_compiled_ms": _percentiles_ms(single_compiled),
+        "batch_ms": _percentiles_ms(batch),
+    }
+
+
+def sweep(features, labels, trees: Iterable[int] = DEFAULT_TREES,
+          depths: Iterable[Optional[int]] = DEFAULT_DEPTHS,
+          max_workers: Optional[int] = None) -> List[Dict]:
+    """
+    Fit every (n_estimators, max_depth) combination in parallel and measure each model.
+
+    Args:
+        features (DataFrame): Feature rows, in FEATURE_COLUMNS order.
+        labels (np.ndarray): Power level labels.
+        trees (Iterable[int]): Values of n_estimators to try.
+        depths (Iterable[Optional[int]]): Values of max_depth to try (None for unlimited).
+        max_workers (int, optional): Pool size; defaults to the number of CPUs, 1 fits inline.
+
+    Returns:
+        List[Dict]: One result per configuration with params, fit_seconds, size_bytes and
+            the figures of measure_model(), sorted by size.
+    """
+    y = LabelEncoder().fit_transform(labels)
+    X_train, X_test, y_train, y_test = train_test_split(features, y, test_size=0.2, random_state=42)
+    grid = [{"n_estimators": n, "max_depth": d} for n, d in itertools.product(trees, depths)]
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        fitted = [_fit_config(X_train, y_train, params) for params in grid]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(grid))) as pool:
+            # Biggest forests first, so the pool is not left waiting on one at the end
+            order = sorted(grid, key=lambda p: p["n_estimators"] * (p["max_depth"] or 32), reverse=True)
+            fitted = list(pool.map(_fit_config, itertools.repeat(X_train), itertools.repeat(y_train), order))
+
+    results = []
+    for result in fitted:
+        model_bytes = result.pop("model_bytes")
+        result["size_bytes"] = len(model_bytes)
+        result.update(measure_model(joblib.load(io.BytesIO(model_bytes)), X_test, y_test))
+        results.append(result)
+    return sorted(results, key=lambda r: r["size_bytes"])
+
+
+def select_model(results: List[Dict], min_accuracy: float = 0.0, max_p99_ms: Optional[float] = None,
+                 compiled: bool = False) -> Optional[Dict]:
+    """
+    Pick the smallest configuration meeting an accuracy and single-row latency budget.
+
+    Args:
+        results (List[Dict]): Output of sweep().
+        min_accuracy (float): Lowest acceptable test accuracy.
+        max_p99_ms (float, optional): Highest acceptable p99 single-row latency in ms.
+        compiled (bool): Judge latency of the compiled forest instead of sklearn's.
+
+    Returns:
+        Optional[Dict]: The chosen result, or None if no configuration meets the budget.
+    """
+    latency_key = "single_compiled_ms" if compiled else "single_ms"
+    eligible = [r for r in results
+                if r["accuracy"] >= min_accuracy
+                and (max_p99_ms is None or r[latency_key]["p99"] <= max_p99_ms)]
+    return min(eligible, key=lambda r: (r["size_bytes"], -r["accuracy"]), default=None)
+
+
+def write_report(results: List[Dict], selected: Optional[Dict] = None, report_dir: str = REPORT_DIR,
+                 budget: str = "") -> str:
+    """
+    Write the comparison as a Markdown table and a CSV file.
+
+    Returns:
+        str: Path of the Markdown report.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    columns = ["n_estimators", "max_depth", "accuracy", "size_kib", "compiled_kib", "nodes", "fit_s",
+               "single_p50_ms", "single_p99_ms", "compiled_p50_ms", "compiled_p99_ms",
+               f"batch{BATCH_ROWS}_p50_ms", f"batch{BATCH_ROWS}_p99_ms"]
+    rows = [[r["params"]["n_estimators"], r["params"]["max_depth"], r["accuracy"],
+             round(r["size_bytes"] / 1024, 1), round(r["compiled_bytes"] / 1024, 1), r["nodes"],
+             round(r["fit_seconds"], 2), r["single_ms"]["p50"], r["single_ms"]["p99"],
+             r["single_compiled_ms"]["p50"], r["single_compiled_ms"]["p99"],
+             r["batch_ms"]["p50"], r["batch_ms"]["p99"]] for r in results]
+
+    with open(os.path.join(report_dir, f"model_sweep_{stamp}.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+    path = os.path.join(report_dir, f"model_sweep_{stamp}.md")
+    with open(path, "w") as f:
+        f.write(f"# Control model sweep ({stamp})\n\n")
+        f.write("| " + " | ".join(columns) + " |\n")
+        f.write("|" + "---|" * len(columns) + "\n")
+        for row in rows:
+            f.write("| " + " | ".join(str(value) for value in row) + " |\n")
+        if budget:
+            f.write(f"\nBudget: {budget}\n")
+        if selected is not None:
+            f.write(f"\nSelected: n_estimators={selected['params']['n_estimators']}, "
+                    f"max_depth={selected['params']['max_depth']}\n")
+        elif budget:
+            f.write("\nNo configuration meets the budget.\n")
+    return path
+
+
+def save_selected(features, labels, params: Dict, model_path: str = MODEL_PATH,
+                  encoder_path: str = ENCODER_PATH, compiled_dir: Optional[str] = COMPILED_DIR):
+    """
+    Refit the chosen configuration on all readings and save it as the production model.
+
+    Returns:
+        Tuple: The fitted model and label encoder.
+    """
+    le = LabelEncoder()
+    y = le.fit_transform(labels)
+    model = RandomForestClassifier(class_weight='balanced', random_state=42, n_jobs=-1, **params)
+    model.fit(features, y)
+    model.set_params(n_jobs=None)
+    save_model_files(model, le, model_path, encoder_path)
+    if compiled_dir:
+        save_compiled_model(model, le, compiled_dir, model_files_signature(model_path, encoder_path))
+    return model, le
+
+
+def _depth(value: str) -> Optional[int]:
+    return None if value.lower() == "none" else int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare forest configurations and pick one within budget")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--trees", default=",".join(map(str, DEFAULT_TREES)))
+    parser.add_argument("--depths", default=",".join(str(d) for d in DEFAULT_DEPTHS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-accuracy", type=float, default=0.0)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="single-row p99 latency budget")
+    parser.add_argument("--compiled", action="store_true", help="judge latency of the compiled forest")
+    parser.add_argument("--save", action="store_true", help="save the selected model as the production model")
+    args = parser.parse_args()
+
+    features, labels, _ = load_training_data(args.dataset)
+    results = sweep(features, labels, [int(t) for t in args.trees.split(",")],
+                    [_depth(d) for d in args.depths.split(",")], args.workers)
+    budget = f"accuracy >= {args.min_accuracy}, single-row p99 <= {args.max_p99_ms} ms" \
+             + (" (compiled)" if args.compiled else "")
+    selected = select_model(results, args.min_accuracy, args.max_p99_ms, args.compiled)
+    print(f"Report written to {write_report(results, selected, budget=budget)}")
+    if selected is None:
+        print("No configuration meets the budget")
+    else:
+        print(f"Selected {selected['params']}: accuracy {selected['accuracy']}, "
+              f"{selected['size_bytes'] / 1024:.1f} KiB")
+        if args.save:
+            save_selected(features, labels, selected["params"])
+            print("Saved as the production model")
@@ -31,6 +31,30 @@ class User(UserMixin, db.Model):
         # Developer-friendly string representation
         return f'<User {self.username}>'
 
+# One sensor reading of the power log (storage backend "sql", see app/sql_store.py)
+class PowerReading(db.Model):
+    __tablename__ = 'power_readings'
+
+    # Log order: rowid alias, also the tie-breaker of keyset pagination
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    building = db.Column(db.String(64), nullable=False)
+    power = db.Column(db.Float)
+    temperature = db.Column(db.Float)
+    humidity = db.Column(db.Float)
+    light = db.Column(db.Float)
+
+    # (building, timestamp) serves building filters, date ranges within a building and DISTINCT
+    # building; (timestamp) serves date filters across buildings. SQLite appends the rowid (id)
+    # to both, so keyset pagination on (timestamp, id) stays inside the index.
+    __table_args__ = (
+        db.Index('ix_power_readings_building_timestamp', 'building', 'timestamp'),
+        db.Index('ix_power_readings_timestamp', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f'<PowerReading {self.building} {self.timestamp}>'
+
 # Flask-Login loader function to reload a user from the session
 @login.user_loader
 def load_user(user_id):
@@ -1,4 +1,6 @@
+import math
 from abc import ABC, abstractmethod
+from collections import deque
 
 # Abstract Observer interface
 class Observer(ABC):
@@ -7,11 +9,16 @@ class Observer(ABC):
         # Must be implemented by concrete observers to receive updates
         pass
 
+    def reset(self):
+        # Called when the provider's history is cleared; stateful observers override this
+        pass
+
 # Subject class that provides data to observers
 class DataProvider:
     def __init__(self):
         self.observers = []      # List of all subscribed observers
         self.data_history = []   # Historical log of all data updates
+        self.version = 0         # Bumped whenever data_history changes
 
     def subscribe(self, observer: Observer):
         # Add an observer to the list
@@ -25,6 +32,15 @@ class DataProvider:
         # Add new data to history and notify all observers
         self.data_history.append(data)
         self.notify_all(data)
+        # Bump after observers are updated so cached results never mix old and new state
+        self.version += 1
+
+    def reset(self):
+        # Clear the history and let observers drop any state derived from it
+        self.data_history.clear()
+        for observer in self.observers:
+            observer.reset()
+        self.version += 1
 
     def notify_all(self, data):
         # Notify each observer by calling its update() method
@@ -50,3 +66,68 @@ class DataLogger(Observer):
         # Print and (optionally) log the received data
         print(f"[DataLogger] 记录完整数据: {data}")
         # self.log.append(data)  # Could store for later use
+
+# Concrete Observer: flags readings that deviate strongly from recent behaviour
+class AnomalyDetector(Observer):
+    # Sensors tracked for every building
+    SENSORS = ("PowerSensor", "TemperatureSensor", "HumiditySensor", "LightSensor")
+
+    def __init__(self, alpha=0.1, z_threshold=3.0, warmup=10, max_anomalies=100,
+                 default_building="Unknown"):
+        # alpha: weight of the newest reading in the exponentially weighted mean/variance
+        # z_threshold: |z-score| at or above which a reading is flagged
+        # warmup: readings per building and sensor before anything is flagged
+        # max_anomalies: size of the recent-anomaly buffer
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.default_building = default_building
+        self.stats = {}  # (building, sensor) -> [count, mean, variance]
+        self.anomalies = deque(maxlen=max_anomalies)
+
+    def update(self, data):
+        # O(1) per sensor: score the reading against the current state, then fold it in
+        building = data.get("building", self.default_building)
+        for sensor in self.SENSORS:
+            value = data.get(sensor)
+            if value is None:
+                continue
+
+            state = self.stats.get((building, sensor))
+            if state is None:
+                self.stats[(building, sensor)] = [1, float(value), 0.0]
+                continue
+
+            count, mean, variance = state
+            std_dev = math.sqrt(variance)
+            if count >= self.warmup and std_dev > 0:
+                z_score = (value - mean) / std_dev
+                if abs(z_score) >= self.z_threshold:
+                    self.anomalies.append({
+                        "timestamp": data.get("timestamp"),
+                        "building": building,
+                        "sensor": sensor,
+                        "value": value,
+                        "expected": round(mean, 2),
+                        "z_score": round(z_score, 2)
+                    })
+
+            # Incremental exponentially weighted mean and variance
+            diff = value - mean
+            increment = self.alpha * diff
+            state[0] = count + 1
+            state[1] = mean + increment
+            state[2] = (1 - self.alpha) * (variance + diff * increment)
+
+    def reset(self):
+        # Forget the learned behaviour and the flagged readings
+        self.stats.clear()
+        self.anomalies.clear()
+
+    def recent(self, building=None, sensor=None, limit=None):
+        # Most recent anomalies first, optionally filtered by building and sensor; the deque is
+        # copied in one step first, since iterating it while update() appends raises RuntimeError
+        result = [a for a in reversed(tuple(self.anomalies))
+                  if (building is None or a["building"] == building)
+                  and (sensor is None or a["sensor"] == sensor)]
+        return result[:limit] if limit else result
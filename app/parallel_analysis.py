@@ -0,0 +1,280 @@
+"""
+Parallel per-building analysis for the power monitoring system.
+
+The power log is partitioned by building into contiguous NumPy columns that are
+placed in shared memory once. Each worker process of a concurrent.futures pool
+attaches to the shared block and analyses its own slices, so readings are never
+pickled; only the small per-building result dictionaries travel back. The pool is
+created on first use and shared by every later analysis. Its workers are started by a
+forkserver (spawn where there is none), never forked from the threaded web process.
+"""
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.analysis import AnalysisEngine, WeightedMovingAverageForecaster
+from app.data_store import NAT_SECONDS
+
+# Below this many readings a process pool costs more than it saves
+MIN_PARALLEL_READINGS = 50000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+def clamp_workers(workers: Optional[int]) -> int:
+    """
+    Number of worker processes to use: the CPU count by default, else workers clamped to 1..CPU count.
+    """
+    if not workers:
+        return _cpu_count()
+    return min(max(workers, 1), _cpu_count())
+
+
+def _pool_context():
+    # Forking the web process would copy locks held by its other threads (log writer, model
+    # manager, request handlers) into the workers, where nothing would ever release them
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # One pool of CPU-count workers for the life of the process; workers start on first submit
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_cpu_count(), mp_context=_pool_context())
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Stop the shared worker pool; the next parallel analysis starts a new one.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pool)
+
+
+def partition_logs(logs: Iterable[Dict]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Split power log rows (as returned by read_logs()) into per-building arrays.
+
+    Args:
+        logs (Iterable[Dict]): Log rows with 'building', 'timestamp' and 'PowerSensor' keys.
+
+    Returns:
+        Dict: Building name to a (power float64 array, hour int8 array) pair, in log order.
+            Hours that cannot be read from the timestamp are stored as -1.
+    """
+    powers, hours = {}, {}
+    for row in logs:
+        building = row.get("building") or "Unknown"
+        timestamp = row.get("timestamp") or ""
+        hour = timestamp[11:13]
+        powers.setdefault(building, []).append(float(row["PowerSensor"]))
+        hours.setdefault(building, []).append(int(hour) if hour.isdigit() else -1)
+    return {building: (np.array(powers[building], dtype=np.float64),
+                       np.array(hours[building], dtype=np.int8))
+            for building in powers}
+
+
+def partition_columns(columns: Dict[str, np.ndarray], building_names: List[str]
+                      ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Split typed power log columns (as returned by read_log_columns()) into per-building arrays.
+
+    Args:
+        columns (Dict[str, np.ndarray]): 'timestamp' (epoch seconds), 'building' (codes into
+            building_names) and 'PowerSensor' columns.
+        building_names (List[str]): Building names indexed by code.
+
+    Returns:
+        Dict: Building name to a (power float64 array, hour int8 array) pair, in log order,
+            like partition_logs().
+    """
+    codes = np.asarray(columns["building"])
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    power = np.asarray(columns["PowerSensor"], dtype=np.float64)[order]
+    timestamps = np.asarray(columns["timestamp"])[order]
+    # Hour of the wall-clock time; -1 where the timestamp did not parse, as in partition_logs()
+    hours = np.where(timestamps == NAT_SECONDS, -1, timestamps // 3600 % 24).astype(np.int8)
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    return {building_names[int(group[0])]: (values, hour)
+            for group, values, hour in zip(np.split(sorted_codes, bounds), np.split(power, bounds),
+                                           np.split(hours, bounds))
+            if len(group)}
+
+
+def _building_report(engine: AnalysisEngine, values: np.ndarray, hours: np.ndarray,
+                     window_size: int, periods_ahead: int) -> Dict:
+    # Same statistics as generate_detailed_report(), computed with NumPy
+    n = len(values)
+    report = {
+        "readings": n,
+        "average": round(float(values.mean()), 2),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+    if n > 1:
+        report["median"] = float(np.median(values))
+        report["std_dev"] = round(float(values.std(ddof=1)), 2)
+    report["alert_percentage"] = round(float(np.count_nonzero(values > engine.threshold)) / n * 100, 2)
+
+    if n >= 3:
+        # Mirrors generate_detailed_report(): the last slice holds ceil(n / 3) readings
+        third = n // 3
+        first_third = float(values[:third].sum()) / third
+        last_third = float(values[n - math.ceil(n / 3):].sum()) / third
+        if last_third > first_third * 1.1:
+            report["trend"] = "increasing"
+        elif last_third < first_third * 0.9:
+            report["trend"] = "decreasing"
+        else:
+            report["trend"] = "stable"
+        if first_third:
+            report["trend_change_percentage"] = round((last_third - first_third) / first_third * 100, 2)
+
+    peak_hour = int(hours[int(np.argmax(values))])
+    if peak_hour >= 0:
+        report["peak_hour"] = peak_hour
+
+    forecaster = WeightedMovingAverageForecaster()
+    forecaster.extend(values[-len(forecaster.weights):].tolist())
+
+    return {
+        "detailed_report": report,
+        "severity": engine.severity_counts(values),
+        "patterns": engine.detect_patterns_batch(values, window_size),
+        "forecast": forecaster.forecast(periods_ahead),
+    }
+
+
+def _analyze_slices(values_name: str, hours_name: str, total: int,
+                    tasks: List[Tuple[str, int, int]], threshold: float,
+                    window_size: int, periods_ahead: int) -> Dict[str, Dict]:
+    # Worker entry point: attach to the shared columns and analyse each (building, start, stop) slice
+    values_block = shared_memory.SharedMemory(name=values_name)
+    hours_block = shared_memory.SharedMemory(name=hours_name)
+    try:
+        values = np.ndarray((total,), dtype=np.float64, buffer=values_block.buf)
+        hours = np.ndarray((total,), dtype=np.int8, buffer=hours_block.buf)
+        engine = AnalysisEngine(threshold)
+        results = {building: _building_report(engine, values[start:stop], hours[start:stop],
+                                              window_size, periods_ahead)
+                   for building, start, stop in tasks}
+        # Views into the shared buffers must be released before closing them
+        del values, hours
+        return results
+    finally:
+        values_block.close()
+        hours_block.close()
+
+
+def analyze_building_arrays(partitions: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                            threshold: float = 450, max_workers: Optional[int] = None,
+                            window_size: int = 5, periods_ahead: int = 3) -> Dict[str, Dict]:
+    """
+    Run the full analysis for every building, fanning the work out over a process pool.
+
+    Args:
+        partitions (Dict): Building name to (power array, hour array), e.g. from partition_logs().
+        threshold (float): Alert threshold in Watts.
+        max_workers (int, optional): Number of worker processes, clamped to 1..CPU count;
+            defaults to the number of CPUs.
+        window_size (int): Moving-average window for pattern detection.
+        periods_ahead (int): Number of periods to forecast.
+
+    Returns:
+        Dict[str, Dict]: Building name to its detailed report, severity counts, patterns
+            and forecast, sorted by building name.
+    """
+    partitions = {b: p for b, p in partitions.items() if len(p[0])}
+    if not partitions:
+        return {}
+
+    workers = clamp_workers(max_workers)
+    total = sum(len(values) for values, _ in partitions.values())
+    if workers == 1 or len(partitions) == 1 or total < MIN_PARALLEL_READINGS:
+        engine = AnalysisEngine(threshold)
+        return {building: _building_report(engine, values, hours, window_size, periods_ahead)
+                for building, (values, hours) in sorted(partitions.items())}
+
+    # Lay every building out contiguously in one shared block per column
+    values_block = shared_memory.SharedMemory(create=True, size=total * 8)
+    hours_block = shared_memory.SharedMemory(create=True, size=total)
+    try:
+        values = np.ndarray((total,), dtype=np.float64, buffer=values_block.buf)
+        hours = np.ndarray((total,), dtype=np.int8, buffer=hours_block.buf)
+        slices, offset = [], 0
+        for building, (building_values, building_hours) in partitions.items():
+            stop = offset + len(building_values)
+            values[offset:stop] = building_values
+            hours[offset:stop] = building_hours
+            slices.append((building, offset, stop))
+            offset = stop
+        del values, hours
+
+        # Greedy balancing: largest buildings first, each to the least loaded worker
+        workers = min(workers, len(slices))
+        groups = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for task in sorted(slices, key=lambda t: t[2] - t[1], reverse=True):
+            target = loads.index(min(loads))
+            groups[target].append(task)
+            loads[target] += task[2] - task[1]
+
+        # One task per group on the shared pool, so at most `workers` processes are busy with this call
+        results = {}
+        pool = _get_pool()
+        try:
+            futures = [pool.submit(_analyze_slices, values_block.name, hours_block.name, total,
+                                   group, threshold, window_size, periods_ahead)
+                       for group in groups]
+            for future in futures:
+                results.update(future.result())
+        except BrokenProcessPool:
+            # A worker died (e.g. killed); replace the pool for the next call
+            shutdown_pool()
+            raise
+        return dict(sorted(results.items()))
+    finally:
+        values_block.close()
+        values_block.unlink()
+        hours_block.close()
+        hours_block.unlink()
+
+
+def analyze_buildings(logs: Iterable[Dict], threshold: float = 450,
+                      max_workers: Optional[int] = None, **options) -> Dict[str, Dict]:
+    """
+    Partition power log rows by building and analyse each building in parallel.
+
+    Args:
+        logs (Iterable[Dict]): Log rows as returned by read_logs().
+        threshold (float): Alert threshold in Watts.
+        max_workers (int, optional): Number of worker processes, clamped to 1..CPU count.
+        **options: window_size and periods_ahead, passed to analyze_building_arrays().
+
+    Returns:
+        Dict[str, Dict]: Per-building results, sorted by building name.
+    """
+    return analyze_building_arrays(partition_logs(logs), threshold, max_workers, **options)
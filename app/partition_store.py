@@ -0,0 +1,402 @@
+"""
+Time- and building-partitioned storage backend for the power log.
+
+Readings are split into one CSV file per building per day (or hour):
+<directory>/<quoted building>/<period>.csv. A reading for a new period simply starts a
+new file, so the log rotates by itself. A small manifest.json lists every partition
+with its building, period and row count. Readers prune partitions on the building and
+date filters using the manifest alone. They count the rows of partitions that lie
+entirely inside the filter without opening them, and open only the files that the
+requested page needs.
+
+Closed partitions can be compacted in the background: hourly files are merged into
+one file per day, and files are gzip-compressed. Retention then deletes (or moves to
+an archive directory) whole partition files instead of rewriting a large CSV.
+"""
+import csv
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from app.columnar_store import directory_lock
+from app.data_store import EXPORT_CHUNK_ROWS, LOG_FIELDS, LogBackend, date_prefix_bounds, parse_timestamps, \
+    timestamp_filter
+
+MANIFEST_FILE = "manifest.json"
+
+# Length of the timestamp prefix naming a partition, per granularity
+GRANULARITIES = {"day": 10, "hour": 13}
+
+_manifest_cache: Dict[str, Tuple[Tuple, Dict]] = {}
+
+
+def _epoch(moment: datetime) -> int:
+    return int(np.datetime64(moment, "s").astype(np.int64))
+
+
+class PartitionedLogBackend(LogBackend):
+    """
+    The power log as a directory of per-building, per-period CSV partitions.
+    """
+
+    def __init__(self, directory: str, granularity: str = "day"):
+        """
+        Args:
+            directory (str): Root directory of the partitions and the manifest.
+            granularity (str): "day" or "hour"; used when the directory is new, after which
+                the manifest's granularity applies.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown partition granularity: {granularity}")
+        self.directory = directory
+        self.granularity = granularity
+        self._lock = threading.Lock()
+        self._refresh()
+
+    # --- manifest
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _refresh(self, writable: bool = False) -> None:
+        # Readers share parsed manifests until the file is replaced; writers (holding the
+        # directory lock) always read their own copy to modify
+        path = self._manifest_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.manifest = {"granularity": self.granularity, "partitions": {}}
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = _manifest_cache.get(path)
+        if writable or cached is None or cached[0] != signature:
+            with open(path) as f:
+                manifest = json.load(f)
+            if writable:
+                self.manifest = manifest
+                return
+            cached = _manifest_cache[path] = (signature, manifest)
+        self.manifest = cached[1]
+
+    def _save_manifest(self) -> None:
+        path = self._manifest_path()
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def partitions(self, building: Optional[str] = None, date: Optional[str] = None) -> List[Dict]:
+        """
+        Partitions that can hold rows of a building and/or date prefix, pruned with the manifest
+        alone. Each has 'building', 'period', 'file', 'rows' and 'compressed' entries, plus its
+        epoch-second 'start' and 'end' and whether it lies 'inside' the date range entirely.
+        """
+        self._refresh()
+        bounds = date_prefix_bounds(date) if date else None
+        if date and bounds is None:
+            return []
+        selected = []
+        for entry in self.manifest["partitions"].values():
+            if building and entry["building"] != building:
+                continue
+            start, end = date_prefix_bounds(entry["period"])
+            if bounds and (end <= bounds[0] or start >= bounds[1]):
+                continue
+            inside = bounds is None or (bounds[0] <= start and end <= bounds[1])
+            selected.append(dict(entry, start=start, end=end, inside=inside))
+        return sorted(selected, key=lambda p: (p["start"], p["building"]))
+
+    # --- writing
+
+    def _entry_for(self, building: str, timestamp: str) -> Dict:
+        # Partition of a reading: an existing compacted day partition, else the configured period
+        day = timestamp[:GRANULARITIES["day"]]
+        quoted = quote(building, safe="")
+        entry = self.manifest["partitions"].get(f"{quoted}/{day}")
+        if entry is None:
+            period = timestamp[:GRANULARITIES[self.manifest["granularity"]]]
+            entry = self.manifest["partitions"].setdefault(f"{quoted}/{period}", {
+                "building": building, "period": period,
+                "file": f"{quoted}/{period}.csv", "rows": 0, "compressed": False})
+        return entry
+
+    def append(self, rows):
+        if not rows:
+            return
+        with directory_lock(self.directory, self._lock):
+            self._refresh(writable=True)
+            batches: Dict[str, List] = {}
+            for row in rows:
+                timestamp = str(row["timestamp"]).replace(" ", "T")
+                entry = self._entry_for(row["building"], timestamp)
+                batches.setdefault(entry["file"], [entry, []])[1].append(dict(row, timestamp=timestamp))
+            for file, (entry, batch) in batches.items():
+                path = os.path.join(self.directory, file)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                new = not os.path.exists(path)
+                # Late readings for a compressed partition are added as another gzip member
+                opener = gzip.open if entry["compressed"] else open
+                with opener(path, "at", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
+                    if new:
+                        writer.writeheader()
+                    writer.writerows(batch)
+                entry["rows"] += len(batch)
+            self._save_manifest()
+
+    # --- reading
+
+    def _read_partition(self, partition: Dict) -> List[Dict[str, str]]:
+        path = os.path.join(self.directory, partition["file"])
+        opener = gzip.open if partition["compressed"] else open
+        try:
+            with opener(path, "rt", newline="", encoding="utf-8") as f:
+                return [{k.strip(): v for k, v in row.items()} for row in csv.DictReader(f)]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _groups(partitions: List[Dict]) -> List[List[Dict]]:
+        # Partitions whose periods overlap (e.g. one day of every building) form a group;
+        # rows are merged in timestamp order within a group, groups follow each other in time
+        groups, end = [], None
+        for partition in partitions:
+            if groups and partition["start"] < end:
+                groups[-1].append(partition)
+                end = max(end, partition["end"])
+            else:
+                groups.append([partition])
+                end = partition["end"]
+        return groups
+
+    def _group_rows(self, group: List[Dict], date: Optional[str]) -> List[Dict[str, str]]:
+        rows = [row for partition in group for row in self._read_partition(partition)]
+        if date and not all(partition["inside"] for partition in group):
+            rows = [row for row in rows if row["timestamp"].startswith(date)]
+        return sorted(rows, key=lambda row: row["timestamp"])
+
+    def read(self):
+        return [row for group in self._groups(self.partitions()) for row in self._group_rows(group, None)]
+
+    def columns(self):
+        frames = []
+        for partition in self.partitions():
+            path = os.path.join(self.directory, partition["file"])
+            if os.path.exists(path):
+                frames.append(pd.read_csv(path, dtype={"building": str, "timestamp": str}))
+        frame = pd.concat(frames) if frames else pd.DataFrame({name: [] for name in LOG_FIELDS})
+        frame = frame.sort_values("timestamp", kind="stable")
+        building = pd.Categorical(frame["building"])
+        columns = {
+            "timestamp": parse_timestamps(frame["timestamp"]),
+            "building": building.codes.astype(np.int64),
+        }
+        for name in LOG_FIELDS[2:]:
+            columns[name] = frame[name].to_numpy(dtype=np.float32)
+        return columns, list(building.categories)
+
+    def query(self, building=None, date=None, offset=0, limit=None):
+        offset = max(offset, 0)
+        stop = None if limit is None else offset + limit
+        page, total = [], 0
+        for group in self._groups(self.partitions(building, date)):
+            rows = None
+            if all(partition["inside"] for partition in group):
+                # Counted from the manifest; opened only if the page reaches into it
+                count = sum(partition["rows"] for partition in group)
+            else:
+                rows = self._group_rows(group, date)
+                count = len(rows)
+            if (stop is None or total < stop) and total + count > offset:
+                if rows is None:
+                    rows = self._group_rows(group, date)
+                page += rows[max(offset - total, 0):None if stop is None else stop - total]
+            total += count
+        return page, total
+
+    def iter_chunks(self, building=None, lo=None, hi=None, chunk_size=EXPORT_CHUNK_ROWS):
+        # Partitions outside the range are skipped; one group of overlapping partitions
+        # (a period of every selected building) is held in memory at a time
+        partitions = [partition for partition in self.partitions(building)
+                      if (lo is None or partition["end"] > lo) and (hi is None or partition["start"] < hi)]
+        in_range = timestamp_filter(lo, hi)
+        for group in self._groups(partitions):
+            rows = self._group_rows(group, None)
+            if not all((lo is None or lo <= p["start"]) and (hi is None or p["end"] <= hi) for p in group):
+                rows = [row for row in rows if in_range(row["timestamp"])]
+            for begin in range(0, len(rows), chunk_size):
+                yield rows[begin:begin + chunk_size]
+
+    def buildings(self):
+        self._refresh()
+        return sorted({entry["building"] for entry in self.manifest["partitions"].values()})
+
+    # --- maintenance
+
+    def compact(self, before: datetime) -> int:
+        """
+        Merge the hourly partitions of each building and day that ended before `before` into
+        one gzip-compressed day partition, and compress closed day partitions.
+
+        Args:
+            before (datetime): Only partitions ending at or before this time are compacted.
+
+        Returns:
+            int: Number of partition files written.
+        """
+        cutoff = _epoch(before)
+        written = 0
+        with directory_lock(self.directory, self._lock):
+            self._refresh(writable=True)
+            days: Dict[Tuple[str, str], List[Tuple[str, Dict]]] = {}
+            for key, entry in self.manifest["partitions"].items():
+                _, end = date_prefix_bounds(entry["period"])
+                if end <= cutoff and not (entry["compressed"] and len(entry["period"]) == GRANULARITIES["day"]):
+                    days.setdefault((entry["building"], entry["period"][:GRANULARITIES["day"]]), []).append((key, entry))
+
+            for (building, day), entries in sorted(days.items()):
+                _, day_end = date_prefix_bounds(day)
+                if day_end > cutoff:
+                    continue
+                quoted = quote(building, safe="")
+                file = f"{quoted}/{day}.csv.gz"
+                target = os.path.join(self.directory, file)
+                tmp_path = f"{target}.tmp{os.getpid()}"
+                existing = self.manifest["partitions"].get(f"{quoted}/{day}")
+                sources = sorted(entries, key=lambda item: item[1]["period"])
+                if existing is not None and existing["compressed"]:
+                    sources.insert(0, (f"{quoted}/{day}", existing))
+                rows = [row for _, entry in sources for row in self._read_partition(entry)]
+                with gzip.open(tmp_path, "wt", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(rows)
+                os.replace(tmp_path, target)
+                for key, entry in sources:
+                    self.manifest["partitions"].pop(key, None)
+                self.manifest["partitions"][f"{quoted}/{day}"] = {
+                    "building": building, "period": day, "file": file, "rows": len(rows), "compressed": True}
+                # Save before deleting the sources, so the manifest never points at missing files
+                self._save_manifest()
+                for _, entry in sources:
+                    if entry["file"] != file:
+                        os.remove(os.path.join(self.directory, entry["file"]))
+                written += 1
+        return written
+
+    def drop_before(self, before: datetime, archive_dir: Optional[str] = None) -> int:
+        """
+        Retention: remove every partition ending at or before `before`.
+
+        Args:
+            before (datetime): Cutoff time.
+            archive_dir (str, optional): Move the files here (same layout) instead of deleting them.
+
+        Returns:
+            int: Number of partitions removed.
+        """
+        cutoff = _epoch(before)
+        with directory_lock(self.directory, self._lock):
+            self._refresh(writable=True)
+            expired = {key: entry for key, entry in self.manifest["partitions"].items()
+                       if date_prefix_bounds(entry["period"])[1] <= cutoff}
+            for key in expired:
+                del self.manifest["partitions"][key]
+            self._save_manifest()
+            for entry in expired.values():
+                path = os.path.join(self.directory, entry["file"])
+                if not os.path.exists(path):
+                    continue
+                if archive_dir:
+                    target = os.path.join(archive_dir, entry["file"])
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(path, target)
+                else:
+                    os.remove(path)
+        return len(expired)
+
+
+class PartitionMaintenance:
+    """
+    Background thread compacting closed partitions and applying retention.
+    """
+
+    def __init__(self, backend: PartitionedLogBackend, interval: float = 3600.0, compact_after_days: float = 1.0,
+                 retention_days: Optional[float] = None, archive_dir: Optional[str] = None):
+        """
+        Args:
+            backend (PartitionedLogBackend): The partitioned log.
+            interval (float): Seconds between maintenance runs.
+            compact_after_days (float): Compact partitions that ended at least this long ago.
+            retention_days (float, optional): Drop partitions that ended this long ago; None keeps all.
+            archive_dir (str, optional): Move dropped partitions here instead of deleting them.
+        """
+        self.backend = backend
+        self.interval = interval
+        self.compact_after_days = compact_after_days
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self.runs = 0
+        self.compacted = 0
+        self.dropped = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, now: Optional[datetime] = None) -> None:
+        """
+        Compact and apply retention once.
+        """
+        now = now or datetime.now()
+        if self.retention_days is not None:
+            self.dropped += self.backend.drop_before(now - timedelta(days=self.retention_days), self.archive_dir)
+        self.compacted += self.backend.compact(now - timedelta(days=self.compact_after_days))
+        self.runs += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                print(f"Partition maintenance failed: {self.error}")
+
+    def start(self) -> threading.Thread:
+        """
+        Run maintenance every `interval` seconds in a daemon thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="partition-maintenance", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self) -> Dict:
+        """
+        Partition counts and maintenance counters, e.g. for the /api/logs/partitions endpoint.
+        """
+        partitions = self.backend.partitions()
+        return {
+            "granularity": self.backend.manifest["granularity"],
+            "partitions": len(partitions),
+            "compressed": sum(1 for p in partitions if p["compressed"]),
+            "rows": sum(p["rows"] for p in partitions),
+            "runs": self.runs,
+            "compacted": self.compacted,
+            "dropped": self.dropped,
+            "error": self.error,
+        }
@@ -0,0 +1,277 @@
+"""
+Streaming quantile sketches for power monitoring.
+
+This module contains a KLL sketch, which answers approximate quantile queries
+(median, p90, p99, ...) over an unbounded stream in bounded memory, and the
+BuildingQuantiles observer that keeps one sketch per building and day so that
+percentiles can be merged across buildings and time windows.
+"""
+import math
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+from app.monitoring import Observer
+
+# Percentiles reported by BuildingQuantiles.percentiles()
+DEFAULT_PERCENTILES = {
+    'median': 0.5,
+    'p90': 0.9,
+    'p99': 0.99,
+    'p99.9': 0.999,
+}
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty).
+
+    Values are kept in a stack of compactors; level h holds items that each stand for
+    2**h readings. When the sketch is full, the lowest full compactor is sorted and every
+    other item is promoted to the next level, so memory stays around O(k log(n / k))
+    while the rank error is roughly 1.7 / k. Until the first compaction the answers are
+    exact. Two sketches built with the same k can be merged.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: Optional[int] = None):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            k (int): Accuracy parameter; capacity of the top compactor.
+            c (float): Capacity decay factor for lower compactors, in (0.5, 1).
+            seed (int, optional): Seed for the coin flips made during compaction.
+        """
+        self.k = k
+        self.c = c
+        self.count = 0
+        self.compactors: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._max_size = 0
+        self._update_max_size()
+
+    def __len__(self) -> int:
+        """
+        Return the number of readings summarised by the sketch.
+        """
+        return self.count
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _update_max_size(self) -> None:
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value: float) -> None:
+        """
+        Add a single value to the sketch.
+
+        Args:
+            value (float): The value to add.
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        """
+        Add a sequence of values to the sketch.
+
+        Args:
+            values (Iterable[float]): The values to add.
+        """
+        for value in values:
+            self.update(value)
+
+    def _compress(self) -> None:
+        while self._size >= self._max_size:
+            for height, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(height):
+                    if height + 1 == len(self.compactors):
+                        self.compactors.append([])
+                        self._update_max_size()
+                    items.sort()
+                    # An odd item out stays behind so no weight is lost
+                    leftover = [items.pop()] if len(items) % 2 else []
+                    promoted = items[self._rng.randint(0, 1)::2]
+                    self.compactors[height + 1].extend(promoted)
+                    self.compactors[height] = leftover
+                    self._size -= len(items) - len(promoted)
+                    break
+            else:
+                break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other (KLLSketch): A sketch built with the same k.
+
+        Returns:
+            KLLSketch: This sketch, for chaining.
+        """
+        if other.k != self.k:
+            raise ValueError("Only sketches with the same k can be merged")
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.count += other.count
+        self._size = sum(len(items) for items in self.compactors)
+        self._update_max_size()
+        self._compress()
+        return self
+
+    @classmethod
+    def merged(cls, sketches: Iterable['KLLSketch'], k: int = 200) -> 'KLLSketch':
+        """
+        Build a new sketch summarising all of the given sketches.
+
+        Args:
+            sketches (Iterable[KLLSketch]): Sketches to combine; they are left unchanged.
+            k (int): Accuracy parameter of the sketches.
+
+        Returns:
+            KLLSketch: The combined sketch.
+        """
+        result = cls(k=k)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """
+        Estimate several quantiles in one pass over the sketch.
+
+        Args:
+            qs (Iterable[float]): Quantiles in [0, 1].
+
+        Returns:
+            List[Optional[float]]: One estimate per quantile, or None if the sketch is empty.
+        """
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+
+        weighted = sorted((value, 1 << height)
+                          for height, items in enumerate(self.compactors) for value in items)
+        values = [value for value, _ in weighted]
+        cumulative = list(accumulate(weight for _, weight in weighted))
+        total = cumulative[-1]
+
+        # Nearest-rank: the first value whose cumulative weight reaches q * total
+        return [values[min(bisect_left(cumulative, max(q * total, 1)), len(values) - 1)] for q in qs]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a single quantile.
+
+        Args:
+            q (float): Quantile in [0, 1], e.g. 0.99 for p99.
+
+        Returns:
+            Optional[float]: The estimate, or None if the sketch is empty.
+        """
+        return self.quantiles([q])[0]
+
+
+class BuildingQuantiles(Observer):
+    """
+    Observer keeping one KLL sketch per building and day of power readings.
+
+    Percentiles can be asked for a single building or the whole campus, over all days
+    or a date range; the matching sketches are merged on demand.
+    """
+
+    def __init__(self, default_building: str = "Unknown", k: int = 200):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            default_building (str): Building used for readings without a 'building' key.
+            k (int): Accuracy parameter of each sketch.
+        """
+        self.default_building = default_building
+        self.k = k
+        self.sketches: Dict[tuple, KLLSketch] = {}
+
+    def reset(self) -> None:
+        """
+        Drop every sketch.
+        """
+        self.sketches.clear()
+
+    def update(self, data: Dict) -> None:
+        """
+        Observer hook: add the power value of a sensor reading.
+
+        Args:
+            data (Dict): A sensor reading, optionally with a 'building' key.
+        """
+        building = data.get('building', self.default_building)
+        self.add(building, data['PowerSensor'], data.get('timestamp'))
+
+    def add(self, building: str, value: float, timestamp: Optional[str] = None) -> None:
+        """
+        Add a power reading for a building.
+
+        Args:
+            building (str): Building the reading belongs to.
+            value (float): Power consumption in Watts.
+            timestamp (str, optional): ISO timestamp; its date selects the daily sketch.
+        """
+        day = str(timestamp)[:10] if timestamp else None
+        key = (building, day)
+        if key not in self.sketches:
+            self.sketches[key] = KLLSketch(k=self.k)
+        self.sketches[key].update(value)
+
+    def buildings(self) -> List[str]:
+        """
+        Return the buildings that have readings, sorted by name.
+        """
+        return sorted({building for building, _ in self.sketches})
+
+    def sketch(self, building: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None) -> KLLSketch:
+        """
+        Merge the sketches matching a building and an inclusive date range.
+
+        Args:
+            building (str, optional): Building to select; None merges every building.
+            start (str, optional): First day to include, as YYYY-MM-DD.
+            end (str, optional): Last day to include, as YYYY-MM-DD.
+
+        Returns:
+            KLLSketch: A new sketch summarising the selected readings.
+        """
+        selected = []
+        for (key_building, day), sketch in self.sketches.items():
+            if building is not None and key_building != building:
+                continue
+            if (start or end) and day is None:
+                continue
+            if start and day < start:
+                continue
+            if end and day > end:
+                continue
+            selected.append(sketch)
+        return KLLSketch.merged(selected, k=self.k)
+
+    def percentiles(self, building: Optional[str] = None, start: Optional[str] = None,
+                    end: Optional[str] = None) -> Dict[str, Optional[float]]:
+        """
+        Report median, p90, p99 and p99.9 for a building (or all buildings) and date range.
+
+        Returns:
+            Dict: Percentile name to estimated value (None when there is no data).
+        """
+        sketch = self.sketch(building, start, end)
+        values = sketch.quantiles(DEFAULT_PERCENTILES.values())
+        return dict(zip(DEFAULT_PERCENTILES.keys(), values))
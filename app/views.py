@@ -1,20 +1,29 @@
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from app import app
 from app.sensors import PowerSensorSimulator
-from app.monitoring import DataProvider, DashboardDisplay, DataLogger
-from app.analysis import AnalysisEngine
+from app.monitoring import DataProvider, DashboardDisplay, DataLogger, AnomalyDetector
+from app.analysis import AnalysisEngine, StreamingStatistics, PatternTracker, WeightedMovingAverageForecaster
+from app.sketches import BuildingQuantiles
+from app.downsampling import downsample
+from app.parallel_analysis import analyze_building_arrays, partition_columns
 from app.control import PowerControlContext, AutoControlStrategy, ManualControlStrategy, SimpleControlSystem, \
-    SimpleControlAdapter
+    SimpleControlAdapter, PredictionCache
 from datetime import datetime
-from app.data_store import append_log, read_logs
+from app.data_store import append_log, read_log_columns, configure_log_writer, configure_log_backend, \
+    flush_logs, open_log_backend, stream_log_csv
+from app.model_manager import ModelManager
+from app.control_model import COMPILED_DIR
 from flask import Response
-import pandas as pd
 from flask import request, session
 import math
+import multiprocessing
 from flask import Blueprint
 
 main_bp = Blueprint("main", __name__)
 
+# Building that simulated readings are attributed to
+DEFAULT_BUILDING = "Main Library"
+
 # Initialize system components
 sensor = PowerSensorSimulator()
 data_provider = DataProvider()
@@ -28,11 +37,66 @@ data_provider.subscribe(data_logger)
 # Initialize analysis engine with threshold value for alerts
 analysis_engine = AnalysisEngine(threshold=450)
 
+# Running statistics for the detailed report, updated on every new reading
+report_stats = StreamingStatistics(threshold=analysis_engine.threshold)
+data_provider.subscribe(report_stats)
+
+# Incremental pattern counters, so pattern detection does not rescan the history
+pattern_tracker = PatternTracker(window_size=5)
+data_provider.subscribe(pattern_tracker)
+
+# Forecaster state follows the live stream, so forecasts never copy the history
+forecaster = WeightedMovingAverageForecaster()
+data_provider.subscribe(forecaster)
+
+# Bounded-memory percentile sketches per building and day
+building_quantiles = BuildingQuantiles(default_building=DEFAULT_BUILDING)
+data_provider.subscribe(building_quantiles)
+
+# Adaptive EWMA/z-score anomaly detection across all four sensors
+anomaly_detector = AnomalyDetector(default_building=DEFAULT_BUILDING)
+data_provider.subscribe(anomaly_detector)
+
+# Readings are appended to the power log in batches by a background thread, through the
+# configured storage backend
+configure_log_backend(app.config['LOG_BACKEND'], app.config['LOG_COLUMNAR_DIR'], app.config['LOG_DATABASE_URL'],
+                      app.config['LOG_PARTITION_DIR'], app.config['LOG_PARTITION_GRANULARITY'])
+log_writer = configure_log_writer(flush_interval=app.config['LOG_FLUSH_INTERVAL'],
+                                  batch_size=app.config['LOG_BATCH_SIZE'],
+                                  max_queue=app.config['LOG_QUEUE_SIZE'],
+                                  block_timeout=app.config['LOG_BLOCK_TIMEOUT'],
+                                  fsync=app.config['LOG_FSYNC'],
+                                  fsync_interval=app.config['LOG_FSYNC_INTERVAL'])
+
+# Partitioned logs are compacted, compressed and expired in the background
+partition_maintenance = None
+# Background services run in the app's own processes only, not in the analysis pool's workers,
+# which import this module too
+main_process = multiprocessing.parent_process() is None
+if app.config['LOG_BACKEND'] == 'partitioned' and main_process:
+    from app.partition_store import PartitionMaintenance
+    partition_maintenance = PartitionMaintenance(open_log_backend(), interval=app.config['LOG_MAINTENANCE_INTERVAL'],
+                                                 compact_after_days=app.config['LOG_COMPACT_AFTER_DAYS'],
+                                                 retention_days=app.config['LOG_RETENTION_DAYS'],
+                                                 archive_dir=app.config['LOG_ARCHIVE_DIR'])
+    partition_maintenance.start()
+
 # Initialize control system strategies
-auto_strategy = AutoControlStrategy()
+prediction_cache = PredictionCache(max_size=app.config['PREDICTION_CACHE_SIZE'],
+                                   ttl=app.config['PREDICTION_CACHE_TTL'],
+                                   quantization=app.config['PREDICTION_CACHE_QUANTIZATION'])
+auto_strategy = AutoControlStrategy(cache=prediction_cache, load_model=False)
 manual_strategy = ManualControlStrategy()
 control_context = PowerControlContext(strategy=auto_strategy)
 
+# Train/load the RF model in the background; the auto strategy uses its fallback rules until
+# the model is ready, and picks up retrained model files without a restart
+model_manager = ModelManager([auto_strategy], poll_interval=app.config['MODEL_RELOAD_INTERVAL'],
+                             compiled_dir=COMPILED_DIR if app.config['MODEL_FORMAT'] == 'compiled' else None,
+                             mmap_mode='r' if app.config['MODEL_MMAP'] else None)
+if main_process:
+    model_manager.start()
+
 # Initialize simple control system and its adapter
 simple_system = SimpleControlSystem()
 simple_adapter = SimpleControlAdapter(simple_system)
@@ -44,6 +108,58 @@ def home():
     return render_template("home.html", title="Home")
 
 
+def _simulation_analysis(points):
+    """
+    Run every analysis shown on the simulation page over the current history.
+    The chart series and both alert lists are downsampled to at most `points` entries.
+    """
+    # Extract power history and timestamps for analysis
+    power_history = [d['PowerSensor'] for d in data_provider.data_history]
+    timestamps = [d['timestamp'] for d in data_provider.data_history]
+
+    # Basic analysis (original functionality)
+    alerts = analysis_engine.analyze_batch(power_history)
+    report = analysis_engine.generate_trend_report(power_history)
+
+    # Advanced analysis (new functionality)
+    alerts_with_severity = []
+    detailed_report = {}
+    patterns = {}
+    forecast = []
+
+    # Only perform advanced analysis if we have sufficient data
+    if len(power_history) > 0:
+        # Generate severity-based alerts
+        alerts_with_severity = analysis_engine.analyze_with_severity_batch(power_history)
+
+        # Detailed statistical report from the running statistics
+        detailed_report = report_stats.snapshot()
+
+        # Pattern detection requires more data points
+        if len(power_history) >= 10:
+            patterns = pattern_tracker.result()
+
+        # Generate forecast for future periods
+        forecast = forecaster.forecast(periods_ahead=3)
+
+    # Reduce the chart series and the alert lists so page size stays bounded as the history grows;
+    # LTTB keeps the largest alerts
+    chart_history, chart_timestamps = downsample(power_history, points, timestamps)
+    shown_alerts = downsample(alerts, points)[0]
+    shown_severity = downsample([a['value'] for a in alerts_with_severity], points, alerts_with_severity)[1]
+
+    return dict(power_history=chart_history,
+                alerts=shown_alerts,
+                alert_count=len(alerts),
+                report=report,
+                timestamps=chart_timestamps,
+                alerts_with_severity=shown_severity,
+                severity_alert_count=len(alerts_with_severity),
+                detailed_report=detailed_report,
+                patterns=patterns,
+                forecast=forecast)
+
+
 @app.route("/simulation", methods=["GET", "POST"])
 def simulation():
     """
@@ -80,7 +196,7 @@ def simulation():
         # Generate new sensor reading and log it
         sensor_data = sensor.read_value()
         data_provider.set_data(sensor_data)
-        append_log(sensor_data, building="Main Library")
+        append_log(sensor_data, building=DEFAULT_BUILDING)
 
         # Execute control action based on new reading
         control_action = control_context.execute_control(sensor_data)
@@ -91,57 +207,27 @@ def simulation():
         else:
             control_action = "No data available"
 
-    # Extract power history and timestamps for analysis
-    power_history = [d['PowerSensor'] for d in data_provider.data_history]
-    timestamps = [d['timestamp'] for d in data_provider.data_history]
-
-    # Basic analysis (original functionality)
-    alerts = analysis_engine.analyze(power_history)
-    report = analysis_engine.generate_trend_report(power_history)
-
-    # Advanced analysis (new functionality)
-    alerts_with_severity = []
-    detailed_report = {}
-    patterns = {}
-    forecast = []
-
-    # Only perform advanced analysis if we have sufficient data
-    if len(power_history) > 0:
-        # Generate severity-based alerts
-        alerts_with_severity = analysis_engine.analyze_with_severity(power_history)
-
-        # Generate detailed statistical report
-        detailed_report = analysis_engine.generate_detailed_report(power_history, timestamps)
-
-        # Pattern detection requires more data points
-        if len(power_history) >= 10:
-            patterns = analysis_engine.detect_patterns(power_history, window_size=5)
-
-        # Generate forecast for future periods
-        forecast = analysis_engine.forecast_consumption(power_history.copy(), periods_ahead=3)
+    # Analysis results only change when a new reading arrives, so they are
+    # memoized against the history version
+    points = request.args.get('points', type=int) or app.config['DASHBOARD_MAX_POINTS']
+    results = analysis_engine.memoize(data_provider.version, ("simulation", points),
+                                      lambda: _simulation_analysis(points))
 
     # Render template with all analysis data
     return render_template("simulation.html",
                            title="Simulation",
                            latest_reading=new_reading,
                            control_action=control_action,
-                           power_history=power_history,
-                           alerts=alerts,
-                           report=report,
-                           timestamps=timestamps,
                            control_mode=control_mode,
-                           # New advanced analytics data
-                           alerts_with_severity=alerts_with_severity,
-                           detailed_report=detailed_report,
-                           patterns=patterns,
-                           forecast=forecast,
+                           # Power history, timestamps and analytics data
+                           **results,
                            threshold=analysis_engine.threshold)  # Pass threshold value to template
 
 
 @app.route("/reset_simulation", methods=["POST"])
 def reset_simulation():
     """Reset the simulation by clearing all historical data"""
-    data_provider.data_history.clear()
+    data_provider.reset()
     return redirect(url_for("simulation"))
 
 
@@ -150,30 +236,33 @@ def logs():
     """
     Logs page route - displays historical power logs with filtering and pagination
     """
-    # Get all logs from storage
-    all_logs = read_logs()
-
     # Apply filters if provided in query parameters
     building_filter = request.args.get('building')
     date_filter = request.args.get('date')
     page = int(request.args.get('page', 1))
+    after = request.args.get('after')
     per_page = 10  # Items per page
 
-    # Filter by building if specified
-    if building_filter:
-        all_logs = [log for log in all_logs if log["building"] == building_filter]
-
-    # Filter by date if specified
-    if date_filter:
-        all_logs = [log for log in all_logs if log["timestamp"].startswith(date_filter)]
+    # The storage backend filters on row numbers (CSV sidecar index), typed columns or SQL
+    # indexes and reads only the rows of this page; queued readings are written out first
+    flush_logs()
+    log_backend = open_log_backend()
+    if log_backend.keyset_pagination:
+        # Keyset pagination: pages follow a cursor, so no page is slower than the first
+        logs_paginated, next_after = log_backend.page_after(building=building_filter, date=date_filter,
+                                                            after=after, limit=per_page)
+        total_pages, page_links = None, []
+    else:
+        logs_paginated, total = log_backend.query(building=building_filter, date=date_filter,
+                                                  offset=(page - 1) * per_page, limit=per_page)
+        next_after = None
 
-    # Calculate pagination values
-    total = len(all_logs)
-    total_pages = math.ceil(total / per_page)
-    logs_paginated = all_logs[(page - 1) * per_page: page * per_page]
+        # Calculate pagination values; only pages near the first, last and current one get a link
+        total_pages = math.ceil(total / per_page)
+        page_links = _page_links(page, total_pages)
 
-    # Get unique building options for the filter dropdown
-    building_options = sorted(set(log['building'] for log in read_logs()))
+    # Get unique building options for the filter dropdown, straight from the index
+    building_options = log_backend.buildings()
 
     # Render the logs template with data
     return render_template(
@@ -182,25 +271,48 @@ def logs():
         logs=logs_paginated,
         page=page,
         total_pages=total_pages,
+        page_links=page_links,
+        after=after,
+        next_after=next_after,
         building_filter=building_filter,
         date_filter=date_filter,
         building_options=building_options
     )
 
 
+def _page_links(page, total_pages, window=3):
+    """
+    Page numbers to link in the pagination bar: the first and last page and `window` pages
+    on either side of the current one, with None marking each gap.
+    """
+    shown = sorted({1, total_pages} | set(range(page - window, page + window + 1)))
+    links = []
+    for p in (p for p in shown if 1 <= p <= total_pages):
+        if links and p > links[-1] + 1:
+            links.append(None)
+        links.append(p)
+    return links
+
+
 @app.route("/export_csv")
 def export_csv():
-    """Export logs data as a CSV file for download"""
-    logs = read_logs()
-    df = pd.DataFrame(logs)
-    csv_data = df.to_csv(index=False)
-
-    # Return as a downloadable CSV file
-    return Response(
-        csv_data,
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=power_logs.csv"}
-    )
+    """Export logs data as a CSV file for download, streamed a chunk of rows at a time"""
+    # Optional filters: ?building=...&start=2025-04-01&end=2025-04-30 (date prefixes, both inclusive).
+    # Clients accepting gzip get a compressed stream unless ?gzip=0
+    compress = 'gzip' in request.accept_encodings and request.args.get('gzip') != '0'
+    try:
+        chunks = stream_log_csv(building=request.args.get('building') or None,
+                                start=request.args.get('start') or None,
+                                end=request.args.get('end') or None,
+                                compress=compress)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    headers = {"Content-Disposition": "attachment; filename=power_logs.csv", "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    # Return as a downloadable CSV file; memory use stays that of one chunk whatever the export size
+    return Response(chunks, mimetype="text/csv", headers=headers)
 
 
 @app.route("/api/analysis", methods=["GET"])
@@ -209,32 +321,122 @@ def api_analysis():
     API endpoint to provide analysis data in JSON format
     Used for asynchronous updating of analysis panels in the dashboard
     """
-    # Get power history and timestamps
+    # Alert lists are capped at DASHBOARD_MAX_POINTS entries, or ?points=N
+    points = request.args.get('points', type=int) or app.config['DASHBOARD_MAX_POINTS']
+    return jsonify(analysis_engine.memoize(data_provider.version, ("api", points),
+                                           lambda: _api_analysis(points)))
+
+
+def _api_analysis(points=None):
+    """
+    Build the /api/analysis payload for the current history.
+    Both alert lists are downsampled to at most `points` entries; alert_count gives the full count.
+    """
+    # Get power history
     power_history = [d['PowerSensor'] for d in data_provider.data_history]
-    timestamps = [d['timestamp'] for d in data_provider.data_history]
 
     # Return error if no data is available
     if not power_history:
-        return jsonify({"error": "No data available"})
+        return {"error": "No data available"}
 
     # Perform various analyses
-    alerts = analysis_engine.analyze(power_history)
-    alerts_with_severity = analysis_engine.analyze_with_severity(power_history)
-    detailed_report = analysis_engine.generate_detailed_report(power_history, timestamps)
+    alerts = analysis_engine.analyze_batch(power_history)
+    alerts_with_severity = analysis_engine.analyze_with_severity_batch(power_history)
+    detailed_report = report_stats.snapshot()
 
     # Only perform pattern detection and forecasting with sufficient data
     patterns = {}
     forecast = []
+    periodicity = {}
     if len(power_history) >= 10:
-        patterns = analysis_engine.detect_patterns(power_history)
-        forecast = analysis_engine.forecast_consumption(power_history.copy(), periods_ahead=3)
+        patterns = pattern_tracker.result()
+        forecast = forecaster.forecast(periods_ahead=3)
+        periodicity = analysis_engine.detect_periodicity(power_history)
 
-    # Return all analysis results as JSON
-    return jsonify({
+    # Return all analysis results
+    return {
         "basic_report": analysis_engine.generate_trend_report(power_history),
-        "alerts": alerts,
-        "alerts_with_severity": alerts_with_severity,
+        "alert_count": len(alerts),
+        "alerts": downsample(alerts, points)[0],
+        "alerts_with_severity": downsample([a['value'] for a in alerts_with_severity], points,
+                                           alerts_with_severity)[1],
         "detailed_report": detailed_report,
         "patterns": patterns,
+        "periodicity": periodicity,
         "forecast": forecast
-    })
\ No newline at end of file
+    }
+
+
+@app.route("/api/analysis/cache", methods=["GET"])
+def api_analysis_cache():
+    """API endpoint reporting hit/miss counters of the analysis result cache"""
+    return jsonify(analysis_engine.cache_info())
+
+
+@app.route("/api/control/cache", methods=["GET"])
+def api_control_cache():
+    """API endpoint reporting hit rate and size of the control-model prediction cache"""
+    return jsonify(prediction_cache.info())
+
+
+@app.route("/api/model/status", methods=["GET"])
+def api_model_status():
+    """API endpoint reporting whether the control model is loaded and how often it was reloaded"""
+    return jsonify(model_manager.status())
+
+
+@app.route("/api/logs/writer", methods=["GET"])
+def api_log_writer():
+    """API endpoint reporting queue length, batches, drops and fsyncs of the power log writer"""
+    return jsonify(log_writer.info())
+
+
+@app.route("/api/logs/partitions", methods=["GET"])
+def api_log_partitions():
+    """API endpoint reporting partition counts and compaction/retention runs of the partitioned log"""
+    if partition_maintenance is None:
+        return jsonify({"error": "The power log is not partitioned"}), 404
+    return jsonify(partition_maintenance.status())
+
+
+@app.route("/api/percentiles", methods=["GET"])
+def api_percentiles():
+    """
+    API endpoint returning median, p90, p99 and p99.9 power consumption.
+    Optional query parameters: building, start and end (YYYY-MM-DD, inclusive).
+    Without a building, every building is reported along with the campus-wide figures.
+    """
+    building = request.args.get('building')
+    start = request.args.get('start')
+    end = request.args.get('end')
+
+    if building:
+        return jsonify({building: building_quantiles.percentiles(building, start, end)})
+
+    result = {name: building_quantiles.percentiles(name, start, end)
+              for name in building_quantiles.buildings()}
+    result["all"] = building_quantiles.percentiles(None, start, end)
+    return jsonify(result)
+
+
+@app.route("/api/anomalies", methods=["GET"])
+def api_anomalies():
+    """
+    API endpoint returning the most recent adaptive anomalies, newest first.
+    Optional query parameters: building, sensor and limit.
+    """
+    return jsonify(anomaly_detector.recent(building=request.args.get('building'),
+                                           sensor=request.args.get('sensor'),
+                                           limit=request.args.get('limit', type=int)))
+
+
+@app.route("/api/buildings/analysis", methods=["GET"])
+def api_buildings_analysis():
+    """
+    API endpoint running the full analysis for every building in the power log.
+    Buildings are analysed on the shared pool of worker processes; optional ?workers=N limits how
+    many of them this request uses (clamped to 1..CPU count).
+    The log is read as typed columns (memory-mapped with the columnar backend), not rows of strings.
+    """
+    return jsonify(analyze_building_arrays(partition_columns(*read_log_columns()), threshold=analysis_engine.threshold,
+                                           max_workers=request.args.get('workers', type=int)))
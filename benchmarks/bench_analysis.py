@@ -0,0 +1,50 @@
+"""
+Benchmark: loop-based vs vectorized threshold, severity and pattern analysis.
+
+Run from the project root:
+    python benchmarks/bench_analysis.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.analysis import AnalysisEngine  # noqa: E402
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    engine = AnalysisEngine(threshold=450)
+    rng = np.random.default_rng(42)
+
+    print(f"{'points':>10} | {'method':<22} | {'loop (s)':>9} | {'list (s)':>9} | {'array (s)':>9} | {'speedup':>7}")
+    for size in (10 ** 5, 10 ** 6, 10 ** 7):
+        # Real histories sit mostly below the threshold, so alerts are ~5% of readings
+        array = np.clip(rng.normal(300, 90, size=size), 0, 800).round()
+        history = array.tolist()
+        for name, loop, batch in (
+                ("analyze", engine.analyze, engine.analyze_batch),
+                ("analyze_with_severity", engine.analyze_with_severity, engine.analyze_with_severity_batch)):
+            loop_time = _time(loop, history)
+            list_time = _time(batch, history)
+            array_time = _time(batch, array)
+            print(f"{size:>10} | {name:<22} | {loop_time:>9.3f} | {list_time:>9.3f} | {array_time:>9.3f} | "
+                  f"{loop_time / array_time:>6.1f}x")
+
+        loop_time = _time(engine.detect_patterns, history)
+        list_time = _time(engine.detect_patterns_batch, history)
+        array_time = _time(engine.detect_patterns_batch, array)
+        print(f"{size:>10} | {'detect_patterns':<22} | {loop_time:>9.3f} | {list_time:>9.3f} | {array_time:>9.3f} | "
+              f"{loop_time / array_time:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: per-reading vs batch control decisions with a trained random forest.
+
+A forest with the production settings is trained on synthetic readings, then one day
+of 15-minute readings for many buildings is replayed through AutoControlStrategy.
+
+Run from the project root:
+    python benchmarks/bench_control.py [buildings]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.control import AutoControlStrategy, FEATURE_COLUMNS  # noqa: E402
+
+
+def synthetic_readings(count, seed=0):
+    rng = np.random.default_rng(seed)
+    power = rng.uniform(0, 800, count).round(1)
+    start = np.datetime64("2025-05-05T00:00")
+    times = start + (np.arange(count) % 96) * np.timedelta64(15, "m")
+    return [{
+        "timestamp": str(t),
+        "PowerSensor": float(p),
+        "TemperatureSensor": round(float(15 + p / 30 + rng.uniform(-2, 2)), 1),
+        "HumiditySensor": round(float(70 - p / 30 + rng.uniform(-10, 10)), 1),
+        "LightSensor": float(rng.integers(0, 2500)),
+    } for t, p in zip(times, power)]
+
+
+def trained_strategy():
+    readings = synthetic_readings(20000, seed=1)
+    frame = pd.DataFrame(readings)
+    frame["hour"] = frame["timestamp"].str[11:13].astype(int)
+    labels = np.select([frame.PowerSensor < 150, frame.PowerSensor <= 500, frame.PowerSensor <= 700],
+                       ["low", "normal", "high"], "abnormal")
+    le = LabelEncoder()
+    model = RandomForestClassifier(n_estimators=100, max_depth=8, class_weight="balanced", random_state=42)
+    model.fit(frame[FEATURE_COLUMNS], le.fit_transform(labels))
+
+    strategy = AutoControlStrategy()
+    strategy.model, strategy.le = model, le
+    return strategy
+
+
+def main():
+    buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    strategy = trained_strategy()
+    day = synthetic_readings(96 * buildings)
+
+    start = time.perf_counter()
+    single = [strategy.control_action(reading) for reading in day]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = strategy.control_actions(day)
+    batch_time = time.perf_counter() - start
+
+    assert single == batch
+    print(f"{len(day)} readings ({buildings} buildings x 96)")
+    print(f"control_action loop : {single_time:8.3f} s ({single_time / len(day) * 1e3:.2f} ms/reading)")
+    print(f"control_actions     : {batch_time:8.3f} s ({single_time / batch_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: sklearn RandomForestClassifier vs the compiled NumPy forest.
+
+The forest from bench_control.py is compiled with CompiledForest and both models are
+timed on single rows (as on every /simulation POST) and on a batch of readings.
+The compiled predictions are checked to be bit-identical.
+
+Run from the project root:
+    python benchmarks/bench_forest.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.control import AutoControlStrategy  # noqa: E402
+from app.forest_compiler import CompiledForest  # noqa: E402
+from bench_control import synthetic_readings, trained_strategy  # noqa: E402
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    strategy = trained_strategy()
+    model = strategy.model
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(model)
+    compile_time = time.perf_counter() - start
+
+    readings = synthetic_readings(rows, seed=2)
+    features = strategy._prepare_batch_features(readings)
+    X = features.to_numpy()
+
+    sk_batch, sk_proba = timed(lambda: model.predict_proba(features), 3)
+    np_batch, np_proba = timed(lambda: compiled.predict_proba(X), 3)
+    assert np.array_equal(sk_proba, np_proba)
+    assert np.array_equal(model.predict(features), compiled.predict(X))
+
+    single = features.iloc[:1]
+    sk_single, sk_label = timed(lambda: model.predict(single), 200)
+    np_single, np_label = timed(lambda: compiled.predict_row(X[0]), 200)
+    assert sk_label[0] == np_label
+
+    compiled_strategy = AutoControlStrategy()
+    compiled_strategy.model, compiled_strategy.le = compiled, strategy.le
+    sample = readings[:500]
+    sk_action, sk_actions = timed(lambda: [strategy.control_action(r) for r in sample], 1)
+    np_action, np_actions = timed(lambda: [compiled_strategy.control_action(r) for r in sample], 1)
+    assert sk_actions == np_actions
+
+    print(f"forest: {model.n_estimators} trees, {len(compiled.feature)} nodes, compiled in {compile_time * 1e3:.1f} ms")
+    print(f"predict_proba {rows} rows : sklearn {sk_batch * 1e3:8.2f} ms | compiled {np_batch * 1e3:8.2f} ms "
+          f"({sk_batch / np_batch:.1f}x)")
+    print(f"predict single row       : sklearn {sk_single * 1e6:8.1f} us | compiled {np_single * 1e6:8.1f} us "
+          f"({sk_single / np_single:.1f}x)")
+    print(f"control_action per reading: sklearn {sk_action / len(sample) * 1e6:8.1f} us | "
+          f"compiled {np_action / len(sample) * 1e6:8.1f} us ({sk_action / np_action:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
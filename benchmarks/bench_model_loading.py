@@ -0,0 +1,107 @@
+"""
+Benchmark: model load time and per-worker memory for each model format.
+
+A forest is trained and saved both as joblib pickles and as the compiled .npy artifact.
+Several worker processes then load it at the same time, like gunicorn workers would, with
+    - sklearn:      joblib.load
+    - sklearn-mmap: joblib.load(mmap_mode='r')
+    - compiled:     np.load copies of the flattened arrays
+    - compiled-mmap np.load(mmap_mode='r'), pages shared by every worker
+and report load time plus the memory growth caused by loading and serving a few
+predictions (RSS, and PSS which splits shared pages between the processes mapping them).
+
+The control model's labels are near-deterministic, which keeps its trees small; 10% of
+the labels are flipped here so the unpruned trees grow to a size where sharing matters.
+
+Run from the project root:
+    python benchmarks/bench_model_loading.py [workers] [trees]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.control_model import save_model_files, save_compiled_model  # noqa: E402
+from app.model_manager import ModelManager, memory_usage  # noqa: E402
+from bench_control import synthetic_readings, trained_strategy  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+MODES = {
+    "sklearn": dict(compiled=False, mmap_mode=None),
+    "sklearn-mmap": dict(compiled=False, mmap_mode="r"),
+    "compiled": dict(compiled=True, mmap_mode=None),
+    "compiled-mmap": dict(compiled=True, mmap_mode="r"),
+}
+
+
+def worker(directory, mode, barrier, results):
+    options = MODES[mode]
+    manager = ModelManager(model_path=os.path.join(directory, "model.pkl"),
+                           encoder_path=os.path.join(directory, "encoder.pkl"), trainer=None,
+                           compiled_dir=os.path.join(directory, "compiled") if options["compiled"] else None,
+                           mmap_mode=options["mmap_mode"])
+    before = memory_usage()
+    manager.load()
+    # Touch the model as serving traffic would (single rows for the compiled forest)
+    model = manager._current[0]
+    for row in _features():
+        if options["compiled"]:
+            model.predict_row(row)
+        else:
+            model.predict(row.reshape(1, -1))
+    barrier.wait()
+    after = memory_usage()
+    results.put((mode, manager.load_seconds, after["rss"] - before["rss"], after["pss"] - before["pss"]))
+    barrier.wait()
+
+
+def _features(count=200, seed=3):
+    rows = synthetic_readings(count, seed=seed)
+    return np.array([[r["PowerSensor"], r["TemperatureSensor"], r["HumiditySensor"], r["LightSensor"],
+                      int(r["timestamp"][11:13])] for r in rows], dtype=np.float32)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    trees = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    strategy = trained_strategy()
+    # Refit on the same readings with 10% of the labels flipped and no depth limit
+    X = _features(20000, seed=1)
+    y = strategy.model.predict(X)
+    rng = np.random.default_rng(0)
+    flip = rng.random(len(y)) < 0.1
+    y[flip] = rng.integers(0, len(strategy.le.classes_), flip.sum())
+    strategy.model = RandomForestClassifier(n_estimators=trees, random_state=42).fit(X, y)
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_model_files(strategy.model, strategy.le, os.path.join(directory, "model.pkl"),
+                         os.path.join(directory, "encoder.pkl"))
+        save_compiled_model(strategy.model, strategy.le, os.path.join(directory, "compiled"))
+        size = os.path.getsize(os.path.join(directory, "model.pkl"))
+        nodes = sum(e.tree_.node_count for e in strategy.model.estimators_)
+        print(f"forest: {len(strategy.model.estimators_)} trees, {nodes} nodes, pickle {size / 2 ** 20:.1f} MiB, "
+              f"{workers} workers")
+
+        for mode in MODES:
+            barrier = context.Barrier(workers)
+            results = context.Queue()
+            processes = [context.Process(target=worker, args=(directory, mode, barrier, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            rows = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+            load = sum(r[1] for r in rows) / workers
+            rss = sum(r[2] for r in rows) / workers / 2 ** 20
+            pss = sum(r[3] for r in rows) / workers / 2 ** 20
+            print(f"{mode:14s}: load {load * 1e3:8.1f} ms | rss +{rss:6.1f} MiB | pss +{pss:6.1f} MiB per worker")
+
+
+if __name__ == "__main__":
+    main()
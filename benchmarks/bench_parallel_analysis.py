@@ -0,0 +1,40 @@
+"""
+Benchmark: per-building analysis with 1..N worker processes.
+
+Run from the project root:
+    python benchmarks/bench_parallel_analysis.py [buildings] [readings_per_building]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.parallel_analysis import analyze_building_arrays  # noqa: E402
+
+
+def main():
+    buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    readings = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+    rng = np.random.default_rng(42)
+    partitions = {
+        f"Building {i}": (np.clip(rng.normal(300, 90, readings), 0, 800).round(),
+                          (np.arange(readings) // 4 % 24).astype(np.int8))
+        for i in range(buildings)
+    }
+
+    cpus = os.cpu_count() or 1
+    print(f"{buildings} buildings x {readings} readings, {cpus} CPU(s)")
+    baseline = None
+    for workers in sorted({1, 2, 4, cpus}):
+        start = time.perf_counter()
+        analyze_building_arrays(partitions, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:>2} | {elapsed:>7.2f} s | speedup {baseline / elapsed:>4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,41 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or \
         "sqlite:///" + os.path.join(os.path.abspath(os.path.dirname(__file__)), "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Maximum number of history points sent to the dashboard chart (override with ?points=N)
+    DASHBOARD_MAX_POINTS = int(os.environ.get("DASHBOARD_MAX_POINTS") or 1000)
+    # LRU cache of control-model predictions: maximum entries, optional time-to-live in seconds,
+    # and optional per-feature quantization steps, e.g. {"PowerSensor": 5}
+    PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE") or 4096)
+    PREDICTION_CACHE_TTL = float(os.environ["PREDICTION_CACHE_TTL"]) if os.environ.get("PREDICTION_CACHE_TTL") else None
+    PREDICTION_CACHE_QUANTIZATION = {}
+    # Seconds between checks for a retrained control model (0 disables hot reloading)
+    MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL") or 30)
+    # "compiled" serves the flattened forest from .npy files instead of the sklearn pickle;
+    # with MODEL_MMAP they are memory-mapped read-only so all workers share one copy
+    MODEL_FORMAT = os.environ.get("MODEL_FORMAT") or "sklearn"
+    MODEL_MMAP = os.environ.get("MODEL_MMAP", "").lower() in ("1", "true", "yes")
+    # Buffered power log writer: seconds between background flushes, queued rows that trigger an
+    # early flush, rows held in memory before append_log blocks (LOG_BLOCK_TIMEOUT seconds, then
+    # drops the row), and fsync policy ("never", "batch" or "interval", every LOG_FSYNC_INTERVAL s)
+    LOG_FLUSH_INTERVAL = float(os.environ.get("LOG_FLUSH_INTERVAL") or 1.0)
+    LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE") or 500)
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE") or 10000)
+    LOG_BLOCK_TIMEOUT = float(os.environ["LOG_BLOCK_TIMEOUT"]) if os.environ.get("LOG_BLOCK_TIMEOUT") else None
+    LOG_FSYNC = os.environ.get("LOG_FSYNC") or "never"
+    LOG_FSYNC_INTERVAL = float(os.environ.get("LOG_FSYNC_INTERVAL") or 5.0)
+    # Power log storage: "csv" (app/static/power_log.csv), "columnar" (typed, memory-mapped
+    # column files in LOG_COLUMNAR_DIR; convert an existing log with python -m app.columnar_store)
+    # or "sql" (power_readings table of LOG_DATABASE_URL, WAL mode on SQLite) or "partitioned"
+    # (one CSV per building and LOG_PARTITION_GRANULARITY "day"/"hour" in LOG_PARTITION_DIR)
+    LOG_BACKEND = os.environ.get("LOG_BACKEND") or "csv"
+    LOG_COLUMNAR_DIR = os.environ.get("LOG_COLUMNAR_DIR") or "app/static/power_log"
+    LOG_DATABASE_URL = os.environ.get("LOG_DATABASE_URL") or SQLALCHEMY_DATABASE_URI
+    LOG_PARTITION_DIR = os.environ.get("LOG_PARTITION_DIR") or "app/static/power_log_partitions"
+    LOG_PARTITION_GRANULARITY = os.environ.get("LOG_PARTITION_GRANULARITY") or "day"
+    # Background maintenance of partitions: seconds between runs, age (days) after which closed
+    # partitions are compacted and gzipped, and optional retention in days, with dropped
+    # partitions moved to LOG_ARCHIVE_DIR instead of deleted when it is set
+    LOG_MAINTENANCE_INTERVAL = float(os.environ.get("LOG_MAINTENANCE_INTERVAL") or 3600)
+    LOG_COMPACT_AFTER_DAYS = float(os.environ.get("LOG_COMPACT_AFTER_DAYS") or 1)
+    LOG_RETENTION_DAYS = float(os.environ["LOG_RETENTION_DAYS"]) if os.environ.get("LOG_RETENTION_DAYS") else None
+    LOG_ARCHIVE_DIR = os.environ.get("LOG_ARCHIVE_DIR") or None
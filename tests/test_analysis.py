@@ -4,7 +4,11 @@ Analysis Engine Tests:
 - Threshold alerts for values exceeding 500
 - Severity classification (moderate/critical) based on thresholds
 """
-from app.analysis import AnalysisEngine  # Import the class responsible for analyzing data
+import numpy as np
+import pytest
+# Import the classes responsible for analyzing data
+from app.analysis import (AnalysisEngine, StreamingStatistics, PatternTracker,
+                          WeightedMovingAverageForecaster, ExponentialSmoothingForecaster)
 
 # Test that the analyzer correctly identifies values above the threshold
 def test_threshold_analysis():
@@ -23,3 +27,126 @@ def test_severity_classification():
     assert results[1]['severity'] == 'moderate'  # 600 -> 20% excess
     assert results[2]['severity'] == 'critical'  # 900 -> 80% excess
     assert results[3]['severity'] == 'critical'  # 1000 -> 100% excess
+
+# Test that the vectorized batch path returns exactly what the loop-based methods return
+def test_batch_analysis_matches_loop():
+    analyzer = AnalysisEngine(threshold=450)
+    data = [400, 450, 451, 540, 675, 810, 900, 449.5, 812.25, 0, 1200]
+    assert analyzer.analyze_batch(data) == analyzer.analyze(data)
+    assert analyzer.analyze_with_severity_batch(data) == analyzer.analyze_with_severity(data)
+    assert analyzer.analyze_batch(np.array(data)) == analyzer.analyze(data)
+    assert analyzer.analyze_batch([]) == []
+    assert analyzer.analyze_with_severity_batch([100, 200]) == []
+
+# Test that the streaming accumulator reports the same statistics as a full rescan
+def test_streaming_statistics_matches_detailed_report():
+    analyzer = AnalysisEngine(threshold=450)
+    stats = StreamingStatistics(threshold=450)
+    data = [400, 520, 310, 700, 455, 120, 700, 480, 390, 610, 205]
+    timestamps = [f"2025-05-05T{hour:02d}:00:00" for hour in range(len(data))]
+
+    assert stats.snapshot() == analyzer.generate_detailed_report([])
+    for i, (value, timestamp) in enumerate(zip(data, timestamps), start=1):
+        stats.update({'PowerSensor': value, 'timestamp': timestamp})
+        assert stats.snapshot() == analyzer.generate_detailed_report(data[:i], timestamps[:i])
+
+    stats.reset()
+    assert stats.count == 0
+
+# Test that batch and incremental pattern detection agree with detect_patterns
+def test_pattern_detection_paths_agree():
+    analyzer = AnalysisEngine(threshold=450)
+    data = [100, 400, 120, 380, 90, 500, 110, 420, 95, 600, 130, 610, 140, 650.5, 150.2, 700]
+    tracker = PatternTracker(window_size=5)
+
+    for i, value in enumerate(data, start=1):
+        tracker.push(value)
+        expected = analyzer.detect_patterns(data[:i], window_size=5)
+        assert tracker.result() == expected
+        assert analyzer.detect_patterns_batch(data[:i], window_size=5) == expected
+
+# Test that forecasting no longer modifies the caller's history and matches the stateful forecaster
+def test_forecast_does_not_modify_history():
+    analyzer = AnalysisEngine(threshold=450)
+    history = [300, 320, 310, 330, 350, 340]
+    forecaster = WeightedMovingAverageForecaster()
+    forecaster.extend(history)
+
+    forecast = analyzer.forecast_consumption(history, periods_ahead=4)
+    assert history == [300, 320, 310, 330, 350, 340]
+    assert forecast == forecaster.forecast(periods_ahead=4)
+    assert forecast[0] == 334.0  # 0.1*320 + 0.15*310 + 0.2*330 + 0.25*350 + 0.3*340
+
+def _baseline_forecast(power_history, periods_ahead):
+    # The original forecast_consumption() loop, which appended predictions to the history
+    history, weights, forecast = list(power_history), [0.1, 0.15, 0.2, 0.25, 0.3], []
+    for _ in range(periods_ahead):
+        prediction = sum(v * w for v, w in zip(history[-5:], weights))
+        forecast.append(round(prediction, 2))
+        history.append(prediction)
+    return forecast
+
+# Test that short-horizon forecasts round exactly like the original loop on random histories
+def test_forecast_matches_baseline_on_random_histories():
+    analyzer = AnalysisEngine(threshold=450)
+    rng = np.random.default_rng(7)
+    for _ in range(3000):
+        history = np.round(rng.uniform(0, 1000, rng.integers(5, 12)), 2).tolist()
+        periods = int(rng.integers(1, WeightedMovingAverageForecaster.STEPWISE_HORIZON + 1))
+        assert analyzer.forecast_consumption(history, periods) == _baseline_forecast(history, periods)
+
+# Test that the companion-matrix forecast matches the step-by-step recursion over a long horizon
+def test_weighted_forecast_long_horizon():
+    history = [300, 320, 310, 330, 350]
+    forecaster = WeightedMovingAverageForecaster()
+    forecaster.extend(history)
+
+    window, expected = list(history), []
+    for _ in range(5000):
+        prediction = sum(v * w for v, w in zip(window, forecaster.weights))
+        expected.append(prediction)
+        window = window[1:] + [prediction]
+
+    forecast = forecaster.forecast(periods_ahead=5000)
+    assert len(forecast) == 5000
+    assert np.allclose(forecast, expected, atol=0.01)
+    assert forecaster.forecast(periods_ahead=3) == _baseline_forecast(history, 3)
+    assert forecaster.forecast(periods_ahead=0) == []
+
+# Test that the Holt-Winters forecaster picks up a repeating daily cycle
+def test_seasonal_forecaster_follows_cycle():
+    forecaster = ExponentialSmoothingForecaster(alpha=0.3, beta=0.05, gamma=0.2, season_length=4)
+    cycle = [200, 400, 600, 400]
+    forecaster.extend(cycle * 10)
+
+    assert forecaster.forecast(periods_ahead=8) == pytest.approx(cycle * 2, abs=1)
+
+# Test that memoized results are reused within a history version and invalidated by a new one
+def test_memoize_by_history_version():
+    analyzer = AnalysisEngine(threshold=450, cache_size=2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert analyzer.memoize(1, "report", compute) == 1
+    assert analyzer.memoize(1, "report", compute) == 1
+    assert analyzer.memoize(2, "report", compute) == 2
+    analyzer.memoize(2, "a", compute)
+    analyzer.memoize(2, "b", compute)  # Evicts "report", the least recently used entry
+    assert analyzer.memoize(2, "report", compute) == 5
+    assert analyzer.cache_info() == {"hits": 1, "misses": 5, "size": 2, "max_size": 2}
+
+# Test that daily and weekly cycles are found in 15-minute readings
+def test_periodicity_detection():
+    analyzer = AnalysisEngine(threshold=450)
+    steps = np.arange(96 * 7 * 6)  # Six weeks of 15-minute readings
+    rng = np.random.default_rng(0)
+    data = (300 + 100 * np.sin(2 * np.pi * steps / 96) + 50 * np.sin(2 * np.pi * steps / (96 * 7))
+            + rng.normal(0, 20, len(steps)))
+
+    periods = analyzer.detect_periodicity(data)["dominant_periods"]
+    assert [p["period_hours"] for p in periods] == pytest.approx([24.0, 168.0], abs=0.5)
+    assert periods[0]["strength"] > periods[1]["strength"]
+    assert analyzer.detect_periodicity(rng.normal(300, 50, 500))["dominant_periods"] == []
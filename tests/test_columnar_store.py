@@ -0,0 +1,95 @@
+"""
+Columnar Log Backend Tests:
+- Rows written through the buffered writer come back as memory-mapped typed columns
+- Queries and typed columns agree with the CSV backend
+- One-shot CSV conversion and recovery from an interrupted append
+- Malformed and UTC-offset timestamps keep their wall-clock hour instead of failing the batch
+"""
+
+import os
+
+import numpy as np
+
+from app.columnar_store import ColumnarLogBackend, LOG_COLUMNS, convert_csv_log
+from app.data_store import CSVLogBackend, LogWriter, NAT_SECONDS
+from app.parallel_analysis import partition_columns
+
+BUILDINGS = ['Main Library', 'Science Hall', 'Gym']
+
+
+def _rows(count):
+    return [{'timestamp': f'2025-04-{1 + i // 30:02d}T{i % 24:02d}:15:00', 'building': BUILDINGS[i % 3],
+             'PowerSensor': round(100 + i * 1.5, 1), 'TemperatureSensor': 22.5, 'HumiditySensor': 60.1,
+             'LightSensor': 500 + i} for i in range(count)]
+
+
+def _as_floats(rows):
+    return [(r['timestamp'], r['building']) + tuple(float(r[k]) for k in list(r)[2:]) for r in rows]
+
+# Rows queued on the writer land in the column files and are read back as memmaps
+def test_writer_appends_columns(tmp_path):
+    writer = LogWriter(path=str(tmp_path / 'log'), backend='columnar', flush_interval=60)
+    for row in _rows(50):
+        writer.write(row)
+    writer.close()
+
+    backend = ColumnarLogBackend(str(tmp_path / 'log'))
+    columns, names = backend.columns()
+    assert len(backend) == 50
+    assert isinstance(columns['PowerSensor'], np.memmap)
+    assert {name: column.dtype.str for name, column in columns.items()} == LOG_COLUMNS
+    assert sorted(names) == sorted(BUILDINGS)
+    assert _as_floats(backend.read()) == _as_floats(_rows(50))
+
+# Filters, pagination and typed columns match the CSV backend on the same readings
+def test_matches_csv_backend(tmp_path):
+    csv_backend = CSVLogBackend(str(tmp_path / 'log.csv'))
+    csv_backend.append(_rows(120))
+    csv_backend.close()
+    assert convert_csv_log(str(tmp_path / 'log.csv'), str(tmp_path / 'log'), chunksize=25) == 120
+    columnar = ColumnarLogBackend(str(tmp_path / 'log'))
+
+    for building in (None, 'Gym', 'Nowhere'):
+        for date in (None, '2025-04-02', '2025-04', '2025-04-03T05'):
+            expected, total = csv_backend.query(building, date, offset=5, limit=10)
+            rows, columnar_total = columnar.query(building, date, offset=5, limit=10)
+            assert columnar_total == total
+            assert _as_floats(rows) == _as_floats(expected)
+    assert columnar.buildings() == csv_backend.buildings()
+
+    csv_columns, csv_names = csv_backend.columns()
+    columns, names = columnar.columns()
+    assert np.array_equal(np.array(csv_names)[csv_columns['building']], np.array(names)[columns['building']])
+    for name in LOG_COLUMNS:
+        if name != 'building':
+            assert np.array_equal(csv_columns[name], columns[name])
+
+# A half-written batch is ignored by readers and cut off by the next append
+def test_interrupted_append_is_repaired(tmp_path):
+    backend = ColumnarLogBackend(str(tmp_path / 'log'))
+    backend.append(_rows(10))
+    with open(os.path.join(backend.directory, 'timestamp.bin'), 'ab') as f:
+        f.write(np.zeros(3, dtype='<i8').tobytes())
+    assert len(backend) == 10
+
+    backend.append(_rows(2))
+    assert len(backend) == 12
+    assert os.path.getsize(os.path.join(backend.directory, 'timestamp.bin')) == 12 * 8
+    assert backend.read()[10]['timestamp'] == '2025-04-01T00:15:00'
+
+# A bad timestamp no longer fails the batch or the read; offsets keep their local hour
+def test_malformed_and_offset_timestamps(tmp_path):
+    rows = _rows(3)
+    rows[1]['timestamp'] = 'not a time'
+    rows[2]['timestamp'] = '2025-04-01T02:15:00+05:30'
+    csv_backend = CSVLogBackend(str(tmp_path / 'log.csv'))
+    csv_backend.append(rows)
+    csv_backend.close()
+    columnar = ColumnarLogBackend(str(tmp_path / 'log'))
+    columnar.append(rows)
+
+    for backend in (csv_backend, columnar):
+        columns, names = backend.columns()
+        assert columns['timestamp'][1] == NAT_SECONDS
+        hours = {name: list(hour) for name, (_, hour) in partition_columns(columns, names).items()}
+        assert hours == {'Main Library': [0], 'Science Hall': [-1], 'Gym': [2]}
@@ -3,11 +3,14 @@ Control Strategy Tests:
 - Auto control fallback without ML model
 - Manual mode handling (ECO mode verification)
 - Mocked ML model predictions integration test
+- Batch control paths for every strategy
+- Prediction cache hits, quantization, eviction, TTL and model invalidation
 """
 
-from app.control import AutoControlStrategy, ManualControlStrategy
+from app.control import AutoControlStrategy, ManualControlStrategy, SimpleControlSystem, SimpleControlAdapter, \
+    PowerControlContext, PredictionCache
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 # Test fallback behavior when the AutoControlStrategy has no ML model loaded
 def test_auto_control_fallback():
@@ -55,3 +58,82 @@ def test_auto_control_with_model(mock_load):
 
     result = strategy.control_action(test_data)
     assert "low" in result.lower()  # Expect result to contain the decoded prediction label
+
+def _readings():
+    return [{
+        'PowerSensor': power,
+        'timestamp': f'2023-01-01T{hour:02d}:00:00',
+        'TemperatureSensor': 25,
+        'HumiditySensor': 50,
+        'LightSensor': 300
+    } for hour, power in enumerate([100, 150, 499, 500, 699, 700, 820])]
+
+# Test that every strategy's batch path returns the same actions as one call per reading
+def test_batch_control_matches_single_calls():
+    auto = AutoControlStrategy()
+    auto.model = None
+    strategies = [auto, ManualControlStrategy(mode="full-power"), SimpleControlAdapter(SimpleControlSystem())]
+    readings = _readings()
+
+    for strategy in strategies:
+        context = PowerControlContext(strategy)
+        assert context.execute_control_batch(readings) == [strategy.control_action(r) for r in readings]
+        assert context.execute_control_batch([]) == []
+
+# Test that the auto strategy makes a single model call for a whole batch
+def test_auto_control_batch_single_predict():
+    strategy = AutoControlStrategy()
+    strategy.model = MagicMock()
+    strategy.model.predict.return_value = [0] * 7
+    strategy.le = MagicMock()
+    strategy.le.inverse_transform.return_value = ['high'] * 7
+
+    actions = strategy.control_actions(_readings())
+    assert actions == [strategy.control_rules['high']] * 7
+    strategy.model.predict.assert_called_once()
+    features = strategy.model.predict.call_args[0][0]
+    assert list(features.columns) == ['PowerSensor', 'TemperatureSensor', 'HumiditySensor', 'LightSensor', 'hour']
+    assert list(features['hour']) == list(range(7))
+
+def _mock_model(level):
+    model = MagicMock()
+    model.predict.side_effect = lambda features: [0] * len(features)
+    le = MagicMock()
+    le.inverse_transform.side_effect = lambda predictions: [level] * len(predictions)
+    return model, le
+
+# Test that repeated readings are answered from the cache and a new model invalidates it
+def test_auto_control_prediction_cache():
+    strategy = AutoControlStrategy()
+    strategy.model, strategy.le = _mock_model('high')
+    reading = _readings()[0]
+
+    for _ in range(5):
+        assert strategy.control_action(reading) == strategy.control_rules['high']
+    assert strategy.model.predict.call_count == 1
+    assert strategy.cache.info()['hits'] == 4
+
+    # A batch only predicts the readings it has not seen, once per distinct feature tuple
+    strategy.control_actions(_readings() + _readings())
+    assert strategy.model.predict.call_count == 2
+    assert len(strategy.model.predict.call_args[0][0]) == 6
+
+    strategy.model, strategy.le = _mock_model('low')
+    assert strategy.control_action(reading) == strategy.control_rules['low']
+
+# Test quantized keys, LRU eviction and expiry of cache entries
+def test_prediction_cache_quantization_eviction_ttl():
+    model = object()
+    cache = PredictionCache(max_size=2, quantization={'PowerSensor': 5})
+    assert cache.key([101, 25.3, 50, 300, 12]) == cache.key([99, 25.3, 50, 300, 12])
+
+    cache.put(model, 'a', 'low')
+    cache.put(model, 'b', 'normal')
+    assert cache.get(model, 'a') == 'low'
+    cache.put(model, 'c', 'high')
+    assert cache.get(model, 'b') is None
+    assert cache.info()['evictions'] == 1
+
+    expired = PredictionCache(ttl=0)
+    expired.put(model, 'a', 'low')
+    assert expired.get(model, 'a') is None
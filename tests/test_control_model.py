@@ -0,0 +1,65 @@
+"""
+Training Pipeline Tests:
+- Vectorized labelling of raw power logs
+- Chunked, typed loading of the power log
+- Warm-start retraining adds trees for new readings only
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.control_model import label_power_levels, load_training_data, train_power_model
+
+
+def _write_log(path, start, count, seed=0, mode='w'):
+    rng = np.random.default_rng(seed)
+    power = rng.uniform(0, 800, count).round(1)
+    pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=count, freq='15min').strftime('%Y-%m-%dT%H:%M:%S'),
+        'building': 'Main Library',
+        'PowerSensor': power,
+        'TemperatureSensor': (15 + power / 30).round(1),
+        'HumiditySensor': (70 - power / 30).round(1),
+        'LightSensor': rng.integers(0, 2500, count),
+    }).to_csv(path, index=False, header=mode == 'w', mode=mode)
+
+# Labels follow the dataset generator's rules, including the anomaly overrides
+def test_label_power_levels():
+    power = np.array([100, 300, 600, 750, 100, 620])
+    temp = np.array([20, 20, 20, 20, 38, 20])
+    humidity = np.array([50, 50, 50, 50, 50, 10])
+    light = np.array([800, 800, 800, 800, 800, 800])
+    hour = np.array([12, 12, 12, 12, 12, 12])
+    assert list(label_power_levels(power, temp, humidity, light, hour)) == \
+        ['low', 'normal', 'high', 'abnormal', 'abnormal', 'abnormal']
+    assert label_power_levels(np.array([300]), np.array([20]), np.array([50]),
+                              np.array([800]), np.array([23]))[0] == 'abnormal'
+
+# The log is read in chunks with float32 features, and `since` keeps only newer readings
+def test_load_training_data_chunked(tmp_path):
+    path = str(tmp_path / "power_log.csv")
+    _write_log(path, '2025-01-01', 250)
+
+    features, labels, last = load_training_data(path, chunksize=60)
+    assert len(features) == len(labels) == 250
+    assert all(features.dtypes == np.float32)
+    assert list(features['hour'][:5]) == [0, 0, 0, 0, 1]
+    assert last == '2025-01-03T14:15:00'
+
+    newer, _, _ = load_training_data(path, chunksize=60, since='2025-01-03T12:00:00')
+    assert len(newer) == 9
+
+# Incremental training keeps the fitted trees and only fits new ones on the new readings
+def test_incremental_training(tmp_path):
+    path = str(tmp_path / "power_log.csv")
+    model_path, encoder_path = str(tmp_path / "model.pkl"), str(tmp_path / "encoder.pkl")
+    _write_log(path, '2025-01-01', 2000)
+    model, le = train_power_model(path, model_path, encoder_path, compiled_dir=None, n_jobs=1)
+    first_trees = [tree.tree_.threshold.tolist() for tree in model.estimators_]
+
+    _write_log(path, '2025-03-01', 2000, seed=1, mode='a')
+    model, le = train_power_model(path, model_path, encoder_path, compiled_dir=None,
+                                  incremental=True, new_trees=5, n_jobs=1)
+    assert len(model.estimators_) == len(first_trees) + 5
+    assert [tree.tree_.threshold.tolist() for tree in model.estimators_[:len(first_trees)]] == first_trees
+    assert model.trained_until_.startswith('2025-03-21')
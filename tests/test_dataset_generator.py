@@ -0,0 +1,64 @@
+"""
+Dataset Generator Tests:
+- Importing the generator writes nothing
+- Vectorized labelling matches the row-by-row rules
+- Output does not depend on the number of workers or chunk size boundaries
+- Columnar datasets hold the same readings as the csv
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from app.data.dataset.dataset_generator import determine_level, determine_levels, generate_columns, \
+    generate_data, read_columnar, write_dataset, DATASET_COLUMNS
+
+# Importing the module in a fresh interpreter must not write anything to its working directory
+def test_import_has_no_side_effects(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    subprocess.run([sys.executable, '-c', 'import app.data.dataset.dataset_generator'],
+                   cwd=tmp_path, env=env, check=True, capture_output=True)
+    assert os.listdir(tmp_path) == []
+
+# Every generated row gets the same level as the original determine_level()
+def test_vectorized_levels_match_rules():
+    for row in generate_data(2000, seed=1):
+        assert row['power_consumption_level'] == determine_level(row)
+
+    columns = generate_columns(3, seed=1)
+    hour = np.array([8, 8, 8])
+    assert list(determine_levels(columns['PowerSensor'], columns['TemperatureSensor'],
+                                 columns['HumiditySensor'], columns['LightSensor'], hour)) \
+        == list(columns['power_consumption_level'])
+
+# Two worker processes and small chunks write exactly the same file as one process
+def test_csv_independent_of_workers(tmp_path):
+    buildings = ['Main Library', 'Building 1']
+    write_dataset(tmp_path / 'one.csv', 250, buildings, seed=3, workers=1, chunk_rows=100)
+    write_dataset(tmp_path / 'two.csv', 250, buildings, seed=3, workers=2, chunk_rows=100)
+    assert (tmp_path / 'one.csv').read_bytes() == (tmp_path / 'two.csv').read_bytes()
+
+    frame = pd.read_csv(tmp_path / 'one.csv')
+    assert list(frame.columns) == DATASET_COLUMNS
+    assert len(frame) == 500
+    assert list(frame['building'].unique()) == buildings
+
+# The columnar directory round-trips to the same values as the csv
+def test_columnar_matches_csv(tmp_path):
+    buildings = ['Main Library', 'Building 1']
+    write_dataset(tmp_path / 'data.csv', 120, buildings, seed=5, workers=1, chunk_rows=50)
+    write_dataset(tmp_path / 'data', 120, buildings, fmt='columnar', seed=5, workers=1, chunk_rows=50)
+
+    frame = pd.read_csv(tmp_path / 'data.csv')
+    columns, categories = read_columnar(tmp_path / 'data')
+    assert list(np.array(categories['building'])[columns['building']]) == list(frame['building'])
+    assert list(np.array(categories['power_consumption_level'])[columns['power_consumption_level']]) \
+        == list(frame['power_consumption_level'])
+    assert np.allclose(columns['PowerSensor'], frame['PowerSensor'])
+    assert np.array_equal(columns['LightSensor'], frame['LightSensor'])
+    timestamps = pd.to_datetime(columns['timestamp'], unit='s')
+    assert list(timestamps.strftime('%Y-%m-%dT%H:%M:%S')) == list(frame['timestamp'])
@@ -0,0 +1,39 @@
+"""
+Downsampling Tests:
+- Short series are returned unchanged
+- Output size, endpoints and spike preservation for LTTB
+- Parallel series (timestamps) are reduced consistently
+- Budgets below three points still reduce the series
+"""
+from app.downsampling import lttb_indices, downsample
+
+# Test that a series shorter than the point budget is not modified
+def test_short_series_unchanged():
+    assert downsample([1, 2, 3], 10) == [[1, 2, 3]]
+    assert downsample([1, 2, 3], None, ['a', 'b', 'c']) == [[1, 2, 3], ['a', 'b', 'c']]
+
+# Test that LTTB keeps the endpoints and an isolated spike within the point budget
+def test_lttb_keeps_spikes():
+    values = [300] * 10000
+    values[4321] = 800
+    indices = lttb_indices(values, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(values) - 1
+    assert list(indices) == sorted(indices)
+    assert 4321 in indices
+
+# Test that timestamps are reduced with the same indices as the values
+def test_downsample_parallel_series():
+    values = list(range(1000))
+    timestamps = [f"t{i}" for i in values]
+    reduced, reduced_timestamps = downsample(values, 50, timestamps)
+
+    assert len(reduced) == 50
+    assert reduced_timestamps == [f"t{v}" for v in reduced]
+
+# Test that one or two points keep the first (and last) reading instead of the whole series
+def test_tiny_budgets():
+    assert downsample(range(1000), 1) == [[0]]
+    assert downsample(range(1000), 2, [f"t{i}" for i in range(1000)]) == [[0, 999], ['t0', 't999']]
+    assert len(downsample(range(1000), -5)[0]) == 1000
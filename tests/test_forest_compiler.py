@@ -0,0 +1,81 @@
+"""
+Compiled Forest Tests:
+- Batch probabilities and predictions bit-identical to sklearn
+- Single-row predictions match sklearn
+- Missing values follow sklearn's learned direction
+- Saved arrays load memory-mapped and still predict identically
+- AutoControlStrategy gives the same actions with the compiled model
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from app.control import AutoControlStrategy, FEATURE_COLUMNS
+from app.forest_compiler import CompiledForest
+
+
+def _forest(rows=600, seed=0, **params):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.uniform(0, 800, (rows, 5)), columns=FEATURE_COLUMNS)
+    X['hour'] = rng.integers(0, 24, rows)
+    labels = np.select([X.PowerSensor < 150, X.PowerSensor <= 500, X.PowerSensor <= 700],
+                       ["low", "normal", "high"], "abnormal")
+    le = LabelEncoder()
+    model = RandomForestClassifier(n_estimators=15, random_state=seed, **params)
+    model.fit(X, le.fit_transform(labels))
+    return model, le, X
+
+# Compiled probabilities and labels must equal sklearn's to the last bit
+@pytest.mark.parametrize("params", [{}, {"max_depth": 4, "class_weight": "balanced"}])
+def test_compiled_forest_bit_identical(params):
+    model, _, X = _forest(**params)
+    compiled = CompiledForest.from_sklearn(model)
+    X_test = np.random.default_rng(1).uniform(-50, 850, (3000, 5))
+
+    assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(X_test.astype(np.float32)))
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test.astype(np.float32)))
+    assert np.array_equal(compiled.predict_proba(X), model.predict_proba(X))
+
+# The single-row loop agrees with sklearn row by row
+def test_compiled_forest_single_rows():
+    model, _, X = _forest()
+    compiled = CompiledForest.from_sklearn(model)
+    for row in X.to_numpy()[:100]:
+        assert compiled.predict_row(row) == model.predict(row.reshape(1, -1).astype(np.float32))[0]
+        assert compiled.predict(row)[0] == compiled.predict_row(row)
+
+# Rows with NaN go the same way sklearn sends them
+def test_compiled_forest_missing_values():
+    model, _, X = _forest()
+    X_nan = X.to_numpy().copy()
+    X_nan[::3, 1] = np.nan
+    compiled = CompiledForest.from_sklearn(model)
+    assert np.array_equal(compiled.predict_proba(X_nan), model.predict_proba(X_nan))
+
+# A saved forest can be memory-mapped back without changing any prediction
+def test_compiled_forest_save_load_mmap(tmp_path):
+    model, _, X = _forest()
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.save(str(tmp_path))
+    loaded = CompiledForest.load(str(tmp_path), mmap_mode='r')
+
+    assert isinstance(loaded.leaf_proba, np.memmap)
+    assert np.array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    assert [loaded.predict_row(row) for row in X.to_numpy()[:20]] == list(model.predict(X.iloc[:20]))
+
+# Compiling the model inside the strategy leaves every control action unchanged
+def test_auto_control_with_compiled_model():
+    model, le, _ = _forest()
+    strategy = AutoControlStrategy()
+    strategy.model, strategy.le = model, le
+    readings = [{'timestamp': f'2025-05-05T{h:02d}:30:00', 'PowerSensor': 40.0 * h,
+                 'TemperatureSensor': 20.0, 'HumiditySensor': 50.0, 'LightSensor': 300.0} for h in range(24)]
+    expected = [strategy.control_action(r) for r in readings]
+
+    strategy.compile_model()
+    assert isinstance(strategy.model, CompiledForest)
+    assert [strategy.control_action(r) for r in readings] == expected
+    assert strategy.control_actions(readings) == expected
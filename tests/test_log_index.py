@@ -0,0 +1,112 @@
+"""
+Log Index Tests:
+- Filtered, paginated queries match a full scan of the log
+- Appended rows (and partial trailing lines) are picked up incrementally
+- The sidecar index is reused by a new instance, and discarded for a replaced log
+- Sidecar saves are throttled; deferred rows are saved later
+- Unfiltered and month-wide pages never build a list of every matching row
+"""
+
+import csv
+import os
+import tracemalloc
+
+from app.data_store import LOG_FIELDS
+from app.log_index import LogIndex
+
+BUILDINGS = ['Main Library', 'Science Hall', 'Gym']
+
+
+def _write_rows(path, start, count, mode='a'):
+    with open(path, mode, newline='') as f:
+        writer = csv.writer(f)
+        if mode == 'w':
+            writer.writerow(LOG_FIELDS)
+        for i in range(start, start + count):
+            writer.writerow([f'2025-04-{1 + i // 40:02d}T{i % 24:02d}:00:00', BUILDINGS[i % 3], i, 22, 60, 500])
+
+
+def _scan(path, building=None, date=None):
+    with open(path, newline='') as f:
+        return [row for row in csv.DictReader(f)
+                if (not building or row['building'] == building) and (not date or row['timestamp'].startswith(date))]
+
+# Every filter combination returns the same page and total as scanning the whole file
+def test_query_matches_full_scan(tmp_path):
+    path = tmp_path / 'log.csv'
+    _write_rows(path, 0, 200, mode='w')
+    index = LogIndex(str(path))
+
+    for building in (None, 'Science Hall', 'Nowhere'):
+        for date in (None, '2025-04-02', '2025-04', '2025-04-03T05'):
+            expected = _scan(path, building, date)
+            for offset in (0, 10, 35):
+                rows, total = index.query(building, date, offset=offset, limit=10)
+                assert total == len(expected)
+                assert rows == expected[offset:offset + 10]
+    assert index.buildings() == sorted(BUILDINGS)
+
+# New rows are indexed from the old end of file; a partial last line waits until it is complete
+def test_incremental_catch_up(tmp_path):
+    path = tmp_path / 'log.csv'
+    _write_rows(path, 0, 50, mode='w')
+    index = LogIndex(str(path))
+    assert index.refresh() == 50
+
+    _write_rows(path, 50, 5)
+    with open(path, 'a') as f:
+        f.write('2025-04-09T01:00:00,Annex,1')
+    assert index.refresh() == 5
+    with open(path, 'a') as f:
+        f.write(',22,60,500\n')
+    assert index.refresh() == 1
+    assert index.query(building='Annex')[1] == 1
+    assert len(index) == 56
+
+# A second instance adopts the saved sidecar, and a rewritten log is indexed again
+def test_sidecar_reuse_and_rebuild(tmp_path):
+    path = tmp_path / 'log.csv'
+    _write_rows(path, 0, 80, mode='w')
+    LogIndex(str(path)).refresh()
+    assert (tmp_path / 'log.csv.idx.npz').exists()
+
+    reloaded = LogIndex(str(path))
+    assert reloaded.refresh() == 0
+    assert reloaded.query('Gym', '2025-04-02') == (_scan(path, 'Gym', '2025-04-02'), len(_scan(path, 'Gym', '2025-04-02')))
+
+    _write_rows(path, 0, 10, mode='w')
+    assert reloaded.refresh() == 10
+    assert reloaded.query()[1] == 10
+
+# Only the first refresh saves the sidecar within the save interval; save_pending() writes the rest
+def test_sidecar_saves_are_throttled(tmp_path):
+    path = tmp_path / 'log.csv'
+    _write_rows(path, 0, 50, mode='w')
+    index = LogIndex(str(path), save_interval=3600)
+    index.refresh()
+    saved = os.stat(tmp_path / 'log.csv.idx.npz').st_mtime_ns
+
+    _write_rows(path, 50, 20)
+    assert index.refresh() == 20
+    assert os.stat(tmp_path / 'log.csv.idx.npz').st_mtime_ns == saved
+    assert LogIndex(str(path), persist=False).refresh() == 20
+
+    index.save_pending()
+    assert LogIndex(str(path)).refresh() == 0
+
+# Pages are cut from runs and posting lists: memory per query does not grow with the log
+def test_pages_do_not_materialize_matches(tmp_path):
+    path = tmp_path / 'log.csv'
+    _write_rows(path, 0, 200000, mode='w')
+    index = LogIndex(str(path), persist=False)
+    index.refresh()
+
+    tracemalloc.start()
+    rows, total = index.query(offset=150000, limit=10)
+    month, month_total = index.query(date='2025-04', offset=5, limit=10)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert total == 200000 and rows[0]['PowerSensor'] == '150000'
+    assert month_total == 200000 and month[0]['PowerSensor'] == '5'
+    # A list of 200000 row numbers alone would take several MB
+    assert peak < 200000
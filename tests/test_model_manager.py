@@ -0,0 +1,118 @@
+"""
+Model Manager Tests:
+- Strategies serve the fallback rules until the background load finishes
+- Missing model files are trained in the background, then swapped in
+- Retrained model files are hot-reloaded without recreating the strategy
+- The compiled format is built from the pickles and memory-mapped
+- Compiled versions are switched atomically and built once per retrain
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from app.control import AutoControlStrategy, FEATURE_COLUMNS
+from app.control_model import save_model_files, compile_if_stale, read_compiled_pointer, load_compiled_model, \
+    model_files_signature
+from app.forest_compiler import CompiledForest
+from app.model_manager import ModelManager
+
+READING = {'timestamp': '2025-05-05T12:00:00', 'PowerSensor': 300.0,
+           'TemperatureSensor': 25.0, 'HumiditySensor': 50.0, 'LightSensor': 800.0}
+
+
+def _train(level, model_path, encoder_path):
+    # A forest that predicts the same level for every reading
+    X = pd.DataFrame(np.random.default_rng(0).uniform(0, 800, (20, 5)), columns=FEATURE_COLUMNS)
+    le = LabelEncoder().fit([level])
+    model = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, le.transform([level] * 20))
+    save_model_files(model, le, model_path, encoder_path)
+    return model, le
+
+
+def _paths(tmp_path):
+    return str(tmp_path / "model.pkl"), str(tmp_path / "encoder.pkl")
+
+# Missing files are trained in the background thread while the fallback keeps answering
+def test_background_training_then_swap(tmp_path):
+    model_path, encoder_path = _paths(tmp_path)
+    strategy = AutoControlStrategy(load_model=False)
+    assert strategy.control_action(READING) == strategy.control_rules['normal']
+
+    manager = ModelManager([strategy], model_path, encoder_path, poll_interval=0,
+                           trainer=lambda: _train('abnormal', model_path, encoder_path))
+    manager.start()
+    assert manager.wait_ready(timeout=30)
+    manager.stop()
+
+    assert strategy.control_action(READING) == strategy.control_rules['abnormal']
+    assert manager.status()['ready'] and manager.status()['reloads'] == 0
+
+# Changed model files are swapped into running strategies, compiled ones included
+def test_hot_reload(tmp_path):
+    model_path, encoder_path = _paths(tmp_path)
+    _train('low', model_path, encoder_path)
+    strategy = AutoControlStrategy(load_model=False)
+    compiled = AutoControlStrategy(compiled=True, load_model=False)
+    manager = ModelManager([strategy], model_path, encoder_path, trainer=None)
+    assert manager.load()
+    manager.register(compiled)
+    assert compiled.control_action(READING) == compiled.control_rules['low']
+    assert not manager.check_for_update()
+
+    _train('high', model_path, encoder_path)
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert manager.check_for_update()
+    assert strategy.control_action(READING) == strategy.control_rules['high']
+    assert compiled.control_action(READING) == compiled.control_rules['high']
+    assert manager.reloads == 1
+
+# Compiled loading builds the .npy artifact from the pickles, maps it, and rebuilds it after a retrain
+def test_compiled_mmap_loading(tmp_path):
+    model_path, encoder_path = _paths(tmp_path)
+    _train('normal', model_path, encoder_path)
+    strategy = AutoControlStrategy(load_model=False)
+    manager = ModelManager([strategy], model_path, encoder_path, trainer=None,
+                           compiled_dir=str(tmp_path / "compiled"), mmap_mode='r')
+    assert manager.load()
+
+    assert isinstance(strategy.model, CompiledForest)
+    assert isinstance(strategy.model.threshold, np.memmap)
+    assert strategy.control_action(READING) == strategy.control_rules['normal']
+    status = manager.status()
+    assert status['format'] == 'compiled' and status['load_seconds'] is not None
+
+    _train('low', model_path, encoder_path)
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert manager.check_for_update()
+    assert strategy.control_action(READING) == strategy.control_rules['low']
+
+# Each compile writes a new version directory; workers find it up to date and do not rebuild it
+def test_compiled_versions(tmp_path):
+    model_path, encoder_path = _paths(tmp_path)
+    directory = str(tmp_path / "compiled")
+    _train('normal', model_path, encoder_path)
+    assert compile_if_stale(model_path, encoder_path, directory)
+    first = read_compiled_pointer(directory)
+    assert first['source'] == model_files_signature(model_path, encoder_path)
+    assert not compile_if_stale(model_path, encoder_path, directory)
+    old_forest, _ = load_compiled_model(directory)
+
+    versions = [first['version']]
+    for level in ('low', 'high'):
+        _train(level, model_path, encoder_path)
+        stat = os.stat(model_path)
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9 * len(versions)))
+        assert compile_if_stale(model_path, encoder_path, directory)
+        versions.append(read_compiled_pointer(directory)['version'])
+
+    # The current and one superseded version remain; a forest mapped earlier is left intact
+    assert sorted(name for name in os.listdir(directory) if name.startswith('v')) == versions[1:]
+    forest, le = load_compiled_model(directory)
+    assert list(le.classes_) == ['high'] and forest.n_estimators == 3
+    assert old_forest.predict_proba(np.zeros((1, 5))).shape == (1, 1)
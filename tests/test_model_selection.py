@@ -0,0 +1,47 @@
+"""
+Model Selection Tests:
+- Sweep measures every configuration of the grid
+- Smallest model within the accuracy/latency budget is selected
+- Comparison report is written as Markdown and CSV
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.control_model import FEATURE_COLUMNS, label_power_levels
+from app.model_selection import sweep, select_model, write_report
+
+
+def _data(rows=400):
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame(rng.uniform(0, 800, (rows, 5)), columns=FEATURE_COLUMNS)
+    features['hour'] = rng.integers(0, 24, rows)
+    return features, label_power_levels(*(features[c].to_numpy() for c in FEATURE_COLUMNS))
+
+# Every (trees, depth) pair is fitted and measured, smallest serialized model first
+def test_sweep_and_report(tmp_path):
+    results = sweep(*_data(), trees=(2, 4), depths=(2, None), max_workers=1)
+    assert {(r['params']['n_estimators'], r['params']['max_depth']) for r in results} == \
+        {(2, 2), (2, None), (4, 2), (4, None)}
+    assert [r['size_bytes'] for r in results] == sorted(r['size_bytes'] for r in results)
+    for r in results:
+        assert 0 <= r['accuracy'] <= 1
+        assert r['single_ms']['p50'] <= r['single_ms']['p99']
+
+    path = write_report(results, results[0], report_dir=str(tmp_path), budget="accuracy >= 0")
+    assert "Selected: n_estimators" in open(path).read()
+    assert os.path.exists(path[:-3] + ".csv")
+
+# The smallest configuration meeting both budgets wins; none qualifies when they are too strict
+def test_select_model_budget():
+    def result(size, accuracy, p99):
+        return {'size_bytes': size, 'accuracy': accuracy, 'params': {},
+                'single_ms': {'p50': p99 / 2, 'p99': p99}, 'single_compiled_ms': {'p50': 0.01, 'p99': 0.02}}
+    results = [result(100, 0.90, 1.0), result(200, 0.97, 3.0), result(300, 0.99, 1.5), result(400, 0.99, 1.0)]
+
+    assert select_model(results, min_accuracy=0.95)['size_bytes'] == 200
+    assert select_model(results, min_accuracy=0.95, max_p99_ms=2.0)['size_bytes'] == 300
+    assert select_model(results, min_accuracy=0.95, max_p99_ms=0.05, compiled=True)['size_bytes'] == 200
+    assert select_model(results, min_accuracy=0.995) is None
@@ -0,0 +1,64 @@
+"""
+Monitoring Tests:
+- Observers are notified and reset through the DataProvider
+- EWMA anomaly detection per building and sensor
+- Reading recent anomalies while they are being appended
+"""
+from app.monitoring import DataProvider, AnomalyDetector
+
+def _reading(power, temperature=25, building=None):
+    data = {
+        'timestamp': '2025-05-05T12:00:00',
+        'PowerSensor': power,
+        'TemperatureSensor': temperature,
+        'HumiditySensor': 50,
+        'LightSensor': 300
+    }
+    if building:
+        data['building'] = building
+    return data
+
+# Test that a sudden jump is flagged only for the affected building and sensor
+def test_anomaly_detector_flags_outliers():
+    provider = DataProvider()
+    detector = AnomalyDetector(alpha=0.2, z_threshold=3.0, warmup=5)
+    provider.subscribe(detector)
+
+    for i in range(30):
+        provider.set_data(_reading(300 + (i % 3) * 10, building="Gym"))
+        provider.set_data(_reading(400 + (i % 3) * 10))
+    assert detector.recent() == []
+
+    provider.set_data(_reading(900, building="Gym"))
+    anomalies = detector.recent()
+    assert len(anomalies) == 1
+    assert anomalies[0]['building'] == "Gym" and anomalies[0]['sensor'] == "PowerSensor"
+    assert anomalies[0]['z_score'] > 3.0
+
+    # Resetting the provider clears the learned state and the anomaly buffer
+    provider.reset()
+    assert detector.recent() == [] and detector.stats == {}
+    assert provider.data_history == []
+
+# Test that the anomaly buffer is bounded
+def test_anomaly_buffer_is_bounded():
+    detector = AnomalyDetector(alpha=0.5, z_threshold=1.0, warmup=2, max_anomalies=3)
+    for i in range(50):
+        detector.update(_reading(100 if i % 2 else 700))
+    assert len(detector.recent()) == 3
+    assert len(detector.recent(limit=2)) == 2
+
+# Test that recent() works on a snapshot while another thread appends anomalies
+def test_recent_while_appending():
+    detector = AnomalyDetector(max_anomalies=10)
+
+    class AppendingAnomaly(dict):
+        # Simulates update() running in another thread in the middle of recent()
+        def __getitem__(self, key):
+            detector.anomalies.append({'building': 'Gym', 'sensor': 'PowerSensor'})
+            return dict.__getitem__(self, key)
+
+    detector.anomalies.append({'building': 'Lab', 'sensor': 'PowerSensor'})
+    detector.anomalies.append(AppendingAnomaly(building='Gym', sensor='LightSensor'))
+    assert len(detector.recent(building='Gym')) == 1
+    assert len(detector.anomalies) == 3
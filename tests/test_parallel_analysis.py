@@ -0,0 +1,71 @@
+"""
+Parallel Analysis Tests:
+- Partitioning log rows by building
+- Process-pool results match the single-process path and the AnalysisEngine
+- Worker counts are clamped and the pool is shared between calls
+- Workers are started without forking the calling process
+"""
+import os
+import random
+from unittest.mock import patch
+from app.analysis import AnalysisEngine
+from app import parallel_analysis
+from app.parallel_analysis import partition_logs, analyze_buildings, clamp_workers
+
+def _logs(rows_per_building=300):
+    rng = random.Random(3)
+    logs = []
+    for i in range(rows_per_building):
+        for building in ("Main Library", "Gym", "Lab"):
+            logs.append({
+                "timestamp": f"2025-05-05T{i % 24:02d}:00:00",
+                "building": building,
+                "PowerSensor": str(rng.randint(0, 800)),
+            })
+    return logs
+
+# Test that rows are split into per-building arrays in log order
+def test_partition_logs():
+    partitions = partition_logs(_logs(5))
+    assert sorted(partitions) == ["Gym", "Lab", "Main Library"]
+    values, hours = partitions["Gym"]
+    assert len(values) == 5 and list(hours) == [0, 1, 2, 3, 4]
+
+# Test that the process pool produces the same results as running inline
+def test_parallel_matches_inline():
+    logs = _logs()
+    inline = analyze_buildings(logs, threshold=450, max_workers=1)
+    with patch("app.parallel_analysis.MIN_PARALLEL_READINGS", 0), \
+            patch("app.parallel_analysis._cpu_count", return_value=2):
+        parallel = analyze_buildings(logs, threshold=450, max_workers=2)
+    assert parallel == inline
+
+    # The per-building report agrees with the single-building AnalysisEngine
+    gym = [float(row["PowerSensor"]) for row in logs if row["building"] == "Gym"]
+    expected = AnalysisEngine(threshold=450).generate_detailed_report(gym)
+    report = inline["Gym"]["detailed_report"]
+    for key in ("average", "min", "max", "median", "std_dev", "alert_percentage", "trend"):
+        assert report[key] == expected[key]
+    assert sum(inline["Gym"]["severity"].values()) == sum(1 for v in gym if v >= 450)
+
+# Test that pool workers are never forked from the (multithreaded) calling process
+def test_pool_does_not_fork():
+    assert parallel_analysis._pool_context().get_start_method() in ("forkserver", "spawn")
+
+# Test that out-of-range worker counts are clamped and every call reuses one pool
+def test_workers_clamped_and_pool_reused():
+    cpus = os.cpu_count() or 1
+    assert clamp_workers(None) == cpus and clamp_workers(-1) == 1 and clamp_workers(10 ** 6) == cpus
+
+    logs = _logs(50)
+    inline = analyze_buildings(logs, threshold=450, max_workers=1)
+    with patch("app.parallel_analysis.MIN_PARALLEL_READINGS", 0), \
+            patch("app.parallel_analysis._cpu_count", return_value=2):
+        assert analyze_buildings(logs, threshold=450, max_workers=-1) == inline
+        assert analyze_buildings(logs, threshold=450, max_workers=10 ** 6) == inline
+        assert clamp_workers(10 ** 6) == 2
+        pool = parallel_analysis._pool
+        assert pool is not None
+        assert analyze_buildings(logs, threshold=450, max_workers=2) == inline
+        assert parallel_analysis._pool is pool
+    parallel_analysis.shutdown_pool()
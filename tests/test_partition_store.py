@@ -0,0 +1,82 @@
+"""
+Partitioned Log Backend Tests:
+- Rows land in one file per building and period, and queries match the CSV backend
+- Hourly partitions are compacted into gzip day files that stay readable and appendable
+- Retention drops or archives whole partitions
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from app.data_store import CSVLogBackend, LogWriter
+from app.partition_store import PartitionedLogBackend, PartitionMaintenance
+
+BUILDINGS = ['Main Library', 'Science Hall', 'Gym']
+START = datetime(2025, 4, 1)
+
+
+def _rows(count, start=START):
+    return [{'timestamp': (start + timedelta(minutes=20 * i)).isoformat(), 'building': BUILDINGS[i % 3],
+             'PowerSensor': round(100 + i * 1.5, 1), 'TemperatureSensor': 22.5, 'HumiditySensor': 60.1,
+             'LightSensor': 500 + i} for i in range(count)]
+
+
+def _as_floats(rows):
+    return [(r['timestamp'], r['building']) + tuple(float(r[k]) for k in list(r)[2:]) for r in rows]
+
+# Day partitions per building, pruned queries and buildings agree with the CSV backend
+def test_matches_csv_backend(tmp_path):
+    csv_backend = CSVLogBackend(str(tmp_path / 'log.csv'))
+    csv_backend.append(_rows(300))
+    csv_backend.close()
+    writer = LogWriter(path=str(tmp_path / 'parts'), backend='partitioned', flush_interval=60, batch_size=64)
+    for row in _rows(300):
+        writer.write(row)
+    writer.close()
+    backend = PartitionedLogBackend(str(tmp_path / 'parts'))
+
+    assert os.path.exists(tmp_path / 'parts' / 'Main%20Library' / '2025-04-01.csv')
+    assert len(backend.partitions()) == 5 * 3
+    assert len(backend.partitions('Gym', '2025-04-02')) == 1
+    for building in (None, 'Gym', 'Nowhere'):
+        for date in (None, '2025-04-02', '2025-04', '2025-04-03T05'):
+            expected, total = csv_backend.query(building, date, offset=5, limit=10)
+            rows, partitioned_total = backend.query(building, date, offset=5, limit=10)
+            assert partitioned_total == total
+            assert _as_floats(rows) == _as_floats(expected)
+    assert backend.buildings() == csv_backend.buildings()
+    assert _as_floats(backend.read()) == _as_floats(csv_backend.read())
+
+# Closed hourly partitions are merged into compressed day files; late rows are appended to them
+def test_compaction(tmp_path):
+    backend = PartitionedLogBackend(str(tmp_path / 'parts'), granularity='hour')
+    backend.append(_rows(150))
+    assert len(backend.partitions('Gym', '2025-04-01')) == 24
+    before = _as_floats(backend.read())
+
+    assert backend.compact(datetime(2025, 4, 3)) == 2 * 3
+    assert len(backend.partitions('Gym', '2025-04-01')) == 1
+    assert os.path.exists(tmp_path / 'parts' / 'Gym' / '2025-04-01.csv.gz')
+    assert not os.path.exists(tmp_path / 'parts' / 'Gym' / '2025-04-01T00.csv')
+    assert _as_floats(backend.read()) == before
+
+    late = _rows(1, START + timedelta(hours=10, minutes=1))
+    late[0]['building'] = 'Gym'
+    backend.append(late)
+    rows, total = backend.query('Gym', '2025-04-01T10')
+    assert total == 2 and rows[0]['timestamp'] == late[0]['timestamp']
+    assert PartitionedLogBackend(str(tmp_path / 'parts')).query('Gym', '2025-04-01')[1] == 25
+
+# Retention archives partitions that ended before the cutoff and reports the counts
+def test_retention(tmp_path):
+    backend = PartitionedLogBackend(str(tmp_path / 'parts'))
+    backend.append(_rows(300))
+    maintenance = PartitionMaintenance(backend, compact_after_days=1, retention_days=3,
+                                       archive_dir=str(tmp_path / 'archive'))
+    maintenance.run_once(now=datetime(2025, 4, 5, 12))
+
+    assert maintenance.status()['dropped'] == 3
+    assert backend.query(date='2025-04-01')[1] == 0
+    assert os.path.exists(tmp_path / 'archive' / 'Gym' / '2025-04-01.csv')
+    assert backend.partitions()[0]['period'] == '2025-04-02'
+    assert maintenance.status()['compressed'] == 2 * 3
@@ -0,0 +1,42 @@
+"""
+Quantile Sketch Tests:
+- Exact answers before the first compaction
+- Rank accuracy and bounded memory on a long stream
+- Merging sketches across buildings and days
+"""
+import random
+from app.sketches import KLLSketch, BuildingQuantiles
+
+# Test that a small sketch still holds every value and answers exactly
+def test_small_sketch_is_exact():
+    sketch = KLLSketch()
+    sketch.extend([500, 100, 300, 200, 400])
+    assert sketch.quantiles([0.0, 0.5, 1.0]) == [100, 300, 500]
+    assert KLLSketch().quantile(0.5) is None
+
+# Test that quantile estimates stay within a small rank error in bounded memory
+def test_sketch_accuracy_and_memory():
+    rng = random.Random(7)
+    data = [rng.uniform(0, 800) for _ in range(100000)]
+    sketch = KLLSketch(seed=1)
+    sketch.extend(data)
+
+    ordered = sorted(data)
+    for q in (0.5, 0.9, 0.99):
+        estimate = sketch.quantile(q)
+        rank = sum(1 for value in ordered if value <= estimate) / len(ordered)
+        assert abs(rank - q) < 0.02
+    assert sum(len(items) for items in sketch.compactors) < 2000
+
+# Test that per-building, per-day sketches merge into campus-wide percentiles
+def test_building_quantiles_merge():
+    tracker = BuildingQuantiles(default_building="Main Library")
+    for value in range(1, 101):
+        tracker.update({'PowerSensor': value, 'timestamp': '2025-05-05T10:00:00'})
+        tracker.update({'PowerSensor': value + 100, 'timestamp': '2025-05-06T10:00:00', 'building': 'Gym'})
+
+    assert tracker.buildings() == ['Gym', 'Main Library']
+    assert tracker.percentiles('Main Library')['median'] == 50
+    assert tracker.percentiles('Gym', start='2025-05-06')['p90'] == 190
+    assert tracker.percentiles()['median'] == 100
+    assert tracker.percentiles(end='2025-05-05')['p99'] == 99
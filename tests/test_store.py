@@ -3,11 +3,20 @@ Data Storage Tests:
 - Temporary file logging isolation
 - CSV append/read operations validation
 - Global config preservation during tests
+- Buffered writer batching, backpressure, retries and shutdown flush
+- CSV batches appended with a single write
+- Chunked, filtered and gzip-compressed CSV export on every backend
+- Tail reads resuming from checkpoints across partial lines, rotation and truncation
 """
 
+import csv
+import gzip
+import io
 import os
 import tempfile
-from app.data_store import append_log, read_logs
+from datetime import datetime, timedelta
+from app.data_store import append_log, read_logs, LogWriter, open_log_backend, stream_log_csv, date_range_bounds, \
+    read_log_tail, CSVLogBackend
 from unittest.mock import patch
 
 def test_log_operations():
@@ -32,3 +41,208 @@ def test_log_operations():
             # Assertions to verify the data was logged correctly
             assert len(logs) == 1
             assert logs[0]["PowerSensor"] == "250"  # CSV data is read as strings
+
+def _row(i):
+    return {'timestamp': f'2023-01-01T12:{i:02d}:00', 'building': 'Main Library', 'PowerSensor': i,
+            'TemperatureSensor': 22, 'HumiditySensor': 60, 'LightSensor': 500}
+
+# Rows stay queued until a flush, then land in one batch after a single header
+def test_log_writer_batches_rows(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = LogWriter(path=str(path), flush_interval=60, batch_size=1000)
+    for i in range(5):
+        assert writer.write(_row(i))
+    assert not path.exists()
+
+    writer.flush()
+    writer.write(_row(5))
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert lines[0].startswith("timestamp,building")
+    assert len(lines) == 7
+    assert writer.info()['written'] == 6
+
+# A full queue makes writers wait, then drop the row once block_timeout expires
+def test_log_writer_backpressure(tmp_path):
+    writer = LogWriter(path=str(tmp_path / "log.csv"), flush_interval=60, batch_size=1000,
+                       max_queue=2, block_timeout=0.01)
+    with writer._io_lock:  # hold the background thread off so the queue stays full
+        assert writer.write(_row(0)) and writer.write(_row(1))
+        assert not writer.write(_row(2))
+    writer.close()
+    assert writer.info()['dropped'] == 1
+    assert writer.info()['written'] == 2
+
+# A replaced log file is reopened, with a fresh header
+def test_log_writer_reopens_replaced_file(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = LogWriter(path=str(path), flush_interval=60, fsync="batch")
+    writer.write(_row(0))
+    writer.flush()
+    os.remove(path)
+    writer.write(_row(1))
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2 and lines[1].startswith("2023-01-01T12:01:00")
+    assert writer.info()['fsyncs'] == 2
+
+# A batch whose write fails is kept and written on the next flush, ahead of newer rows
+def test_log_writer_retries_failed_batch(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = LogWriter(path=str(path), flush_interval=60, batch_size=1000)
+    append = CSVLogBackend.append
+    calls = []
+
+    def flaky_append(backend, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise OSError("disk full")
+        append(backend, rows)
+
+    with patch.object(CSVLogBackend, 'append', flaky_append):
+        for i in range(3):
+            writer.write(_row(i))
+        try:
+            writer.flush()
+            assert False, "the failed write should propagate"
+        except OSError:
+            pass
+        assert writer.info()['retrying'] == 3
+        writer.write(_row(3))
+        writer.close()
+    lines = path.read_text().splitlines()
+    assert [line[14:16] for line in lines[1:]] == ['00', '01', '02', '03']
+    assert writer.info()['written'] == 4 and writer.info()['retrying'] == 0
+
+# Rows with malformed values are dropped and counted instead of blocking the writer with retries
+def test_log_writer_drops_malformed_batch(tmp_path):
+    writer = LogWriter(path=f"sqlite:///{tmp_path / 'log.db'}", backend='sql', flush_interval=60)
+    bad = dict(_row(0), PowerSensor='n/a')
+    writer.write(bad)
+    try:
+        writer.flush()
+        assert False, "the malformed row should fail its batch"
+    except ValueError:
+        pass
+    writer.write(_row(1))
+    writer.close()
+    assert writer.info()['dropped'] == 1 and writer.info()['written'] == 1
+
+# Each batch reaches the file in a single write, so concurrent appenders never split a row
+def test_csv_backend_writes_batch_at_once(tmp_path):
+    backend = CSVLogBackend(str(tmp_path / "log.csv"))
+    backend.append([_row(0)])
+    with patch('app.data_store.os.write', wraps=os.write) as write:
+        backend.append([_row(i) for i in range(1, 60)])
+    backend.close()
+    assert write.call_count == 1
+    assert len((tmp_path / "log.csv").read_text().splitlines()) == 61
+
+def _export_rows(count):
+    return [{'timestamp': (datetime(2025, 4, 1) + i * timedelta(minutes=30)).isoformat(),
+             'building': ['Main Library', 'Gym'][i % 2], 'PowerSensor': float(i), 'TemperatureSensor': 22.5,
+             'HumiditySensor': 60.0, 'LightSensor': 500.0} for i in range(count)]
+
+# Every backend streams the same filtered rows in bounded chunks
+def test_backends_stream_chunks(tmp_path):
+    locations = {'csv': str(tmp_path / 'log.csv'), 'columnar': str(tmp_path / 'columns'),
+                 'sql': f"sqlite:///{tmp_path / 'log.db'}", 'partitioned': str(tmp_path / 'parts')}
+    lo, hi = date_range_bounds('2025-04-02', '2025-04-03T11')
+    exported = {}
+    for kind, location in locations.items():
+        backend = open_log_backend(kind, location)
+        backend.append(_export_rows(200))
+        backend.flush()
+        chunks = list(backend.iter_chunks('Gym', lo, hi, chunk_size=7))
+        assert all(0 < len(chunk) <= 7 for chunk in chunks)
+        exported[kind] = [(row['timestamp'], float(row['PowerSensor'])) for chunk in chunks for row in chunk]
+        backend.close()
+    expected = [(row['timestamp'], row['PowerSensor']) for row in _export_rows(200)
+                if row['building'] == 'Gym' and '2025-04-02' <= row['timestamp'] < '2025-04-03T12']
+    assert len(expected) == 36
+    assert all(rows == expected for rows in exported.values())
+
+# The export is a gzip stream of the header and the matching rows; bad dates are rejected up front
+def test_stream_log_csv(tmp_path):
+    path = str(tmp_path / "log.csv")
+    with patch("app.data_store.LOG_FILE", path):
+        backend = open_log_backend('csv', path)
+        backend.append(_export_rows(100))
+        backend.close()
+        text = gzip.decompress(b"".join(stream_log_csv(end='2025-04-01', compress=True, chunk_size=10))).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == 48 and rows[-1]['timestamp'] == '2025-04-01T23:30:00'
+        assert b"".join(stream_log_csv(building='Nowhere')).decode().startswith('timestamp,building')
+        try:
+            stream_log_csv(start='yesterday')
+            assert False
+        except ValueError:
+            pass
+
+# Each tail read returns only the new complete rows and a checkpoint to resume from
+def test_read_log_tail(tmp_path):
+    path = tmp_path / "log.csv"
+    backend = open_log_backend('csv', str(path))
+    backend.append([_row(i) for i in range(5)])
+    backend.flush()
+    rows, checkpoint = read_log_tail(path=str(path), max_rows=3)
+    assert [row['PowerSensor'] for row in rows] == ['0', '1', '2'] and checkpoint['sequence'] == 3
+
+    with open(path, "a") as f:
+        f.write("2023-01-01T12:05:00,Main Library,5")  # still being written
+    rows, checkpoint = read_log_tail(checkpoint, path=str(path))
+    assert [row['PowerSensor'] for row in rows] == ['3', '4']
+    with open(path, "a") as f:
+        f.write(",22,60,500\n")
+    rows, checkpoint = read_log_tail(checkpoint, path=str(path))
+    assert [row['PowerSensor'] for row in rows] == ['5'] and checkpoint['sequence'] == 6
+    assert read_log_tail(checkpoint, path=str(path))[0] == []
+    assert [row['PowerSensor'] for row in read_log_tail(4, path=str(path))[0]] == ['4', '5']
+    backend.close()
+
+# After a rotation the rest of the renamed file is read first; a truncated log restarts at row 0
+def test_read_log_tail_rotation(tmp_path):
+    path = tmp_path / "log.csv"
+    backend = open_log_backend('csv', str(path))
+    backend.append([_row(i) for i in range(3)])
+    backend.flush()
+    _, checkpoint = read_log_tail(path=str(path), max_rows=1)
+    backend.append([_row(3)])
+    backend.close()
+    os.rename(path, f"{path}.1")
+    backend.append([_row(10), _row(11)])
+    backend.flush()
+
+    rows, checkpoint = read_log_tail(checkpoint, path=str(path))
+    assert [row['PowerSensor'] for row in rows] == ['1', '2', '3', '10', '11'] and checkpoint['sequence'] == 2
+    with open(path, "w") as f:
+        f.write("timestamp,building,PowerSensor,TemperatureSensor,HumiditySensor,LightSensor\n")
+    backend.append([_row(20)])
+    backend.close()
+    rows, checkpoint = read_log_tail(checkpoint, path=str(path))
+    assert [row['PowerSensor'] for row in rows] == ['20'] and checkpoint['sequence'] == 1
+
+# A copy-and-truncate rotation is detected even after the log has grown back past the checkpoint
+def test_read_log_tail_truncated_and_refilled(tmp_path):
+    path = tmp_path / "log.csv"
+    backend = open_log_backend('csv', str(path))
+    backend.append([_row(i) for i in range(4)])
+    backend.flush()
+    _, checkpoint = read_log_tail(path=str(path))
+    os.truncate(path, 0)
+    backend.append([_row(i) for i in range(20, 30)])
+    backend.close()
+
+    rows, checkpoint = read_log_tail(checkpoint, path=str(path))
+    assert [row['PowerSensor'] for row in rows] == [str(i) for i in range(20, 30)]
+    assert checkpoint['sequence'] == 10
+
+# Tailing the default log is refused when rows go to another backend instead of LOG_FILE
+def test_read_log_tail_requires_csv_backend(tmp_path):
+    with patch("app.data_store.LOG_BACKEND", "columnar"):
+        try:
+            read_log_tail()
+            assert False
+        except ValueError as e:
+            assert "columnar" in str(e)
+        assert read_log_tail(path=str(tmp_path / "log.csv"))[0] == []